@@ -0,0 +1,65 @@
+import argparse
+import os
+import sys
+import tempfile
+import time
+from datetime import date
+
+from src.models.entities import OperationDTO, OperationType
+from src.services.db_service import SQLAlchemyDBService
+
+# Throughput of applying a payroll-like run of deposits one post_operation call (and commit) at a time
+# versus a single apply_operations batch, on a SQLite file database (or the scratch database given by --db-url).
+# --no-returning makes SQLite take the path used on MySQL, which has no INSERT ... RETURNING.
+
+
+def seed(sqla: SQLAlchemyDBService, accounts: int):
+    sqla.metadata.create_all(sqla.engine)
+    with sqla.engine.begin() as connection:
+        connection.execute(sqla.conta_table.insert(), [{
+            'id_conta': account_id, 'id_pessoa': account_id, 'saldo': 0, 'limite_saque_diario': 1000,
+            'flag_ativo': True, 'tipo_conta': 1, 'data_criacao': date.today(), 'senha': 'not a real hash'
+        } for account_id in range(1, accounts + 1)])
+
+
+def run(sqla: SQLAlchemyDBService, args) -> tuple[float, float]:
+    seed(sqla, args.accounts)
+    operations = [OperationDTO(account_id=index % args.accounts + 1, amount=10.0,
+                               operation_type=OperationType.Deposit) for index in range(args.operations)]
+
+    start = time.perf_counter()
+    for operation in operations:
+        sqla.post_operation(operation)
+    single = time.perf_counter() - start
+
+    start = time.perf_counter()
+    sqla.apply_operations(operations)
+    batch = time.perf_counter() - start
+    return single, batch
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description='Single operations vs apply_operations throughput.')
+    parser.add_argument('--db-url', default=None, help='Defaults to a temporary SQLite file.')
+    parser.add_argument('--operations', type=int, default=5000)
+    parser.add_argument('--accounts', type=int, default=1000)
+    parser.add_argument('--no-returning', action='store_true', help='Reads the new transaction ids back instead.')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix='dustydollar-batch-') as work_dir:
+        sqla = SQLAlchemyDBService(args.db_url or f"sqlite:///{os.path.join(work_dir, 'batch.db')}")
+        if args.no_returning:
+            sqla.engine.dialect.insert_executemany_returning_sort_by_parameter_order = False
+        try:
+            single, batch = run(sqla, args)
+        finally:
+            sqla.engine.dispose()
+
+    print(f'{args.operations} deposits over {args.accounts} accounts')
+    print(f'post_operation:   {single:8.3f} s {args.operations / single:>10.0f} ops/s')
+    print(f'apply_operations: {batch:8.3f} s {args.operations / batch:>10.0f} ops/s ({single / batch:.1f}x)')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
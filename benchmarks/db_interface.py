@@ -0,0 +1,245 @@
+import argparse
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import date, datetime, timedelta
+
+from sqlalchemy import event, insert
+
+from src.env_variables import STATEMENT_MAX_PAGE_SIZE
+from src.models.entities import Account, AccountType, OperationDTO, OperationType, Person
+from src.services.db_service import SQLAlchemyDBService
+
+# Calls every DBInterface method directly on a seeded SQLite database, for a few hot accounts with a very long
+# history (1M transactions by default) and many cold accounts with a short one. Reports ops/s, the memory allocated
+# and the SQL statements executed per call, and with --baseline fails when a case got slower, allocates more or
+# issues more queries than in a previous --output run. Baselines are only comparable on the same machine and shape:
+#   python -m benchmarks.db_interface --output results/db_interface.json
+#   python -m benchmarks.db_interface --baseline results/db_interface.json
+
+SHAPE_ARGUMENTS = ('hot_accounts', 'hot_transactions', 'cold_accounts', 'cold_transactions', 'seed')
+
+
+def transaction_rows(rng: random.Random, account_ids: range, per_account: int, days: int, chunk_size: int = 50000):
+    today = date.today()
+    rows = []
+    for account_id in account_ids:
+        for _ in range(per_account):
+            rows.append({
+                'id_conta': account_id,
+                'valor': round(rng.uniform(-200.0, 500.0), 2),
+                'data_transacao': today - timedelta(days=rng.randrange(days))
+            })
+            if len(rows) == chunk_size:
+                yield rows
+                rows = []
+    if rows:
+        yield rows
+
+
+def seed_database(sqla: SQLAlchemyDBService, args) -> tuple[range, range]:
+    rng = random.Random(args.seed)
+    hot = range(1, args.hot_accounts + 1)
+    cold = range(hot.stop, hot.stop + args.cold_accounts)
+    sqla.metadata.create_all(sqla.engine)
+    with sqla.engine.begin() as connection:
+        connection.execute(insert(sqla.conta_table), [{
+            'id_conta': account_id, 'id_pessoa': account_id, 'saldo': 1000000000, 'limite_saque_diario': 1000000000,
+            'flag_ativo': True, 'tipo_conta': 1, 'data_criacao': date.today() - timedelta(days=3650),
+            'senha': 'not a real hash'
+        } for account_id in range(hot.start, cold.stop)])
+        for rows in transaction_rows(rng, hot, args.hot_transactions, 365):
+            connection.execute(insert(sqla.transactions_table), rows)
+        for rows in transaction_rows(rng, cold, args.cold_transactions, 90):
+            connection.execute(insert(sqla.transactions_table), rows)
+    sqla.rebuild_withdrawal_counters(date.today())
+    return hot, cold
+
+
+def cases() -> dict:
+    deposit, withdrawal = OperationType.Deposit, OperationType.Withdrawal
+    today = date.today()
+    return {
+        'get_account': lambda sqla, account_id: sqla.get_account(account_id),
+        'check_account_active': lambda sqla, account_id: sqla.check_account_active(account_id),
+        'get_balance': lambda sqla, account_id: sqla.get_balance(account_id),
+        'get_account_version': lambda sqla, account_id: sqla.get_account_version(account_id),
+        'reached_withdrawal_limit': lambda sqla, account_id: sqla.reached_withdrawal_limit(account_id, 10.0),
+        'get_extract_from_account[page]':
+            lambda sqla, account_id: sqla.get_extract_from_account(account_id, limit=STATEMENT_MAX_PAGE_SIZE),
+        'get_extract_from_account[30d]': lambda sqla, account_id: sqla.get_extract_from_account(account_id),
+        'iter_extract_from_account[30d]':
+            lambda sqla, account_id: sum(1 for _ in sqla.iter_extract_from_account(account_id)),
+        'make_transaction': lambda sqla, account_id: sqla.make_transaction(account_id, 1.0),
+        'post_operation': lambda sqla, account_id: sqla.post_operation(
+            OperationDTO(account_id=account_id, amount=1.0, operation_type=deposit)),
+        'execute_withdrawal': lambda sqla, account_id: sqla.execute_withdrawal(account_id, 1.0),
+        'apply_operations': lambda sqla, account_id: sqla.apply_operations([
+            OperationDTO(account_id=account_id, amount=2.0, operation_type=deposit),
+            OperationDTO(account_id=account_id, amount=1.0, operation_type=withdrawal)]),
+        'deposit_into_account': lambda sqla, account_id: sqla.deposit_into_account(account_id, 1.0),
+        'withdraw_from_account': lambda sqla, account_id: sqla.withdraw_from_account(account_id, 1.0),
+        'change_account_active_status': lambda sqla, account_id: sqla.change_account_active_status(account_id, True),
+        'update_account_password': lambda sqla, account_id: sqla.update_account_password(
+            account_id, 'not a real hash', expected_hash='not a real hash'),
+        # new rows every call: the account id only picks the owner
+        'create_new_person': lambda sqla, account_id: sqla.create_new_person(
+            Person(id_pessoa=None, nome=f'Pessoa {account_id}', cpf=f'{account_id:011d}', data_nascimento=today)),
+        'create_new_account': lambda sqla, account_id: sqla.create_new_account(
+            Account(id_conta=None, id_pessoa=account_id, saldo=0.0, limite_saque_diario=1000.0, flag_ativo=True,
+                    tipo_conta=AccountType.Checking, data_criacao=today), 'not a real hash'),
+    }
+
+
+def measure(sqla: SQLAlchemyDBService, call, account_ids, min_time: float, min_calls: int, rounds: int,
+            profiled_calls: int) -> dict:
+    # Best of a few rounds, like timeit: the slower rounds measure the machine's noise rather than the code
+    total_calls, best = 0, None
+    for _ in range(rounds):
+        calls = 0
+        start = time.perf_counter()
+        while calls < min_calls or time.perf_counter() - start < min_time / rounds:
+            call(sqla, next(account_ids))
+            calls += 1
+        per_call = (time.perf_counter() - start) / calls
+        best = per_call if best is None else min(best, per_call)
+        total_calls += calls
+
+    # Allocations and statements are counted on separate calls, so neither tracemalloc nor the event listener
+    # slows down the timed ones
+    statements = 0
+
+    def count_statement(*_):
+        nonlocal statements
+        statements += 1
+
+    event.listen(sqla.engine, 'before_cursor_execute', count_statement)
+    tracemalloc.start()
+    peaks = []
+    try:
+        for _ in range(profiled_calls):
+            tracemalloc.reset_peak()
+            before, _ = tracemalloc.get_traced_memory()
+            call(sqla, next(account_ids))
+            peaks.append(tracemalloc.get_traced_memory()[1] - before)
+    finally:
+        tracemalloc.stop()
+        event.remove(sqla.engine, 'before_cursor_execute', count_statement)
+
+    return {
+        'calls': total_calls,
+        'ops_per_s': round(1 / best, 2),
+        'us_per_call': round(best * 1e6, 1),
+        'peak_kib_per_call': round(sum(peaks) / len(peaks) / 1024, 1),
+        'queries_per_call': round(statements / profiled_calls, 2),
+    }
+
+
+def cycle(rng: random.Random, account_ids: range):
+    while True:
+        yield rng.choice(account_ids)
+
+
+def regressions(results: dict, baseline: dict, max_slowdown: float, max_extra_memory: float) -> list:
+    found = []
+    for name, result in results.items():
+        previous = baseline['results'].get(name)
+        if previous is None:
+            continue
+        if result['ops_per_s'] < previous['ops_per_s'] * (1 - max_slowdown):
+            found.append(f"{name}: {previous['ops_per_s']:.0f} -> {result['ops_per_s']:.0f} ops/s")
+        if result['queries_per_call'] > previous['queries_per_call']:
+            found.append(f"{name}: {previous['queries_per_call']} -> {result['queries_per_call']} queries per call")
+        if result['peak_kib_per_call'] > previous['peak_kib_per_call'] * (1 + max_extra_memory) + 1:
+            found.append(f"{name}: {previous['peak_kib_per_call']} -> {result['peak_kib_per_call']} KiB per call")
+    return found
+
+
+def git_commit() -> str | None:
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_cases(sqla: SQLAlchemyDBService, args) -> dict:
+    start = time.perf_counter()
+    hot, cold = seed_database(sqla, args)
+    print(f'seeded {len(hot)} hot and {len(cold)} cold accounts in {time.perf_counter() - start:.1f} s')
+
+    rng = random.Random(args.seed)
+    results = {}
+    print(f"{'case':<42}{'ops/s':>12}{'us/call':>12}{'KiB/call':>12}{'queries':>10}")
+    for name, call in cases().items():
+        if args.only and not any(name.startswith(prefix) for prefix in args.only):
+            continue
+        for shape, account_ids in (('hot', hot), ('cold', cold)):
+            case = f'{name}/{shape}'
+            result = results[case] = measure(sqla, call, cycle(rng, account_ids), args.min_time, args.min_calls,
+                                             args.rounds, args.profiled_calls)
+            print(f"{case:<42}{result['ops_per_s']:>12.1f}{result['us_per_call']:>12.1f}"
+                  f"{result['peak_kib_per_call']:>12.1f}{result['queries_per_call']:>10.2f}")
+    return results
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description='Per-method benchmarks of SQLAlchemyDBService on SQLite.')
+    parser.add_argument('--hot-accounts', type=int, default=1)
+    parser.add_argument('--hot-transactions', type=int, default=1000000, help='Per hot account, over a year.')
+    parser.add_argument('--cold-accounts', type=int, default=10000)
+    parser.add_argument('--cold-transactions', type=int, default=20, help='Per cold account, over 90 days.')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--min-time', type=float, default=1.0, help='Seconds each case is timed for.')
+    parser.add_argument('--min-calls', type=int, default=3, help='Per round.')
+    parser.add_argument('--rounds', type=int, default=3, help='The best round is kept.')
+    parser.add_argument('--profiled-calls', type=int, default=5, help='Calls traced for memory and queries.')
+    parser.add_argument('--only', action='append', help='Runs only the cases starting with this (repeatable).')
+    parser.add_argument('--output', help='Saves the results as JSON.')
+    parser.add_argument('--baseline', help='A previous --output file; exits with 1 on regressions.')
+    parser.add_argument('--max-slowdown', type=float, default=0.25, help='Tolerated ops/s drop (fraction).')
+    parser.add_argument('--max-extra-memory', type=float, default=0.25, help='Tolerated allocation growth.')
+    args = parser.parse_args()
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline) as file:
+            baseline = json.load(file)
+        shape = {key: getattr(args, key) for key in SHAPE_ARGUMENTS}
+        if {key: baseline['config'].get(key) for key in SHAPE_ARGUMENTS} != shape:
+            parser.error('the baseline was recorded with a different data shape')
+
+    with tempfile.TemporaryDirectory(prefix='dustydollar-benchmark-') as work_dir:
+        sqla = SQLAlchemyDBService(f"sqlite:///{os.path.join(work_dir, 'benchmark.db')}")
+        try:
+            results = run_cases(sqla, args)
+        finally:
+            sqla.engine.dispose()
+
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, 'w') as file:
+            json.dump({
+                'started_at': datetime.now().isoformat(timespec='seconds'),
+                'git_commit': git_commit(),
+                'config': {key: value for key, value in vars(args).items() if key not in ('output', 'baseline')},
+                'results': results,
+            }, file, indent=2)
+
+    if baseline is not None:
+        found = regressions(results, baseline, args.max_slowdown, args.max_extra_memory)
+        for regression in found:
+            print(f'REGRESSION {regression}')
+        if found:
+            return 1
+        print(f"no regressions against {baseline.get('git_commit') or args.baseline}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,86 @@
+import argparse
+import sys
+import timeit
+import tracemalloc
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+
+from src.models.entities import Transaction
+
+# Per-row cost of turning statement rows into entities and back into dicts, before and after the entities
+# were slotted and built straight from the driver rows. The "before" path is kept here verbatim.
+
+
+@dataclass
+class LegacyTransaction:
+    id_transacao: int
+    id_conta: int
+    valor: float
+    data_transacao: date
+
+    @staticmethod
+    def from_dict(data: dict):
+        return LegacyTransaction(
+            id_transacao=int(data.get('id_transacao')) if data.get('id_transacao') else None,
+            id_conta=int(data.get('id_conta')),
+            valor=float(data.get('valor')),
+            data_transacao=datetime.strptime(data.get("data_transacao"), '%Y-%m-%d').date()
+        )
+
+    def to_dict(self) -> dict:
+        return dict(
+            id_transacao=self.id_transacao,
+            id_conta=self.id_conta,
+            valor=self.valor,
+            data_transacao=self.data_transacao.strftime('%Y-%m-%d')
+        )
+
+
+def legacy_load(rows: list) -> list:
+    return [LegacyTransaction.from_dict(dict(
+        id_transacao=row[0],
+        id_conta=row[1],
+        valor=row[2],
+        data_transacao=row[3].strftime('%Y-%m-%d')
+    )) for row in rows]
+
+
+def load(rows: list) -> list:
+    return [Transaction.from_row(row) for row in rows]
+
+
+def allocated_bytes(build, rows: list) -> int:
+    tracemalloc.start()
+    entities = build(rows)
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del entities
+    return size
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description='Per-row cost of the statement entity mapping.')
+    parser.add_argument('--rows', type=int, default=10000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    today = date.today()
+    rows = [(row_id, 1, Decimal(f'{row_id % 1000}.25'), today - timedelta(days=row_id % 30))
+            for row_id in range(1, args.rows + 1)]
+
+    print(f'{args.rows} rows, best of {args.repeat} (microseconds per row)')
+    print(f"{'':<10}{'load':>10}{'to_dict':>10}{'total':>10}{'memory':>16}")
+    for name, build in (('before', legacy_load), ('after', load)):
+        entities = build(rows)
+        load_time = min(timeit.repeat(lambda: build(rows), number=1, repeat=args.repeat))
+        dump_time = min(timeit.repeat(lambda: [entity.to_dict() for entity in entities], number=1,
+                                      repeat=args.repeat))
+        per_row = [seconds / args.rows * 1e6 for seconds in (load_time, dump_time, load_time + dump_time)]
+        memory = allocated_bytes(build, rows) / args.rows
+        print(f'{name:<10}' + ''.join(f'{value:>10.2f}' for value in per_row) + f'{memory:>10.0f} B/row')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
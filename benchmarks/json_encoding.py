@@ -0,0 +1,66 @@
+import argparse
+import sys
+import timeit
+from datetime import date, timedelta
+from unittest.mock import patch
+
+from flask import Flask
+from flask.json.provider import DefaultJSONProvider
+
+from src import json_provider
+from src.json_provider import FastJSONProvider
+from src.models.entities import Transaction
+
+# Time to encode the acc_statement response for statements of different sizes: Flask's default provider fed
+# with to_dict() rows (the previous behaviour), FastJSONProvider on the stdlib encoder and on orjson.
+
+
+def statement_response(transactions) -> dict:
+    return {
+        'status': 'success',
+        'message': 'The bank statement was successfully extracted for account 1',
+        'bank_statement': transactions
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description='acc_statement JSON encoding benchmark.')
+    parser.add_argument('--rows', type=int, nargs='+', default=[100, 10000, 100000])
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    default_app, fast_app = Flask('default'), Flask('fast')
+    fast_app.json = FastJSONProvider(fast_app)
+    assert isinstance(default_app.json, DefaultJSONProvider)
+
+    def default_encoder(transactions):
+        with default_app.app_context():
+            return default_app.json.response(statement_response([t.to_dict() for t in transactions]))
+
+    def stdlib_encoder(transactions):
+        with patch.object(json_provider, 'orjson', None), fast_app.app_context():
+            return fast_app.json.response(statement_response(transactions))
+
+    def orjson_encoder(transactions):
+        with fast_app.app_context():
+            return fast_app.json.response(statement_response(transactions))
+
+    encoders = [('flask default + to_dict', default_encoder), ('stdlib fallback', stdlib_encoder)]
+    if json_provider.orjson is not None:
+        encoders.append(('orjson', orjson_encoder))
+    else:
+        print('orjson is not installed, skipping it')
+
+    today = date.today()
+    print(f"{'rows':>8}  {'encoder':<24}{'ms':>10}{'us/row':>10}")
+    for rows in args.rows:
+        transactions = [Transaction(row_id, 1, row_id % 1000 + 0.25, today - timedelta(days=row_id % 30))
+                        for row_id in range(1, rows + 1)]
+        for name, encoder in encoders:
+            seconds = min(timeit.repeat(lambda: encoder(transactions), number=1, repeat=args.repeat))
+            print(f'{rows:>8}  {name:<24}{seconds * 1000:>10.2f}{seconds / rows * 1e6:>10.2f}')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,327 @@
+import argparse
+import http.client
+import json
+import os
+import queue
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+
+import bcrypt
+from sqlalchemy import insert
+
+from src.models.entities import Account, Person, Transaction
+from src.services.db_service import SQLAlchemyDBService
+from src.services.memory_db_service import InMemoryDBService
+
+# Drives the real app with a mixed workload, either in-process through Flask's test client or over HTTP against a
+# local gunicorn, on a seeded SQLite database (or InMemoryDBService with --backend memory). Reports throughput and
+# latency percentiles per route and saves them as JSON, e.g.:
+#   python -m benchmarks.load_test --duration 30 --concurrency 8 --output results/baseline.json
+#   python -m benchmarks.load_test --mode gunicorn --rate 200 --baseline results/baseline.json
+
+PASSWORD = 'load-test'
+WORKLOADS = {
+    'mixed': {'login': 5, 'deposit': 20, 'withdraw': 15, 'balance': 35, 'statement': 25},
+    'read': {'balance': 60, 'statement': 40},
+    'write': {'deposit': 50, 'withdraw': 50},
+}
+
+
+def seed_rows(accounts: int, transactions_per_account: int) -> tuple:
+    rng = random.Random(42)
+    today = date.today()
+    password_hash = bcrypt.hashpw(PASSWORD.encode(), bcrypt.gensalt(rounds=10)).decode()
+    people = [{
+        'id_pessoa': account_id, 'nome': f'Pessoa {account_id}', 'cpf': f'{account_id:011d}',
+        'data_nascimento': today - timedelta(days=365 * 30)
+    } for account_id in range(1, accounts + 1)]
+    account_rows = [{
+        'id_conta': account_id, 'id_pessoa': account_id, 'saldo': 1000000.0, 'limite_saque_diario': 1000000.0,
+        'flag_ativo': True, 'tipo_conta': 1, 'data_criacao': today - timedelta(days=400), 'senha': password_hash
+    } for account_id in range(1, accounts + 1)]
+    transactions = [{
+        'id_conta': account_id, 'valor': round(rng.uniform(-100.0, 100.0), 2),
+        'data_transacao': today - timedelta(days=rng.randrange(30))
+    } for account_id in range(1, accounts + 1) for _ in range(transactions_per_account)]
+    return people, account_rows, transactions
+
+
+def seed_database(db_url: str, accounts: int, transactions_per_account: int):
+    people, account_rows, transactions = seed_rows(accounts, transactions_per_account)
+    sqla = SQLAlchemyDBService(db_url)
+    sqla.metadata.create_all(sqla.engine)
+    with sqla.engine.begin() as connection:
+        connection.execute(insert(sqla.pessoa_table), people)
+        connection.execute(insert(sqla.conta_table), account_rows)
+        connection.execute(insert(sqla.transactions_table), transactions)
+    sqla.engine.dispose()
+
+
+def seed_snapshot(path: str, accounts: int, transactions_per_account: int):
+    # The same rows as seed_database, in the snapshot DB_BACKEND=memory loads through MEMORY_SNAPSHOT
+    people, account_rows, transactions = seed_rows(accounts, transactions_per_account)
+    service = InMemoryDBService()
+    for person in people:
+        service.create_new_person(Person(**person))
+    for row in account_rows:
+        service.create_new_account(Account.from_dict(dict(row, data_criacao=row['data_criacao'].isoformat())),
+                                   row['senha'])
+    service.add_transactions(Transaction(id_transacao=None, **row) for row in transactions)
+    service.snapshot(path)
+
+
+class InProcessClient:
+    def __init__(self, app):
+        self._client = app.test_client()
+
+    def request(self, method: str, path: str, body: dict = None, token: str = None) -> tuple:
+        headers = {'Authorization': f'Bearer {token}'} if token else {}
+        response = self._client.open(path, method=method, json=body, headers=headers)
+        return response.status_code, response.get_data()
+
+
+class HttpClient:
+    def __init__(self, host: str, port: int):
+        self._connection = http.client.HTTPConnection(host, port, timeout=60)
+
+    def request(self, method: str, path: str, body: dict = None, token: str = None) -> tuple:
+        headers = {'Content-Type': 'application/json'}
+        if token:
+            headers['Authorization'] = f'Bearer {token}'
+        try:
+            self._connection.request(method, path, body=json.dumps(body) if body is not None else None,
+                                     headers=headers)
+            response = self._connection.getresponse()
+            return response.status, response.read()
+        except (http.client.HTTPException, OSError):
+            self._connection.close()
+            return 599, b''
+
+
+def run_operation(client, operation: str, account_id: int, token: str) -> int:
+    if operation == 'login':
+        status, _ = client.request('POST', '/account/login', {'account_id': account_id, 'password': PASSWORD})
+    elif operation == 'deposit':
+        status, _ = client.request('POST', '/account/deposit', {'account_id': account_id, 'amount': 10.0}, token)
+    elif operation == 'withdraw':
+        status, _ = client.request('POST', '/account/withdraw', {'account_id': account_id, 'amount': 5.0}, token)
+    elif operation == 'balance':
+        status, _ = client.request('GET', f'/account/balance?account_id={account_id}', token=token)
+    else:
+        status, _ = client.request('GET', f'/account/statement?account_id={account_id}', token=token)
+    return status
+
+
+def percentile(sorted_values: list, fraction: float) -> float:
+    # nearest-rank
+    index = max(int(round(fraction * len(sorted_values) + 0.5)) - 1, 0)
+    return sorted_values[min(index, len(sorted_values) - 1)]
+
+
+def summarize(samples: list, duration: float) -> dict:
+    latencies = sorted(latency for latency, _ in samples)
+    statuses = defaultdict(int)
+    for _, status in samples:
+        statuses[str(status)] += 1
+    return {
+        'requests': len(samples),
+        'throughput_rps': round(len(samples) / duration, 2),
+        'errors': sum(count for status, count in statuses.items() if int(status) >= 500),
+        'statuses': dict(sorted(statuses.items())),
+        'latency_ms': {
+            'p50': round(percentile(latencies, 0.50) * 1000, 3),
+            'p95': round(percentile(latencies, 0.95) * 1000, 3),
+            'p99': round(percentile(latencies, 0.99) * 1000, 3),
+            'max': round(latencies[-1] * 1000, 3),
+        } if latencies else {}
+    }
+
+
+def run_load(make_client, tokens: dict, args) -> tuple:
+    weights = WORKLOADS[args.workload]
+    operations, cumulative_weights = list(weights), list(weights.values())
+    samples = defaultdict(list)
+    samples_lock = threading.Lock()
+    deadline = time.perf_counter() + args.duration
+    # With a target rate the send times are scheduled up front and latency is measured from the scheduled time,
+    # so a stalled server shows up in the percentiles instead of just lowering the request rate
+    schedule = queue.Queue(maxsize=args.concurrency * 2) if args.rate else None
+
+    def worker(worker_id: int):
+        rng = random.Random(args.seed + worker_id)
+        client = make_client()
+        while True:
+            if schedule is not None:
+                scheduled = schedule.get()
+                if scheduled is None:
+                    return
+                time.sleep(max(scheduled - time.perf_counter(), 0))
+                start = scheduled
+            else:
+                start = time.perf_counter()
+                if start >= deadline:
+                    return
+            operation = rng.choices(operations, cumulative_weights)[0]
+            account_id = rng.randint(1, args.accounts)
+            status = run_operation(client, operation, account_id, tokens[account_id])
+            latency = time.perf_counter() - start
+            with samples_lock:
+                samples[operation].append((latency, status))
+
+    threads = [threading.Thread(target=worker, args=(worker_id,)) for worker_id in range(args.concurrency)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    if schedule is not None:
+        interval = 1.0 / args.rate
+        next_send = started
+        while next_send < deadline:
+            schedule.put(next_send)
+            next_send += interval
+        for _ in threads:
+            schedule.put(None)
+    for thread in threads:
+        thread.join()
+    return samples, time.perf_counter() - started
+
+
+def log_in_everyone(client, accounts: int) -> dict:
+    tokens = {}
+    for account_id in range(1, accounts + 1):
+        status, body = client.request('POST', '/account/login', {'account_id': account_id, 'password': PASSWORD})
+        if status != 200:
+            raise RuntimeError(f'Could not log in account {account_id}: {status} {body[:200]!r}')
+        tokens[account_id] = json.loads(body)['token']
+    return tokens
+
+
+def start_gunicorn(env: dict, port: int, log_path: str) -> subprocess.Popen:
+    log = open(log_path, 'w')
+    server = subprocess.Popen(['gunicorn', '--config', 'gunicorn_conf.py', '--bind', f'127.0.0.1:{port}',
+                               'src.app:app'], env=env, stdout=log, stderr=subprocess.STDOUT)
+    for _ in range(100):
+        try:
+            status, _ = HttpClient('127.0.0.1', port).request('GET', '/metrics')
+            if status == 200:
+                return server
+        except OSError:
+            pass
+        if server.poll() is not None:
+            break
+        time.sleep(0.1)
+    server.terminate()
+    server.wait()
+    log.close()
+    # the log goes away with the temporary directory, so its end is kept in the error
+    with open(log_path) as file:
+        raise RuntimeError(f'gunicorn did not start:\n{file.read()[-4000:]}')
+
+
+def git_commit() -> str | None:
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def print_report(result: dict, baseline: dict | None):
+    print(f"{'route':<12}{'requests':>10}{'rps':>10}{'errors':>8}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}"
+          + (f"{'p95 vs baseline':>18}" if baseline else ''))
+    for route, summary in [*sorted(result['routes'].items()), ('total', result['total'])]:
+        latency = summary['latency_ms']
+        line = (f"{route:<12}{summary['requests']:>10}{summary['throughput_rps']:>10.1f}{summary['errors']:>8}"
+                f"{latency.get('p50', 0):>10.2f}{latency.get('p95', 0):>10.2f}{latency.get('p99', 0):>10.2f}")
+        previous = (baseline['routes'].get(route) if route != 'total' else baseline['total']) if baseline else None
+        if previous and previous['latency_ms'].get('p95'):
+            line += f"{(latency['p95'] / previous['latency_ms']['p95'] - 1) * 100:>+17.1f}%"
+        print(line)
+
+
+def serve_and_load(args, work_dir: str) -> tuple[dict, float]:
+    # Read by src/config.py, so they have to be set before the app is imported (here or in gunicorn)
+    if args.backend == 'memory':
+        snapshot = os.path.join(work_dir, 'load.json')
+        seed_snapshot(snapshot, args.accounts, args.transactions_per_account)
+        os.environ['DB_BACKEND'] = 'memory'
+        os.environ['MEMORY_SNAPSHOT'] = snapshot
+    else:
+        db_url = f"sqlite:///{os.path.join(work_dir, 'load.db')}"
+        seed_database(db_url, args.accounts, args.transactions_per_account)
+        os.environ['DATABASE_URL'] = db_url
+
+    server = None
+    if args.mode == 'gunicorn':
+        server = start_gunicorn(dict(os.environ), args.port, os.path.join(work_dir, 'gunicorn.log'))
+
+        def make_client():
+            return HttpClient('127.0.0.1', args.port)
+    else:
+        from src.app import app
+
+        def make_client():
+            return InProcessClient(app)
+
+    try:
+        tokens = log_in_everyone(make_client(), args.accounts)
+        samples, duration = run_load(make_client, tokens, args)
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+        if args.mode != 'gunicorn' and args.backend == 'sqlite':
+            # closes the app's connections to the database file before its directory is removed
+            from src.config import db_engine
+            db_engine.dispose()
+    return samples, duration
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description='Load test of the API with latency percentiles per route.')
+    parser.add_argument('--mode', choices=('inprocess', 'gunicorn'), default='inprocess')
+    parser.add_argument('--backend', choices=('sqlite', 'memory'), default='sqlite',
+                        help='memory serves the app from InMemoryDBService (one gunicorn worker).')
+    parser.add_argument('--workload', choices=sorted(WORKLOADS), default='mixed')
+    parser.add_argument('--duration', type=float, default=10.0, help='Seconds.')
+    parser.add_argument('--concurrency', type=int, default=4, help='Client threads.')
+    parser.add_argument('--rate', type=float, default=0.0,
+                        help='Target requests/s across all threads (default: as fast as the threads go).')
+    parser.add_argument('--accounts', type=int, default=100)
+    parser.add_argument('--transactions-per-account', type=int, default=100)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--port', type=int, default=5099, help='gunicorn mode only.')
+    parser.add_argument('--output', help='Saves the results as JSON.')
+    parser.add_argument('--baseline', help='A previous --output file to compare the p95 latencies with.')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix='dustydollar-load-') as work_dir:
+        samples, duration = serve_and_load(args, work_dir)
+
+    result = {
+        'started_at': datetime.now().isoformat(timespec='seconds'),
+        'git_commit': git_commit(),
+        'config': {key: value for key, value in vars(args).items() if key not in ('output', 'baseline')},
+        'duration_s': round(duration, 3),
+        'routes': {route: summarize(route_samples, duration) for route, route_samples in samples.items()},
+        'total': summarize([sample for route_samples in samples.values() for sample in route_samples], duration),
+    }
+    baseline = None
+    if args.baseline:
+        with open(args.baseline) as file:
+            baseline = json.load(file)
+    print_report(result, baseline)
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, 'w') as file:
+            json.dump(result, file, indent=2)
+    return 1 if result['total']['errors'] else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,149 @@
+import argparse
+import random
+import sys
+import warnings
+from datetime import datetime, timedelta
+
+from sqlalchemy import event, insert
+from sqlalchemy.exc import SAWarning
+
+from src.models.entities import OperationDTO, OperationType
+from src.services.db_service import SQLAlchemyDBService
+
+# Runs every SQLAlchemyDBService query against a seeded database, EXPLAINs each statement and fails if any
+# of them falls back to a full table (or full index) scan. It writes to the database, so point it at a
+# throwaway SQLite file/memory database or a scratch MySQL schema.
+
+warnings.filterwarnings('ignore', category=SAWarning)
+
+
+def seed_database(sqla: SQLAlchemyDBService, accounts: int, transactions_per_account: int):
+    sqla.metadata.create_all(sqla.engine)
+    with sqla.engine.begin() as connection:
+        if connection.execute(sqla.conta_table.select().limit(1)).first() is not None:
+            return
+
+        rng = random.Random(42)
+        today = datetime.now().date()
+        people = [{
+            "id_pessoa": person_id,
+            "nome": f"Pessoa {person_id}",
+            "cpf": f"{person_id:011d}",
+            "data_nascimento": today - timedelta(days=365 * 30)
+        } for person_id in range(1, accounts + 1)]
+        connection.execute(insert(sqla.pessoa_table), people)
+
+        connection.execute(insert(sqla.conta_table), [{
+            "id_conta": account_id,
+            "id_pessoa": account_id,
+            "saldo": 10000.0,
+            "limite_saque_diario": 1000.0,
+            "flag_ativo": True,
+            "tipo_conta": 1,
+            "data_criacao": today - timedelta(days=400),
+            "senha": "not a real hash"
+        } for account_id in range(1, accounts + 1)])
+
+        for account_id in range(1, accounts + 1):
+            connection.execute(insert(sqla.transactions_table), [{
+                "id_conta": account_id,
+                "valor": round(rng.uniform(-500.0, 500.0), 2),
+                "data_transacao": today - timedelta(days=rng.randint(0, 90))
+            } for _ in range(transactions_per_account)])
+
+        if sqla.engine.dialect.name == 'sqlite':
+            connection.exec_driver_sql('ANALYZE')
+
+
+def service_calls(sqla: SQLAlchemyDBService, account_id: int) -> dict:
+    return {
+        'get_balance': lambda: sqla.get_balance(account_id),
+        'get_account_version': lambda: sqla.get_account_version(account_id),
+        'check_account_active': lambda: sqla.check_account_active(account_id),
+        'get_account': lambda: sqla.get_account(account_id),
+        'get_extract_from_account': lambda: sqla.get_extract_from_account(account_id),
+        'get_extract_from_account (page)': lambda: sqla.get_extract_from_account(account_id, after_id=10, limit=20),
+        'iter_extract_from_account': lambda: list(sqla.iter_extract_from_account(account_id, after_id=10)),
+        'reached_withdrawal_limit': lambda: sqla.reached_withdrawal_limit(account_id, 10.0),
+        'deposit_into_account': lambda: sqla.deposit_into_account(account_id, 10.0),
+        'withdraw_from_account': lambda: sqla.withdraw_from_account(account_id, 10.0),
+        'change_account_active_status': lambda: sqla.change_account_active_status(account_id, True),
+        'make_transaction': lambda: sqla.make_transaction(account_id, -10.0),
+        'post_operation': lambda: sqla.post_operation(
+            OperationDTO(account_id=account_id, amount=10.0, operation_type=OperationType.Withdrawal)),
+        'execute_withdrawal': lambda: sqla.execute_withdrawal(account_id, 10.0),
+        'apply_operations': lambda: sqla.apply_operations([
+            OperationDTO(account_id=account_id, amount=10.0, operation_type=OperationType.Deposit),
+            OperationDTO(account_id=account_id + 1, amount=10.0, operation_type=OperationType.Withdrawal)]),
+        'update_account_password': lambda: sqla.update_account_password(account_id, 'not a real hash',
+                                                                         expected_hash='not a real hash'),
+        'rebuild_withdrawal_counters': lambda: sqla.rebuild_withdrawal_counters(datetime.now().date()),
+    }
+
+
+def capture_statements(sqla: SQLAlchemyDBService, call) -> list:
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append((statement, parameters))
+
+    event.listen(sqla.engine, 'before_cursor_execute', record)
+    try:
+        call()
+    finally:
+        event.remove(sqla.engine, 'before_cursor_execute', record)
+    return statements
+
+
+def needs_plan(statement: str) -> bool:
+    verb = statement.lstrip().split(None, 1)[0].upper()
+    if verb == 'INSERT':
+        return 'SELECT' in statement.upper()
+    return verb in ('SELECT', 'UPDATE', 'DELETE')
+
+
+def explain(sqla: SQLAlchemyDBService, statement: str, parameters) -> tuple[list[str], bool]:
+    with sqla.engine.connect() as connection:
+        if sqla.engine.dialect.name == 'sqlite':
+            rows = connection.exec_driver_sql(f'EXPLAIN QUERY PLAN {statement}', parameters).fetchall()
+            plan = [row[-1] for row in rows]
+            full_scan = any(detail.startswith('SCAN ') for detail in plan)
+        else:
+            rows = connection.exec_driver_sql(f'EXPLAIN {statement}', parameters).mappings().fetchall()
+            plan = [f"{row['table']}: type={row['type']} key={row['key']}" for row in rows]
+            # 'ALL' is a full table scan and 'index' a full scan of an index
+            full_scan = any(row['type'] in ('ALL', 'index') for row in rows if row['table'] is not None)
+    return plan, full_scan
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description='Fails if any SQLAlchemyDBService query does a full scan.')
+    parser.add_argument('--db-url', default='sqlite://',
+                        help='Database to seed and check (default: in-memory SQLite).')
+    parser.add_argument('--accounts', type=int, default=200)
+    parser.add_argument('--transactions-per-account', type=int, default=50)
+    args = parser.parse_args()
+
+    sqla = SQLAlchemyDBService(args.db_url)
+    seed_database(sqla, args.accounts, args.transactions_per_account)
+
+    failures = 0
+    for method, call in service_calls(sqla, account_id=1).items():
+        for statement, parameters in capture_statements(sqla, call):
+            if not needs_plan(statement):
+                continue
+            plan, full_scan = explain(sqla, statement, parameters)
+            failures += full_scan
+            print(f"[{'FULL SCAN' if full_scan else 'ok'}] {method}: {' '.join(statement.split())}")
+            for detail in plan:
+                print(f'        {detail}')
+
+    if failures:
+        print(f'{failures} statement(s) fell back to a full scan.')
+        return 1
+    print('All statements use an index.')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
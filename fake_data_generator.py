@@ -1,64 +1,194 @@
-from faker import Faker
+import argparse
+import os
 import random
-from src.models.entities import Person, Account, Transaction
+import sys
+import time
+import zlib
+from collections import defaultdict, deque
+from concurrent.futures import Executor, ProcessPoolExecutor
+from datetime import date, timedelta
+from typing import Iterator
+
+import bcrypt
+from faker import Faker
+from sqlalchemy import bindparam, func, insert, select
+
+from src.env_variables import DATABASE_URL
 from src.services.db_service import SQLAlchemyDBService
-from src.config import db_url
 
-fake = Faker("pt_BR")
-sqla = SQLAlchemyDBService(db_url)
+# Generates people, accounts and transactions in a process pool (one Faker per worker) and streams them into the
+# database in large multi-row inserts. Every chunk is generated from its own seed, so a given --seed and
+# --chunk-size always produce the same dataset whatever the number of workers. Ids are assigned explicitly after
+# the current maximum of each table, accounts always point to a loaded person and transactions to a loaded account,
+# and the account balances are the sum of their generated transactions.
+
+_fake = None
+
+
+def _start_worker(locale: str):
+    global _fake
+    _fake = Faker(locale)
+
+
+def _seeded(seed: int, table: str, first_id: int) -> random.Random:
+    chunk_seed = zlib.crc32(f'{seed}:{table}:{first_id}'.encode())
+    _fake.seed_instance(chunk_seed)
+    return random.Random(chunk_seed)
+
+
+def generate_people(seed: int, first_id: int, count: int) -> list:
+    _seeded(seed, 'pessoa', first_id)
+    return [{
+        "id_pessoa": person_id,
+        "nome": _fake.name(),
+        "cpf": _fake.cpf().replace('.', '').replace('-', ''),
+        "data_nascimento": _fake.date_of_birth(minimum_age=18, maximum_age=90)
+    } for person_id in range(first_id, first_id + count)]
+
+
+def generate_accounts(seed: int, first_id: int, count: int, people: range, password_hash: str) -> list:
+    rng = _seeded(seed, 'conta', first_id)
+    return [{
+        "id_conta": account_id,
+        "id_pessoa": rng.choice(people),
+        "senha": password_hash,
+        "saldo": 0.0,
+        "limite_saque_diario": float(rng.choice((500, 1000, 2000, 5000))),
+        "flag_ativo": rng.random() > 0.02,
+        "tipo_conta": rng.choice((1, 2)),
+        "data_criacao": _fake.date_between(start_date='-10y', end_date='-1y')
+    } for account_id in range(first_id, first_id + count)]
+
+
+def generate_transactions(seed: int, first_id: int, count: int, accounts: range, days: int) -> tuple:
+    rng = _seeded(seed, 'transacao', first_id)
+    today = date.today()
+    rows = []
+    balance_changes = defaultdict(float)
+    for transaction_id in range(first_id, first_id + count):
+        account_id = rng.choice(accounts)
+        amount = round(rng.uniform(-500.0, 1000.0), 2)
+        rows.append({
+            "id_transacao": transaction_id,
+            "id_conta": account_id,
+            "valor": amount,
+            "data_transacao": today - timedelta(days=rng.randrange(days))
+        })
+        balance_changes[account_id] += amount
+    return rows, dict(balance_changes)
+
+
+def chunks(first_id: int, total: int, chunk_size: int) -> Iterator[tuple]:
+    for start in range(first_id, first_id + total, chunk_size):
+        yield start, min(chunk_size, first_id + total - start)
+
+
+def generate(pool: Executor, function, arguments: list, window: int) -> Iterator:
+    # Like pool.map, but with at most `window` chunks in flight so generation can't outrun the inserts
+    pending = deque()
+    for chunk_arguments in arguments:
+        pending.append(pool.submit(function, *chunk_arguments))
+        if len(pending) >= window:
+            yield pending.popleft().result()
+    while pending:
+        yield pending.popleft().result()
+
+
+def next_id(sqla: SQLAlchemyDBService, column) -> int:
+    with sqla.engine.connect() as connection:
+        return (connection.execute(select(func.max(column))).scalar() or 0) + 1
+
+
+def load(sqla: SQLAlchemyDBService, table, results) -> int:
+    loaded = 0
+    for rows in results:
+        with sqla.engine.begin() as connection:
+            connection.execute(insert(table), rows)
+        loaded += len(rows)
+    return loaded
+
 
+def report(table: str, rows: int, seconds: float):
+    print(f'{table:<10}{rows:>12} rows {seconds:>9.1f} s {rows / seconds if seconds else 0:>12.0f} rows/s')
 
-def generate_transaction(acc_id: int, transaction_id: int) -> Transaction:
-    transaction = {
-        'id_transacao': transaction_id,
-        'id_conta': acc_id,
-        'valor': random.random() * 10000 - 5000,
-        'data_transacao': fake.date()
-    }
-    return Transaction.from_dict(transaction)
 
+def main() -> int:
+    parser = argparse.ArgumentParser(description='Loads a synthetic dataset for development and load testing.')
+    parser.add_argument('--db-url', default=DATABASE_URL)
+    parser.add_argument('--people', type=int, default=125)
+    parser.add_argument('--accounts', type=int, default=250)
+    parser.add_argument('--transactions', type=int, default=5000)
+    parser.add_argument('--days', type=int, default=365, help='Transactions are spread over the last N days.')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--workers', type=int, default=os.cpu_count())
+    parser.add_argument('--chunk-size', type=int, default=10000, help='Rows generated and inserted at a time.')
+    parser.add_argument('--locale', default='pt_BR')
+    parser.add_argument('--password', default='123456', help='Password set on every generated account.')
+    args = parser.parse_args()
+    if min(args.people, args.accounts) < 1 or args.transactions < 0:
+        parser.error('at least one person and one account are needed')
 
-def generate_conta(id_pessoa: int = -1) -> Account:
-    account = {
-        'id_conta': fake.aba(),
-        'id_pessoa': id_pessoa,
-        'saldo': random.random() * 10000 - 5000,
-        'limite_saque_diario': random.random() * 10000,
-        'flag_ativo': True,
-        'tipo_conta': 1,
-        'data_criacao': fake.date()
-    }
-    return Account.from_dict(account)
+    sqla = SQLAlchemyDBService(args.db_url)
+    sqla.metadata.create_all(sqla.engine)
+    # One hash for every account: hashing each password would take longer than the whole load
+    password_hash = bcrypt.hashpw(args.password.encode(), bcrypt.gensalt()).decode()
 
+    first_person = next_id(sqla, sqla.pessoa_table.c.id_pessoa)
+    people = range(first_person, first_person + args.people)
+    first_account = next_id(sqla, sqla.conta_table.c.id_conta)
+    accounts = range(first_account, first_account + args.accounts)
+    first_transaction = next_id(sqla, sqla.transactions_table.c.id_transacao)
 
-def generate_person(pid: int) -> Person:
-    person = {
-        "id_pessoa": pid,
-        "nome": fake.name(),
-        "cpf": fake.cpf().replace('.', '').replace('-', ''),
-        "data_nascimento": fake.date_of_birth().strftime("%Y-%m-%d")
-    }
-    return Person.from_dict(person)
+    started = time.perf_counter()
+    window = 2 * args.workers
+    with ProcessPoolExecutor(max_workers=args.workers, initializer=_start_worker, initargs=(args.locale,)) as pool:
+        start = time.perf_counter()
+        loaded = load(sqla, sqla.pessoa_table, generate(pool, generate_people, [
+            (args.seed, first_id, count) for first_id, count in chunks(people.start, args.people, args.chunk_size)
+        ], window))
+        report('pessoa', loaded, time.perf_counter() - start)
 
+        start = time.perf_counter()
+        loaded = load(sqla, sqla.conta_table, generate(pool, generate_accounts, [
+            (args.seed, first_id, count, people, password_hash)
+            for first_id, count in chunks(accounts.start, args.accounts, args.chunk_size)
+        ], window))
+        report('conta', loaded, time.perf_counter() - start)
 
-def populate_database_first_time_only():
-    pessoas = [generate_person(i + 1) for i in range(125)]
-    contas = [generate_conta() for _ in range(250)]
-    transacoes = [generate_transaction(acc_id=-1, transaction_id=i) for i in range(5000)]
+        start = time.perf_counter()
+        balances = defaultdict(float)
 
-    for pessoa in pessoas:
-        sqla.create_new_person(pessoa)
+        def transaction_rows():
+            for rows, balance_changes in generate(pool, generate_transactions, [
+                (args.seed, first_id, count, accounts, args.days)
+                for first_id, count in chunks(first_transaction, args.transactions, args.chunk_size)
+            ], window):
+                for account_id, change in balance_changes.items():
+                    balances[account_id] += change
+                yield rows
 
-    for conta in contas:
-        conta.id_pessoa = random.choice(pessoas).id_pessoa
-        sqla.create_new_account(conta)
+        loaded = load(sqla, sqla.transactions_table, transaction_rows())
+        report('transacao', loaded, time.perf_counter() - start)
 
-    for transacao in transacoes:
-        transacao.id_conta = random.choice(contas).id_conta
-        sqla.make_transaction(transacao.id_conta, transacao.valor)
+    start = time.perf_counter()
+    balance_rows = [{'account_id': account_id, 'balance': round(balance, 2)}
+                    for account_id, balance in balances.items()]
+    for offset in range(0, len(balance_rows), args.chunk_size):
+        with sqla.engine.begin() as connection:
+            connection.execute(
+                sqla.conta_table.update()
+                .where(sqla.conta_table.c.id_conta == bindparam('account_id'))
+                .values(saldo=bindparam('balance')),
+                balance_rows[offset:offset + args.chunk_size]
+            )
+    counters = sqla.rebuild_withdrawal_counters(date.today())
+    report('saldo', len(balance_rows), time.perf_counter() - start)
+    print(f'{counters} withdrawal counters rebuilt for today')
 
-    print("Done")
+    total_rows = args.people + args.accounts + args.transactions
+    report('total', total_rows, time.perf_counter() - started)
+    return 0
 
 
 if __name__ == '__main__':
-    populate_database_first_time_only()
+    sys.exit(main())
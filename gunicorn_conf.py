@@ -0,0 +1,45 @@
+import multiprocessing
+
+from src.env_variables import DB_BACKEND, GUNICORN_BIND, GUNICORN_WORKERS, GUNICORN_THREADS, GUNICORN_TIMEOUT, \
+    GUNICORN_GRACEFUL_TIMEOUT, GUNICORN_KEEPALIVE, GUNICORN_MAX_REQUESTS, GUNICORN_MAX_REQUESTS_JITTER
+
+# Gunicorn settings for production: `gunicorn --config gunicorn_conf.py src.app:app`
+# Every value can be overridden through the GUNICORN_* environment variables in src/env_variables.py.
+
+cpu_count = multiprocessing.cpu_count()
+
+bind = GUNICORN_BIND
+workers = GUNICORN_WORKERS or cpu_count * 2 + 1
+if DB_BACKEND == 'memory':
+    # every worker would serve (and change) its own copy of the data
+    workers = 1
+# Requests mostly wait on MySQL; login is CPU bound, but bcrypt runs in each worker's PasswordHasher pool
+# (PASSWORD_HASH_WORKERS processes, started after the fork). Plain sync workers are enough when
+# there are cores to spare; on small hosts a few threads per worker keep the DB waits overlapped
+# without multiplying the memory footprint.
+threads = GUNICORN_THREADS or (4 if cpu_count <= 2 else 1)
+worker_class = 'gthread' if threads > 1 else 'sync'
+
+timeout = GUNICORN_TIMEOUT
+graceful_timeout = GUNICORN_GRACEFUL_TIMEOUT
+keepalive = GUNICORN_KEEPALIVE
+
+# Recycle workers periodically to contain slow leaks; the jitter keeps them from restarting together.
+max_requests = GUNICORN_MAX_REQUESTS
+max_requests_jitter = GUNICORN_MAX_REQUESTS_JITTER
+
+# Import the app once in the master so workers fork with it already loaded.
+preload_app = True
+# Heartbeat files on tmpfs: a disk-backed /tmp can stall workers inside containers.
+worker_tmp_dir = '/dev/shm'
+
+accesslog = '-'
+errorlog = '-'
+
+
+def post_fork(server, worker):
+    # Connections opened by the master while preloading (e.g. create_all) must not be shared with the
+    # forked workers: drop them from the worker's pool without closing the master's sockets.
+    from src.config import db_engine
+    if db_engine is not None:
+        db_engine.dispose(close=False)
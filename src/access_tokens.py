@@ -0,0 +1,68 @@
+import re
+from typing import Optional
+
+import jwt
+
+from src.account_responses import Reply
+
+# How access tokens are made and checked, for both apps: src/config.py hands jwt_config() to Flask-JWT-Extended,
+# which issues the tokens at login and checks them in @jwt_required(), and src/asgi_app.py checks them with
+# access_token_error(), which runs the same decode with the same settings without Flask.
+
+JWT_ALGORITHM = 'HS256'
+JWT_IDENTITY_CLAIM = 'sub'
+JWT_DECODE_LEEWAY = 0
+JWT_HEADER_NAME = 'Authorization'
+JWT_HEADER_TYPE = 'Bearer'
+JWT_ERROR_MESSAGE_KEY = 'msg'
+
+
+def jwt_config(secret_key: str) -> dict:
+    return {
+        'JWT_SECRET_KEY': secret_key,
+        'JWT_ALGORITHM': JWT_ALGORITHM,
+        'JWT_DECODE_ALGORITHMS': [JWT_ALGORITHM],
+        'JWT_IDENTITY_CLAIM': JWT_IDENTITY_CLAIM,
+        'JWT_DECODE_LEEWAY': JWT_DECODE_LEEWAY,
+        'JWT_TOKEN_LOCATION': ['headers'],
+        'JWT_HEADER_NAME': JWT_HEADER_NAME,
+        'JWT_HEADER_TYPE': JWT_HEADER_TYPE,
+        'JWT_ERROR_MESSAGE_KEY': JWT_ERROR_MESSAGE_KEY,
+    }
+
+
+def decode_access_token(token: str, secret_key: str) -> dict:
+    # What Flask-JWT-Extended's decode checks: signature, exp, nbf and iat, then the identity claim and token type.
+    # Raises jwt.InvalidTokenError, whose message is the one @jwt_required() answers with.
+    claims = jwt.decode(token, secret_key, algorithms=[JWT_ALGORITHM], leeway=JWT_DECODE_LEEWAY,
+                        options={'verify_aud': False})
+    if JWT_IDENTITY_CLAIM not in claims:
+        raise jwt.InvalidTokenError(f'Missing claim: {JWT_IDENTITY_CLAIM}')
+    if claims.setdefault('type', 'access') == 'refresh':
+        raise jwt.InvalidTokenError('Only non-refresh tokens are allowed')
+    return claims
+
+
+def _error(message: str, status: int) -> Reply:
+    return {JWT_ERROR_MESSAGE_KEY: message}, status
+
+
+def access_token_error(authorization: Optional[str], secret_key: str) -> Optional[Reply]:
+    # The answer @jwt_required() gives for this Authorization header, or None when it lets the request through
+    header = (authorization or '').strip().strip(',')
+    if not header:
+        return _error(f'Missing {JWT_HEADER_NAME} Header', 401)
+    expected = f"Expected '{JWT_HEADER_NAME}: {JWT_HEADER_TYPE} <JWT>'"
+    values = [value for value in re.split(r',\s*', header) if value.split()[:1] == [JWT_HEADER_TYPE]]
+    if len(values) != 1:
+        return _error(f"Missing '{JWT_HEADER_TYPE}' type in '{JWT_HEADER_NAME}' header. {expected}", 401)
+    parts = values[0].split()
+    if len(parts) != 2:
+        return _error(f'Bad {JWT_HEADER_NAME} header. {expected}', 422)
+    try:
+        decode_access_token(parts[1], secret_key)
+    except jwt.ExpiredSignatureError:
+        return _error('Token has expired', 401)
+    except jwt.InvalidTokenError as error:
+        return _error(str(error), 422)
+    return None
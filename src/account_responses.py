@@ -0,0 +1,94 @@
+import hashlib
+from datetime import date
+from typing import List, Mapping, Optional, Tuple
+
+from werkzeug.http import quote_etag
+
+from src.models.entities import Transaction
+
+# Validation and JSON bodies of the balance and statement routes, shared by the Flask app (src/app.py) and the ASGI
+# one (src/asgi_app.py) so both answer the same request with the same body, status and ETag. Every reply is a
+# (body, status code) pair for the caller to encode.
+
+Reply = Tuple[dict, int]
+
+STATEMENT_VARY_ON = ('after_id', 'limit', 'stream')
+
+
+def int_arg(args: Mapping[str, str], name: str) -> Optional[int]:
+    # What request.args.get(name, type=int) returns in Flask: None when missing or not an integer
+    try:
+        return int(args[name])
+    except (KeyError, ValueError):
+        return None
+
+
+def account_status_error(account_id: int, account_active: Optional[bool]) -> Optional[Reply]:
+    if account_active is None:
+        return {
+            'status': 'error',
+            'message': f'Currently, there is no account with ID: {account_id}.'
+        }, 400
+    if not account_active:
+        return {
+            'status': 'error',
+            'message': f'Account {account_id} is currently blocked and you cannot make any operations with it.'
+        }, 400
+    return None
+
+
+def account_etag(endpoint: str, account_id: int, version: Tuple, args: Mapping[str, str], vary_on: Tuple[str, ...],
+                 daily: bool) -> str:
+    parts = [endpoint, account_id, *version, *(args.get(name) for name in vary_on)]
+    if daily:
+        parts.append(date.today().isoformat())
+    return hashlib.blake2b(repr(parts).encode(), digest_size=12).hexdigest()
+
+
+def etag_headers(etag: str) -> dict:
+    # weak, since the same representation may be sent gzip-compressed or not
+    return {'ETag': quote_etag(etag, weak=True), 'Cache-Control': 'private, no-cache'}
+
+
+def missing_account_id() -> Reply:
+    return {
+        'status': 'error',
+        'message': 'No account_id provided.'
+    }, 400
+
+
+def balance_reply(account_id: int, balance: Optional[float]) -> Reply:
+    if balance is None:
+        return {
+            'status': 'error',
+            'message': f'No account found with id {account_id}.'
+        }, 404
+    return {
+        'status': 'success',
+        'message': f"Balance of account {account_id} was retrieved successfully",
+        'balance': balance
+    }, 200
+
+
+def statement_limit_error(limit: Optional[int], max_page_size: int) -> Optional[Reply]:
+    if limit is not None and not 0 < limit <= max_page_size:
+        return {
+            'status': 'error',
+            'message': f'The limit must be between 1 and {max_page_size}.'
+        }, 400
+    return None
+
+
+def statement_message(account_id: int) -> str:
+    return f"The bank statement was successfully extracted for account {account_id}"
+
+
+def statement_reply(account_id: int, statement: List[Transaction], limit: Optional[int]) -> Reply:
+    body = {
+        "status": "success",
+        "message": statement_message(account_id),
+        "bank_statement": statement
+    }
+    if limit is not None:
+        body['next_after_id'] = statement[-1].id_transacao if len(statement) == limit else None
+    return body, 200
@@ -1,31 +1,103 @@
-from flask import request, jsonify
+from typing import Iterator
+
+from flask import request, jsonify, json, Response, stream_with_context
 from flask_jwt_extended import create_access_token, jwt_required
 
-from src.config import app, bcrypt, db_interface
-from src.models.entities import Account, OperationDTO, AccountStatusDTO
-from src.app_middleware import check_if_account_is_active
-from src.exceptions import DatabaseWritingException
+from src import commands  # noqa: F401 - registers the flask CLI commands
+from src.account_responses import STATEMENT_VARY_ON, missing_account_id, balance_reply, statement_limit_error, \
+    statement_message, statement_reply
+from src.config import app, password_hasher, db_interface, account_status_cache, metrics, slow_query_log, \
+    trace_exporter
+from src.env_variables import STATEMENT_MAX_PAGE_SIZE, ADMIN_ACCOUNT_IDS, BATCH_MAX_OPERATIONS
+from src.observability.metrics import PROMETHEUS_CONTENT_TYPE
+from src.observability.tracing import InMemoryExporter
+from src.models.entities import Account, OperationDTO, AccountStatusDTO, OperationStatus, OperationResult, Transaction
+from src.app_middleware import check_if_account_is_active, admin_required, conditional_on_account_version
+from src.exceptions import DatabaseWritingException, InvalidOperationException, HasherBusyException
 
 from src.sqlalchemy_models import Conta, Transacao, Pessoa
 
 
+@app.route('/metrics', methods=['GET'])
+def prometheus_metrics():
+    return Response(metrics.render(), content_type=PROMETHEUS_CONTENT_TYPE)
+
+
+@app.route('/admin/slow-queries', methods=['GET'])
+@jwt_required()
+@admin_required(ADMIN_ACCOUNT_IDS)
+def admin_slow_queries():
+    return jsonify({
+        'status': 'success',
+        'threshold_ms': slow_query_log.threshold * 1000,
+        'slow_queries': slow_query_log.entries()
+    })
+
+
+@app.route('/admin/traces', methods=['GET'])
+@jwt_required()
+@admin_required(ADMIN_ACCOUNT_IDS)
+def admin_traces():
+    if not isinstance(trace_exporter, InMemoryExporter):
+        return jsonify({
+            'status': 'error',
+            'message': 'Traces are only kept in memory when TRACING_EXPORTER=memory.'
+        }), 404
+    return jsonify({
+        'status': 'success',
+        'traces': trace_exporter.traces()
+    })
+
+
+# What OperationDTO.from_dict raises for a malformed operation: the single routes answer 400, a batch marks it Invalid
+INVALID_OPERATION_ERRORS = (InvalidOperationException, AttributeError, TypeError, ValueError)
+
+
+def _invalid_operation():
+    return jsonify({
+        'status': 'error',
+        'message': 'Please send an account_id and an amount greater than 0.'
+    }), 400
+
+
+def _hasher_busy():
+    response = jsonify({
+        'status': 'error',
+        'message': 'Too many login requests at the moment! Please try again in a few seconds.'
+    })
+    response.status_code = 503
+    response.headers['Retry-After'] = '1'
+    return response
+
+
 @app.route('/account/login', methods=['POST'])
 def create_token():
     login_data = request.get_json()
     account_id, password = login_data['account_id'], login_data['password']
     try:
         account, account_password = db_interface.get_account(account_id)
-        if not bcrypt.check_password_hash(account_password, password) or account is None:
+        if account is None or not password_hasher.check(account_password, password):
             return jsonify({
                 'status': 'error',
                 'message': 'Invalid account ID and/or password! Please try again.'
             }), 400
+    except (HasherBusyException, TimeoutError):
+        return _hasher_busy()
     except Exception:
         return jsonify({
             'status': 'error',
             'message': 'Something went wrong while retrieving account! Please try again later.'
         }), 500
 
+    # Hashes made with another BCRYPT_LOG_ROUNDS are upgraded while the plain password is at hand. This is best
+    # effort: the login succeeds anyway and the next one tries again.
+    if password_hasher.needs_rehash(account_password):
+        try:
+            db_interface.update_account_password(account.id_conta, password_hasher.hash(password),
+                                                 expected_hash=account_password)
+        except Exception:
+            pass
+
     access_token = create_access_token(identity=account.id_conta, additional_claims={
         'person_id': account.id_pessoa,
         'account_type': account.tipo_conta.name,
@@ -39,8 +111,10 @@ def acc_creation():
     data = request.get_json()
     try:
         new_account = Account.from_dict(data)
-        password = bcrypt.generate_password_hash(str(data['password'])).decode('utf-8')
+        password = password_hasher.hash(str(data['password']))
         db_interface.create_new_account(new_account, password)
+    except (HasherBusyException, TimeoutError):
+        return _hasher_busy()
     except DatabaseWritingException:
         return jsonify({
             'status': 'error',
@@ -55,14 +129,18 @@ def acc_creation():
 
 @app.route('/account/deposit', methods=["POST"])
 @jwt_required()
-@check_if_account_is_active(db_interface=db_interface)
+@check_if_account_is_active(db_interface=db_interface, cache=account_status_cache)
 def acc_deposit():
     data = request.get_json()
     data['operation_type'] = 'Deposit'
-    deposit_data = OperationDTO.from_dict(data)
     try:
-        db_interface.deposit_into_account(deposit_data.account_id, deposit_data.amount)
-        db_interface.make_transaction(deposit_data.account_id, float(deposit_data.amount))
+        deposit_data = OperationDTO.from_dict(data)
+    except INVALID_OPERATION_ERRORS:
+        return _invalid_operation()
+    try:
+        transaction, _ = db_interface.post_operation(deposit_data)
+        if transaction is None:
+            raise DatabaseWritingException(f'Account {deposit_data.account_id} not found.')
     except Exception:
         return jsonify({
             'status': 'error',
@@ -78,22 +156,16 @@ def acc_deposit():
 
 @app.route('/account/withdraw', methods=["POST"])
 @jwt_required()
-@check_if_account_is_active(db_interface=db_interface)
 def acc_withdraw():
     data = request.get_json()
     data['operation_type'] = 'Withdrawal'
 
-    withdrawal_data = OperationDTO.from_dict(data)
     try:
-        if db_interface.reached_withdrawal_limit(withdrawal_data.account_id, withdrawal_data.amount):
-            return jsonify({
-                'status': 'error',
-                'message': "You are trying to withdraw an amount the surpasses your "
-                           f"daily limit for the account {withdrawal_data.account_id}."
-            }), 423
-
-        db_interface.withdraw_from_account(withdrawal_data.account_id, withdrawal_data.amount)
-        db_interface.make_transaction(withdrawal_data.account_id, -float(withdrawal_data.amount))
+        withdrawal_data = OperationDTO.from_dict(data)
+    except INVALID_OPERATION_ERRORS:
+        return _invalid_operation()
+    try:
+        result = db_interface.execute_withdrawal(withdrawal_data.account_id, withdrawal_data.amount)
     except Exception:
         return jsonify({
             'status': 'error',
@@ -101,6 +173,24 @@ def acc_withdraw():
                        f'from account {withdrawal_data.account_id}.'
         }), 400
 
+    if result.status == OperationStatus.NotFound:
+        return jsonify({
+            'status': 'error',
+            'message': f'Currently, there is no account with ID: {withdrawal_data.account_id}.'
+        }), 400
+    if result.status == OperationStatus.Blocked:
+        return jsonify({
+            'status': 'error',
+            'message': f'Account {withdrawal_data.account_id} is currently blocked and you cannot make any '
+                       'operations with it.'
+        }), 400
+    if result.status == OperationStatus.LimitReached:
+        return jsonify({
+            'status': 'error',
+            'message': "You are trying to withdraw an amount the surpasses your "
+                       f"daily limit for the account {withdrawal_data.account_id}."
+        }), 423
+
     return jsonify({
         'status': 'success',
         'message': f'Amount of {withdrawal_data.amount} was successfully withdrawn from '
@@ -108,6 +198,43 @@ def acc_withdraw():
     })
 
 
+@app.route('/account/batch', methods=["POST"])
+@jwt_required()
+def acc_batch():
+    operations = (request.get_json(silent=True) or {}).get('operations')
+    if not isinstance(operations, list) or not 0 < len(operations) <= BATCH_MAX_OPERATIONS:
+        return jsonify({
+            'status': 'error',
+            'message': f'Please send between 1 and {BATCH_MAX_OPERATIONS} operations.'
+        }), 400
+
+    results = [None] * len(operations)
+    valid_operations, valid_indexes = [], []
+    for index, operation in enumerate(operations):
+        try:
+            valid_operations.append(OperationDTO.from_dict(operation))
+            valid_indexes.append(index)
+        except INVALID_OPERATION_ERRORS:
+            results[index] = OperationResult(status=OperationStatus.Invalid)
+
+    try:
+        applied = db_interface.apply_operations(valid_operations) if valid_operations else []
+    except Exception:
+        return jsonify({
+            'status': 'error',
+            'message': 'Could not apply the operations, none of them was applied.'
+        }), 400
+    for index, result in zip(valid_indexes, applied):
+        results[index] = result
+
+    return jsonify({
+        'status': 'success',
+        'message': f'{sum(result.status == OperationStatus.Ok for result in results)} of {len(results)} '
+                   'operations were applied.',
+        'results': [result.to_dict() for result in results]
+    })
+
+
 @app.route('/account/block', methods=["PATCH"])
 @jwt_required()
 def acc_block():
@@ -128,44 +255,54 @@ def acc_block():
 
 @app.route('/account/balance', methods=["GET"])
 @jwt_required()
-@check_if_account_is_active(db_interface=db_interface)
+@check_if_account_is_active(db_interface=db_interface, cache=account_status_cache)
+@conditional_on_account_version(db_interface=db_interface)
 def acc_balance():
     account_id = request.args.get('account_id', default=None, type=int)
     if account_id is None:
-        return jsonify({
-            'status': 'error',
-            'message': 'No account_id provided.'
-        }), 400
+        body, status = missing_account_id()
+        return jsonify(body), status
 
-    balance = db_interface.get_balance(account_id)
-    if balance is None:
-        return jsonify({
-            'status': 'error',
-            'message': f'No account found with id {account_id}.'
-        }), 404
-
-    return jsonify({
-        'status': 'success',
-        'message': f"Balance of account {account_id} was retrieved successfully",
-        'balance': balance
-    }), 200
+    body, status = balance_reply(account_id, db_interface.get_balance(account_id))
+    return jsonify(body), status
 
 
 @app.route('/account/statement', methods=["GET"])
 @jwt_required()
-@check_if_account_is_active(db_interface=db_interface)
+@check_if_account_is_active(db_interface=db_interface, cache=account_status_cache)
+@conditional_on_account_version(db_interface=db_interface, vary_on=STATEMENT_VARY_ON, daily=True)
 def acc_statement():
     account_id = request.args.get('account_id', default=None, type=int)
     if account_id is None:
-        return jsonify({
-            'status': 'error',
-            'message': 'No account_id provided.'
-        }), 400
+        body, status = missing_account_id()
+        return jsonify(body), status
 
-    statement = [transaction.to_dict() for transaction in db_interface.get_extract_from_account(account_id)]
+    after_id = request.args.get('after_id', default=None, type=int)
+    limit = request.args.get('limit', default=None, type=int)
+    error = statement_limit_error(limit, STATEMENT_MAX_PAGE_SIZE)
+    if error is not None:
+        body, status = error
+        return jsonify(body), status
 
-    return jsonify({
-        "status": "success",
-        "message": f"The bank statement was successfully extracted for account {account_id}",
-        "bank_statement": statement
-    })
+    if request.args.get('stream', default=False, type=lambda value: value.lower() in ('1', 'true')):
+        transactions = db_interface.iter_extract_from_account(account_id, after_id=after_id)
+        return Response(stream_with_context(_stream_statement(statement_message(account_id), transactions)),
+                        mimetype='application/json')
+
+    statement = db_interface.get_extract_from_account(account_id, after_id=after_id, limit=limit)
+    body, status = statement_reply(account_id, statement, limit)
+    return jsonify(body), status
+
+
+def _stream_statement(message: str, transactions: Iterator[Transaction], chunk_size: int = 500):
+    yield f'{{"status": "success", "message": {json.dumps(message)}, "bank_statement": ['
+    chunk = []
+    separator = ''
+    for transaction in transactions:
+        chunk.append(json.dumps(transaction))
+        if len(chunk) == chunk_size:
+            yield separator + ', '.join(chunk)
+            chunk, separator = [], ', '
+    if chunk:
+        yield separator + ', '.join(chunk)
+    yield ']}'
@@ -1,29 +1,126 @@
+import gzip
 from functools import wraps
 
-from flask import request, jsonify
+from typing import Collection, Optional, Tuple
+
+from flask import Flask, Response, request, jsonify, make_response
+from flask_jwt_extended import get_jwt_identity
+from src.account_responses import account_status_error, account_etag, etag_headers
+from src.observability.tracing import trace_span
+from src.services.ports.cache_interface import AccountStatusCache
 from src.services.ports.db_interface import DBInterface
 
 
-def check_if_account_is_active(db_interface: DBInterface):
+def _request_account_id() -> Optional[int]:
+    if request.method == "GET":
+        return request.args.get('account_id', default=None, type=int)
+    return int(request.get_json().get('account_id'))
+
+
+def _tag_response(response: Response, etag: str) -> Response:
+    response.headers.update(etag_headers(etag))
+    return response
+
+
+def check_if_account_is_active(db_interface: DBInterface, cache: Optional[AccountStatusCache] = None):
     def actual_decorator(f):
         @wraps(f)
         def decorated_function(*args, **kwargs):
-            if request.method == "GET":
-                account_id = request.args.get('account_id', default=None, type=int)
-            else:
-                account_id = int(request.get_json().get('account_id'))
-            account_active = db_interface.check_account_active(account_id)
-            if account_active is None:
-                return jsonify({
-                    'status': 'error',
-                    'message': f'Currently, there is no account with ID: {account_id}.'
-                }), 400
-            if not account_active:
-                return jsonify({
-                    'status': 'error',
-                    'message': f'Account {account_id} is currently blocked and you cannot make any operations with it.'
-                }), 400
+            account_id = _request_account_id()
+            with trace_span('check_if_account_is_active', account_id=account_id) as span:
+                account_active = cache.get(account_id) if cache is not None else None
+                if span is not None:
+                    span.attributes['cache_hit'] = account_active is not None
+                if account_active is None:
+                    account_active = db_interface.check_account_active(account_id)
+                    if cache is not None and account_active is not None:
+                        cache.set(account_id, account_active)
+            error = account_status_error(account_id, account_active)
+            if error is not None:
+                body, status = error
+                return jsonify(body), status
             result = f(*args, **kwargs)
             return result
         return decorated_function
     return actual_decorator
+
+
+def conditional_on_account_version(db_interface: DBInterface, vary_on: Tuple[str, ...] = (), daily: bool = False):
+    # The ETag is derived from the account version and the request arguments listed in vary_on (plus the
+    # current day for views with a date window), so a matching If-None-Match is answered with a 304
+    # before the view runs any of its queries
+    def actual_decorator(f):
+        @wraps(f)
+        def decorated_function(*args, **kwargs):
+            account_id = request.args.get('account_id', default=None, type=int)
+            version = db_interface.get_account_version(account_id) if account_id is not None else None
+            if version is None:
+                return f(*args, **kwargs)
+
+            etag = account_etag(request.endpoint, account_id, version, request.args, vary_on, daily)
+            if request.if_none_match.contains_weak(etag):
+                return _tag_response(Response(status=304), etag)
+            response = make_response(f(*args, **kwargs))
+            if response.status_code != 200:
+                return response
+            return _tag_response(response, etag)
+        return decorated_function
+    return actual_decorator
+
+
+def admin_required(admin_account_ids: Collection[int]):
+    # Must be stacked under @jwt_required(), which resolves the identity being checked here
+    def actual_decorator(f):
+        @wraps(f)
+        def decorated_function(*args, **kwargs):
+            if get_jwt_identity() not in admin_account_ids:
+                return jsonify({
+                    'status': 'error',
+                    'message': 'This operation is restricted to administrators.'
+                }), 403
+            return f(*args, **kwargs)
+        return decorated_function
+    return actual_decorator
+
+
+def bind_unit_of_work(app: Flask, db_service):
+    # Every DBInterface call made while handling a request shares one session, committed once before
+    # the response is sent. Error responses roll the whole request back.
+    @app.before_request
+    def begin_unit_of_work():
+        db_service.begin_unit_of_work()
+
+    @app.after_request
+    def end_unit_of_work(response: Response):
+        if response.status_code >= 400:
+            db_service.end_unit_of_work(commit=False)
+            return response
+        try:
+            db_service.end_unit_of_work(commit=True)
+        except Exception:
+            response = jsonify({
+                'status': 'error',
+                'message': 'Something went wrong while saving your request! Please try again later.'
+            })
+            response.status_code = 500
+        return response
+
+    @app.teardown_request
+    def discard_unit_of_work(exception=None):
+        db_service.end_unit_of_work(commit=False)
+
+
+def bind_response_compression(app: Flask, min_size: int, level: int = 6):
+    @app.after_request
+    def compress_response(response: Response):
+        # Streamed bodies are left alone: compressing them would mean buffering the whole body
+        if (response.status_code != 200 or response.is_streamed or response.direct_passthrough
+                or 'Content-Encoding' in response.headers or not response.is_json):
+            return response
+        response.vary.add('Accept-Encoding')
+        body = response.get_data()
+        if len(body) < min_size or 'gzip' not in request.accept_encodings:
+            return response
+        response.set_data(gzip.compress(body, compresslevel=level))
+        response.headers['Content-Encoding'] = 'gzip'
+        return response
@@ -0,0 +1,146 @@
+from contextlib import asynccontextmanager
+from typing import Optional
+
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+from starlette.applications import Starlette
+from starlette.middleware import Middleware
+from starlette.middleware.gzip import GZipMiddleware
+from starlette.requests import Request
+from starlette.responses import Response
+from starlette.routing import Route
+from werkzeug.http import parse_etags
+
+from src.access_tokens import JWT_HEADER_NAME, access_token_error
+from src.account_responses import Reply, STATEMENT_VARY_ON, int_arg, account_status_error, account_etag, \
+    etag_headers, missing_account_id, balance_reply, statement_limit_error, statement_reply
+from src.env_variables import DATABASE_URL, ASYNC_DATABASE_URL, JWT_SECRET_KEY, STATEMENT_MAX_PAGE_SIZE, \
+    DB_POOL_SIZE, DB_MAX_OVERFLOW, DB_POOL_TIMEOUT, DB_POOL_RECYCLE, DB_POOL_PRE_PING, GZIP_MIN_SIZE, GZIP_LEVEL, \
+    SQLITE_BUSY_TIMEOUT_MS, SQLITE_MMAP_SIZE, SQLITE_SYNCHRONOUS
+from src.json_provider import dumps_response_body
+from src.services.async_db_service import AsyncSQLAlchemyDBService, to_async_url
+from src.services.sqlite_profile import is_sqlite, install_sqlite_profile, sqlite_engine_options
+
+# The balance and statement reads of src/app.py on one event loop, for an ASGI server:
+#   uvicorn src.asgi_app:app --host 0.0.0.0 --port 8000
+# Every request shares the pooled AsyncEngine created at startup. Writes stay on the Flask app, which is the one
+# keeping the account caches in sync, so this app answers with what is committed in the database (no status cache).
+# The answers, ETags included, are the ones the Flask app gives for the same request.
+
+
+def _json(reply: Reply, headers: Optional[dict] = None) -> Response:
+    body, status = reply
+    return Response(dumps_response_body(body), status_code=status, headers=headers, media_type='application/json')
+
+
+def _query_args(request: Request) -> dict:
+    # The first value of each argument, as request.args.get returns it in Flask
+    args = {}
+    for name, value in request.query_params.multi_items():
+        args.setdefault(name, value)
+    return args
+
+
+async def _account_view(request: Request, endpoint: str, vary_on=(), daily: bool = False):
+    # What @jwt_required(), @check_if_account_is_active and @conditional_on_account_version do before the view.
+    # Returns the early response, or the account id and the ETag to send with the view's answer.
+    error = access_token_error(request.headers.get(JWT_HEADER_NAME), request.app.state.jwt_secret_key)
+    if error is not None:
+        return _json(error), None, None
+    db_interface = request.app.state.db_interface
+    args = _query_args(request)
+    account_id = int_arg(args, 'account_id')
+    status_error = account_status_error(account_id, await db_interface.check_account_active(account_id))
+    if status_error is not None:
+        return _json(status_error), None, None
+
+    version = await db_interface.get_account_version(account_id) if account_id is not None else None
+    if version is None:
+        return None, account_id, None
+    etag = account_etag(endpoint, account_id, version, args, vary_on, daily)
+    if parse_etags(request.headers.get('If-None-Match')).contains_weak(etag):
+        return Response(status_code=304, headers=etag_headers(etag)), None, None
+    return None, account_id, etag
+
+
+def _tagged(reply: Reply, etag: Optional[str]) -> Response:
+    _, status = reply
+    return _json(reply, etag_headers(etag) if etag is not None and status == 200 else None)
+
+
+async def acc_balance(request: Request) -> Response:
+    early, account_id, etag = await _account_view(request, 'acc_balance')
+    if early is not None:
+        return early
+    if account_id is None:
+        return _json(missing_account_id())
+    return _tagged(balance_reply(account_id, await request.app.state.db_interface.get_balance(account_id)), etag)
+
+
+async def acc_statement(request: Request) -> Response:
+    # ?stream= is not supported here: the statement is always sent whole, but stream still varies the ETag so
+    # that it matches the Flask app's
+    early, account_id, etag = await _account_view(request, 'acc_statement', vary_on=STATEMENT_VARY_ON, daily=True)
+    if early is not None:
+        return early
+    if account_id is None:
+        return _json(missing_account_id())
+
+    args = _query_args(request)
+    after_id, limit = int_arg(args, 'after_id'), int_arg(args, 'limit')
+    error = statement_limit_error(limit, request.app.state.statement_max_page_size)
+    if error is not None:
+        return _json(error)
+
+    statement = await request.app.state.db_interface.get_extract_from_account(account_id, after_id=after_id,
+                                                                              limit=limit)
+    return _tagged(statement_reply(account_id, statement, limit), etag)
+
+
+def create_asgi_app(db_url: str, engine_options: dict, jwt_secret_key: str, statement_max_page_size: int,
+                    gzip_min_size: int = 500, gzip_level: int = 6, sqlite_profile: Optional[dict] = None) -> Starlette:
+    @asynccontextmanager
+    async def lifespan(app: Starlette):
+        # Created on the server's event loop, which every connection of the pool is then bound to
+        engine = create_async_engine(db_url, **engine_options)
+        if sqlite_profile is not None:
+            install_sqlite_profile(engine.sync_engine, **sqlite_profile)
+        app.state.db_interface = AsyncSQLAlchemyDBService(engine)
+        try:
+            yield
+        finally:
+            await engine.dispose()
+
+    app = Starlette(
+        routes=[
+            Route('/account/balance', acc_balance, methods=['GET']),
+            Route('/account/statement', acc_statement, methods=['GET']),
+        ],
+        middleware=[Middleware(GZipMiddleware, minimum_size=gzip_min_size, compresslevel=gzip_level)],
+        lifespan=lifespan,
+    )
+    app.state.jwt_secret_key = jwt_secret_key
+    app.state.statement_max_page_size = statement_max_page_size
+    return app
+
+
+def _engine_options(db_url: str) -> dict:
+    # aiosqlite defaults to a NullPool for database files: the pool class is set explicitly
+    options = dict(
+        poolclass=AsyncAdaptedQueuePool,
+        pool_size=DB_POOL_SIZE,
+        max_overflow=DB_MAX_OVERFLOW,
+        pool_timeout=DB_POOL_TIMEOUT,
+        pool_recycle=DB_POOL_RECYCLE,
+        pool_pre_ping=DB_POOL_PRE_PING,
+    )
+    return sqlite_engine_options(db_url, options) if is_sqlite(db_url) else options
+
+
+_db_url = ASYNC_DATABASE_URL or to_async_url(DATABASE_URL)
+app = create_asgi_app(
+    _db_url, _engine_options(_db_url), JWT_SECRET_KEY, STATEMENT_MAX_PAGE_SIZE, GZIP_MIN_SIZE, GZIP_LEVEL,
+    # reads only: DEFERRED transactions leave the write lock to the Flask app
+    sqlite_profile=dict(busy_timeout_ms=SQLITE_BUSY_TIMEOUT_MS, mmap_size=SQLITE_MMAP_SIZE,
+                        synchronous=SQLITE_SYNCHRONOUS, begin='DEFERRED') if is_sqlite(_db_url) else None,
+)
@@ -0,0 +1,14 @@
+from datetime import datetime
+
+import click
+
+from src.config import app, db_interface
+
+
+@app.cli.command('rebuild-withdrawal-counters')
+@click.option('--date', 'day', type=click.DateTime(formats=['%Y-%m-%d']), default=None,
+              help='Day to recompute the counters for (YYYY-MM-DD). Defaults to today.')
+def rebuild_withdrawal_counters(day):
+    target_day = day.date() if day else datetime.now().date()
+    rebuilt = db_interface.rebuild_withdrawal_counters(target_day)
+    click.echo(f'Rebuilt {rebuilt} withdrawal counters for {target_day:%Y-%m-%d}.')
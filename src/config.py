@@ -3,20 +3,110 @@ from flask_migrate import Migrate
 from flask_sqlalchemy import SQLAlchemy
 
 from flask_jwt_extended import JWTManager
-from flask_bcrypt import Bcrypt
-from src.env_variables import DB_NAME, DB_HOST, DB_PORT, DB_USER, DB_PASSWORD, JWT_SECRET_KEY
+from src.env_variables import DB_BACKEND, MEMORY_SNAPSHOT, DATABASE_URL, JWT_SECRET_KEY, ACCOUNT_STATUS_CACHE_SIZE, \
+    ACCOUNT_STATUS_CACHE_TTL, DB_REQUEST_UNIT_OF_WORK, DB_POOL_SIZE, DB_MAX_OVERFLOW, DB_POOL_TIMEOUT, \
+    DB_POOL_RECYCLE, DB_POOL_PRE_PING, SLOW_QUERY_THRESHOLD_MS, SLOW_QUERY_LOG_SIZE, SLOW_QUERY_EXPLAIN, \
+    PROFILE_SAMPLE_RATE, PROFILE_SECRET, PROFILE_DIR, TRACING_EXPORTER, TRACING_FILE, TRACING_BUFFER_SIZE, \
+    TRACING_SLOW_MS, TRACING_SAMPLE_RATE, GZIP_MIN_SIZE, GZIP_LEVEL, SQLITE_BUSY_TIMEOUT_MS, SQLITE_MMAP_SIZE, \
+    SQLITE_SYNCHRONOUS, SQLITE_BEGIN, BCRYPT_LOG_ROUNDS, PASSWORD_HASH_WORKERS, PASSWORD_HASH_MAX_PENDING, \
+    PASSWORD_HASH_TIMEOUT, SHARED_CACHE_SLOTS, SHARED_CACHE_TTL
+from src.access_tokens import jwt_config
+from src.app_middleware import bind_unit_of_work, bind_response_compression
+from src.json_provider import FastJSONProvider
+from src.observability.metrics import MetricsRegistry, install_metrics
+from src.observability.profiler import RequestProfiler
+from src.observability.slow_queries import SlowQueryLog
+from src.observability.tracing import InMemoryExporter, JsonLinesExporter, Tracer, install_tracing
+from src.services.cache_service import TTLAccountStatusCache
+from src.services.cached_db_service import CachedDBInterface
 from src.services.db_service import SQLAlchemyDBService
+from src.services.memory_db_service import InMemoryDBService
+from src.services.password_hasher import PasswordHasher
+from src.services.pool_metrics import InstrumentedQueuePool
+from src.services.shared_cache import SharedAccountCache
+from src.services.sqlite_profile import is_sqlite, install_sqlite_profile, sqlite_engine_options
 
-db_url = f'mysql+pymysql://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}'
+db_url = DATABASE_URL
 
 app = Flask(__name__)
+app.json = FastJSONProvider(app)
 app.config['SQLALCHEMY_DATABASE_URI'] = db_url
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
-app.config['JWT_SECRET_KEY'] = JWT_SECRET_KEY
+app.config['SQLALCHEMY_ENGINE_OPTIONS'] = dict(
+    poolclass=InstrumentedQueuePool,
+    pool_size=DB_POOL_SIZE,
+    max_overflow=DB_MAX_OVERFLOW,
+    pool_timeout=DB_POOL_TIMEOUT,
+    pool_recycle=DB_POOL_RECYCLE,
+    pool_pre_ping=DB_POOL_PRE_PING,
+)
+use_sqlite = is_sqlite(db_url)
+if use_sqlite:
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = sqlite_engine_options(db_url, app.config['SQLALCHEMY_ENGINE_OPTIONS'])
+app.config.update(jwt_config(JWT_SECRET_KEY))
 
 db = SQLAlchemy(app)
-migrate = Migrate(app, db)
+# SQLite can't ALTER most of a table, so autogenerated migrations recreate it through Alembic's batch mode
+migrate = Migrate(app, db, render_as_batch=use_sqlite)
 jwt = JWTManager(app)
-bcrypt = Bcrypt(app)
+password_hasher = PasswordHasher(rounds=BCRYPT_LOG_ROUNDS, workers=PASSWORD_HASH_WORKERS,
+                                 max_pending=PASSWORD_HASH_MAX_PENDING, timeout=PASSWORD_HASH_TIMEOUT)
 
-db_interface = SQLAlchemyDBService(db_url=db_url)
\ No newline at end of file
+# With the shared cache on, check_account_active is answered from it already: a copy per worker would only lag behind
+account_status_cache = None if SHARED_CACHE_SLOTS else \
+    TTLAccountStatusCache(max_size=ACCOUNT_STATUS_CACHE_SIZE, ttl=ACCOUNT_STATUS_CACHE_TTL)
+
+use_memory = DB_BACKEND == 'memory'
+if use_memory:
+    # No engine: the hooks below that time or explain SQL statements are left out
+    db_interface = InMemoryDBService.from_snapshot(MEMORY_SNAPSHOT, account_status_cache) if MEMORY_SNAPSHOT else \
+        InMemoryDBService(account_status_cache)
+    db_engine = None
+else:
+    # Flask-SQLAlchemy and the DB service share a single engine, and with it a single connection pool
+    with app.app_context():
+        if use_sqlite:
+            # before the service's create_all opens the first connection
+            install_sqlite_profile(db.engine, busy_timeout_ms=SQLITE_BUSY_TIMEOUT_MS, mmap_size=SQLITE_MMAP_SIZE,
+                                   synchronous=SQLITE_SYNCHRONOUS, begin=SQLITE_BEGIN)
+        # the service drops an account's cached status once its change is committed
+        db_interface = SQLAlchemyDBService(engine=db.engine, account_status_cache=account_status_cache)
+    db_engine = db_interface.engine
+
+shared_account_cache = None
+if SHARED_CACHE_SLOTS:
+    # Created before gunicorn forks the workers (preload_app), which all inherit the same mapping
+    shared_account_cache = SharedAccountCache(slots=SHARED_CACHE_SLOTS, ttl=SHARED_CACHE_TTL)
+    db_interface = CachedDBInterface(db_interface, shared_account_cache)
+
+# every call of InMemoryDBService is already atomic, it has no transaction to span a request with
+if DB_REQUEST_UNIT_OF_WORK and not use_memory:
+    bind_unit_of_work(app, db_interface)
+bind_response_compression(app, min_size=GZIP_MIN_SIZE, level=GZIP_LEVEL)
+
+metrics = MetricsRegistry()
+install_metrics(app, db_engine, metrics)
+if db_engine is not None:
+    metrics.register_gauges('db_pool', 'Connection pool status', db_interface.pool_status)
+if shared_account_cache is not None:
+    metrics.register_gauges('shared_account_cache', 'Shared account cache statistics (this worker)',
+                            shared_account_cache.stats)
+else:
+    metrics.register_gauges('account_status_cache', 'Account status cache statistics', account_status_cache.stats)
+
+slow_query_log = SlowQueryLog(db_engine, threshold=SLOW_QUERY_THRESHOLD_MS / 1000,
+                              capacity=SLOW_QUERY_LOG_SIZE, explain=SLOW_QUERY_EXPLAIN)
+if db_engine is not None:
+    slow_query_log.install()
+
+if PROFILE_SAMPLE_RATE or PROFILE_SECRET:
+    RequestProfiler(PROFILE_DIR, sample_rate=PROFILE_SAMPLE_RATE, secret=PROFILE_SECRET).install(app)
+
+trace_exporter = None
+if TRACING_EXPORTER == 'memory':
+    trace_exporter = InMemoryExporter(capacity=TRACING_BUFFER_SIZE)
+elif TRACING_EXPORTER == 'jsonl':
+    trace_exporter = JsonLinesExporter(TRACING_FILE)
+if trace_exporter is not None:
+    tracer = Tracer(trace_exporter, slow_threshold=TRACING_SLOW_MS / 1000, sample_rate=TRACING_SAMPLE_RATE)
+    install_tracing(app, tracer, db_engine, db_interface)
@@ -5,4 +5,59 @@ DB_PORT = os.environ.get('DB_PORT', 3306)
 DB_NAME = os.environ.get('MYSQL_DATABASE', "DustyDollar")
 DB_USER = os.environ.get('MYSQL_USER', 'sherrif')
 DB_PASSWORD = os.environ.get('MYSQL_PASSWORD', 'maverick')
+DB_BACKEND = os.environ.get('DB_BACKEND', 'mysql').lower()
+# Anchored at the repository root by default: migrate_db.sh and the server run from different directories
+SQLITE_PATH = os.path.abspath(os.environ.get('SQLITE_PATH', os.path.join(os.path.dirname(os.path.dirname(
+    os.path.abspath(__file__))), 'dustydollar.db')))
+SQLITE_BUSY_TIMEOUT_MS = int(os.environ.get('SQLITE_BUSY_TIMEOUT_MS', 5000))
+SQLITE_MMAP_SIZE = int(os.environ.get('SQLITE_MMAP_SIZE', 256 * 1024 * 1024))
+SQLITE_SYNCHRONOUS = os.environ.get('SQLITE_SYNCHRONOUS', 'NORMAL').upper()
+SQLITE_BEGIN = os.environ.get('SQLITE_BEGIN', 'IMMEDIATE').upper()
+# DB_BACKEND=memory keeps the data in the process (InMemoryDBService), loaded from MEMORY_SNAPSHOT when set
+MEMORY_SNAPSHOT = os.environ.get('MEMORY_SNAPSHOT', '')
+DATABASE_URL = os.environ.get('DATABASE_URL', f'sqlite:///{SQLITE_PATH}' if DB_BACKEND == 'sqlite' else
+                              'sqlite://' if DB_BACKEND == 'memory' else
+                              f'mysql+pymysql://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}')
+# Used by the ASGI app (src/asgi_app.py); derived from DATABASE_URL when empty, swapping in the asyncio driver
+# (aiomysql or aiosqlite)
+ASYNC_DATABASE_URL = os.environ.get('ASYNC_DATABASE_URL', '')
 JWT_SECRET_KEY = os.environ.get('JWT_SECRET_KEY', "super-secret-key")
+BCRYPT_LOG_ROUNDS = int(os.environ.get('BCRYPT_LOG_ROUNDS', 12))
+PASSWORD_HASH_WORKERS = int(os.environ.get('PASSWORD_HASH_WORKERS', 1))
+PASSWORD_HASH_MAX_PENDING = int(os.environ.get('PASSWORD_HASH_MAX_PENDING', 16))
+PASSWORD_HASH_TIMEOUT = float(os.environ.get('PASSWORD_HASH_TIMEOUT', 10))
+STATEMENT_MAX_PAGE_SIZE = int(os.environ.get('STATEMENT_MAX_PAGE_SIZE', 1000))
+ACCOUNT_STATUS_CACHE_SIZE = int(os.environ.get('ACCOUNT_STATUS_CACHE_SIZE', 10000))
+ACCOUNT_STATUS_CACHE_TTL = float(os.environ.get('ACCOUNT_STATUS_CACHE_TTL', 5.0))
+# 0 disables the cache shared by the workers of a host for balances and account data
+SHARED_CACHE_SLOTS = int(os.environ.get('SHARED_CACHE_SLOTS', 0))
+SHARED_CACHE_TTL = float(os.environ.get('SHARED_CACHE_TTL', 5.0))
+DB_REQUEST_UNIT_OF_WORK = os.environ.get('DB_REQUEST_UNIT_OF_WORK', 'false').lower() in ('1', 'true')
+DB_POOL_SIZE = int(os.environ.get('DB_POOL_SIZE', 5))
+DB_MAX_OVERFLOW = int(os.environ.get('DB_MAX_OVERFLOW', 10))
+DB_POOL_TIMEOUT = float(os.environ.get('DB_POOL_TIMEOUT', 30))
+DB_POOL_RECYCLE = int(os.environ.get('DB_POOL_RECYCLE', 1800))
+DB_POOL_PRE_PING = os.environ.get('DB_POOL_PRE_PING', 'true').lower() in ('1', 'true')
+GUNICORN_BIND = os.environ.get('GUNICORN_BIND', '0.0.0.0:5000')
+GUNICORN_WORKERS = int(os.environ.get('GUNICORN_WORKERS', 0))
+GUNICORN_THREADS = int(os.environ.get('GUNICORN_THREADS', 0))
+GUNICORN_TIMEOUT = int(os.environ.get('GUNICORN_TIMEOUT', 30))
+GUNICORN_GRACEFUL_TIMEOUT = int(os.environ.get('GUNICORN_GRACEFUL_TIMEOUT', 30))
+GUNICORN_KEEPALIVE = int(os.environ.get('GUNICORN_KEEPALIVE', 5))
+GUNICORN_MAX_REQUESTS = int(os.environ.get('GUNICORN_MAX_REQUESTS', 1000))
+GUNICORN_MAX_REQUESTS_JITTER = int(os.environ.get('GUNICORN_MAX_REQUESTS_JITTER', 100))
+ADMIN_ACCOUNT_IDS = {int(account_id) for account_id in os.environ.get('ADMIN_ACCOUNT_IDS', '').split(',') if account_id}
+SLOW_QUERY_THRESHOLD_MS = float(os.environ.get('SLOW_QUERY_THRESHOLD_MS', 200))
+SLOW_QUERY_LOG_SIZE = int(os.environ.get('SLOW_QUERY_LOG_SIZE', 100))
+SLOW_QUERY_EXPLAIN = os.environ.get('SLOW_QUERY_EXPLAIN', 'true').lower() in ('1', 'true')
+PROFILE_SAMPLE_RATE = int(os.environ.get('PROFILE_SAMPLE_RATE', 0))
+PROFILE_SECRET = os.environ.get('PROFILE_SECRET', '')
+PROFILE_DIR = os.environ.get('PROFILE_DIR', '/tmp/dustydollar-profiles')
+TRACING_EXPORTER = os.environ.get('TRACING_EXPORTER', '').lower()
+TRACING_FILE = os.environ.get('TRACING_FILE', '/tmp/dustydollar-traces.jsonl')
+TRACING_BUFFER_SIZE = int(os.environ.get('TRACING_BUFFER_SIZE', 200))
+TRACING_SLOW_MS = float(os.environ.get('TRACING_SLOW_MS', 500))
+TRACING_SAMPLE_RATE = float(os.environ.get('TRACING_SAMPLE_RATE', 0.0))
+GZIP_MIN_SIZE = int(os.environ.get('GZIP_MIN_SIZE', 1024))
+GZIP_LEVEL = int(os.environ.get('GZIP_LEVEL', 6))
+BATCH_MAX_OPERATIONS = int(os.environ.get('BATCH_MAX_OPERATIONS', 10000))
@@ -4,3 +4,7 @@ class InvalidOperationException(Exception):
 
 class DatabaseWritingException(Exception):
     pass
+
+
+class HasherBusyException(Exception):
+    pass
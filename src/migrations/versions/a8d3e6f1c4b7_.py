@@ -0,0 +1,32 @@
+"""add indexes for rebuilding the daily withdrawal counters
+
+Revision ID: a8d3e6f1c4b7
+Revises: f2b9c4d7e8a1
+Create Date: 2026-10-17 15:12:40.318264
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a8d3e6f1c4b7'
+down_revision = 'f2b9c4d7e8a1'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('transacao', schema=None) as batch_op:
+        batch_op.create_index('ix_transacao_data_transacao', ['data_transacao', 'id_conta', 'valor'], unique=False)
+
+    with op.batch_alter_table('saque_diario', schema=None) as batch_op:
+        batch_op.create_index('ix_saque_diario_data_saque', ['data_saque'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('saque_diario', schema=None) as batch_op:
+        batch_op.drop_index('ix_saque_diario_data_saque')
+
+    with op.batch_alter_table('transacao', schema=None) as batch_op:
+        batch_op.drop_index('ix_transacao_data_transacao')
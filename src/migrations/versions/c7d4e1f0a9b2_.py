@@ -0,0 +1,37 @@
+"""add saque_diario withdrawal counters
+
+Revision ID: c7d4e1f0a9b2
+Revises: b49212af82db
+Create Date: 2026-10-17 09:12:41.204518
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c7d4e1f0a9b2'
+down_revision = 'b49212af82db'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('saque_diario',
+    sa.Column('id_conta', sa.Integer(), autoincrement=False, nullable=False),
+    sa.Column('data_saque', sa.Date(), nullable=False),
+    sa.Column('valor_sacado', sa.DECIMAL(precision=10, scale=2), nullable=False),
+    sa.PrimaryKeyConstraint('id_conta', 'data_saque')
+    )
+    # Seed today's counters so limits keep working across the deploy. Older days can be
+    # rebuilt on demand with `flask rebuild-withdrawal-counters --date YYYY-MM-DD`.
+    op.execute(
+        "INSERT INTO saque_diario (id_conta, data_saque, valor_sacado) "
+        "SELECT id_conta, data_transacao, SUM(ABS(valor)) FROM transacao "
+        "WHERE valor < 0 AND data_transacao = CURRENT_DATE "
+        "GROUP BY id_conta, data_transacao"
+    )
+
+
+def downgrade():
+    op.drop_table('saque_diario')
@@ -0,0 +1,33 @@
+"""add indexes for statement, withdrawal limit and person lookups
+
+Revision ID: e5a8b3c2d1f6
+Revises: c7d4e1f0a9b2
+Create Date: 2026-10-17 10:03:18.551902
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e5a8b3c2d1f6'
+down_revision = 'c7d4e1f0a9b2'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('conta', schema=None) as batch_op:
+        batch_op.create_index('ix_conta_id_pessoa', ['id_pessoa'], unique=False)
+
+    with op.batch_alter_table('transacao', schema=None) as batch_op:
+        batch_op.create_index('ix_transacao_id_conta_data_transacao', ['id_conta', 'data_transacao', 'valor'],
+                              unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('transacao', schema=None) as batch_op:
+        batch_op.drop_index('ix_transacao_id_conta_data_transacao')
+
+    with op.batch_alter_table('conta', schema=None) as batch_op:
+        batch_op.drop_index('ix_conta_id_pessoa')
@@ -0,0 +1,26 @@
+"""add keyset index for statement pagination
+
+Revision ID: f2b9c4d7e8a1
+Revises: e5a8b3c2d1f6
+Create Date: 2026-10-17 11:26:52.093417
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f2b9c4d7e8a1'
+down_revision = 'e5a8b3c2d1f6'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('transacao', schema=None) as batch_op:
+        batch_op.create_index('ix_transacao_id_conta_id_transacao', ['id_conta', 'id_transacao'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('transacao', schema=None) as batch_op:
+        batch_op.drop_index('ix_transacao_id_conta_id_transacao')
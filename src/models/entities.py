@@ -1,5 +1,6 @@
+import math
 from dataclasses import dataclass
-from datetime import datetime
+from datetime import date
 from enum import Enum
 from typing import Optional
 
@@ -16,12 +17,20 @@ class OperationType(Enum):
     Withdrawal = 2
 
 
-@dataclass
+class OperationStatus(Enum):
+    Ok = 1
+    LimitReached = 2
+    Blocked = 3
+    NotFound = 4
+    Invalid = 5
+
+
+@dataclass(slots=True)
 class Person:
     id_pessoa: Optional[int]
     nome: str
     cpf: str
-    data_nascimento: datetime.date
+    data_nascimento: date
 
     @staticmethod
     def from_dict(data: dict):
@@ -29,24 +38,29 @@ class Person:
             id_pessoa=int(data.get('id_pessoa')) if data.get('id_pessoa') else None,
             nome=data.get('nome'),
             cpf=data.get('cpf'),
-            data_nascimento=datetime.strptime(data.get('data_nascimento'), '%Y-%m-%d').date()
+            data_nascimento=date.fromisoformat(data.get('data_nascimento'))
         )
 
+    @staticmethod
+    def from_row(row):
+        # Takes the table's columns in order, with the dates already converted by the driver
+        return Person(id_pessoa=row[0], nome=row[1], cpf=row[2], data_nascimento=row[3])
+
     def to_dict(self) -> dict:
         return dict(
             id_pessoa=self.id_pessoa,
             nome=self.nome,
             cpf=self.cpf,
-            data_nascimento=self.data_nascimento.strftime('%Y-%m-%d')
+            data_nascimento=self.data_nascimento.isoformat()
         )
 
 
-@dataclass
+@dataclass(slots=True)
 class Transaction:
     id_transacao: Optional[int]
     id_conta: int
     valor: float
-    data_transacao: datetime.date
+    data_transacao: date
 
     @staticmethod
     def from_dict(data: dict):
@@ -54,19 +68,23 @@ class Transaction:
             id_transacao=int(data.get('id_transacao')) if data.get('id_transacao') else None,
             id_conta=int(data.get('id_conta')),
             valor=float(data.get('valor')),
-            data_transacao=datetime.strptime(data.get("data_transacao"), '%Y-%m-%d').date()
+            data_transacao=date.fromisoformat(data.get("data_transacao"))
         )
 
+    @staticmethod
+    def from_row(row):
+        return Transaction(id_transacao=row[0], id_conta=row[1], valor=float(row[2]), data_transacao=row[3])
+
     def to_dict(self) -> dict:
         return dict(
             id_transacao=self.id_transacao,
             id_conta=self.id_conta,
             valor=self.valor,
-            data_transacao=self.data_transacao.strftime('%Y-%m-%d')
+            data_transacao=self.data_transacao.isoformat()
         )
 
 
-@dataclass
+@dataclass(slots=True)
 class Account:
     id_conta: Optional[int]
     id_pessoa: int
@@ -74,7 +92,7 @@ class Account:
     limite_saque_diario: float
     flag_ativo: bool
     tipo_conta: AccountType
-    data_criacao: datetime.date
+    data_criacao: date
 
     @staticmethod
     def from_dict(data: dict):
@@ -85,7 +103,19 @@ class Account:
             limite_saque_diario=float(data.get('limite_saque_diario')),
             flag_ativo=bool(data.get('flag_ativo')),
             tipo_conta=AccountType(int(data.get('tipo_conta'))),
-            data_criacao=datetime.strptime(data.get("data_criacao"), '%Y-%m-%d').date()
+            data_criacao=date.fromisoformat(data.get("data_criacao"))
+        )
+
+    @staticmethod
+    def from_row(row):
+        return Account(
+            id_conta=row[0],
+            id_pessoa=row[1],
+            saldo=float(row[2]),
+            limite_saque_diario=float(row[3]),
+            flag_ativo=bool(row[4]),
+            tipo_conta=AccountType(row[5]),
+            data_criacao=row[6]
         )
 
     def to_dict(self) -> dict:
@@ -96,11 +126,11 @@ class Account:
             limite_saque_diario=self.limite_saque_diario,
             flag_ativo=self.flag_ativo,
             tipo_conta=self.tipo_conta.value,
-            data_criacao=self.data_criacao.strftime("%Y-%m-%d")
+            data_criacao=self.data_criacao.isoformat()
         )
 
 
-@dataclass
+@dataclass(slots=True)
 class OperationDTO:
     account_id: int
     amount: float
@@ -110,9 +140,12 @@ class OperationDTO:
     def from_dict(data: dict):
         if data.get('operation_type') not in ['Deposit', 'Withdrawal']:
             raise InvalidOperationException('You can only use valid operations such as Deposit or Withdrawal.')
+        amount = abs(float(data.get('amount')))
+        if not 0 < amount < math.inf:
+            raise InvalidOperationException('The amount must be a number greater than 0.')
         return OperationDTO(
             account_id=int(data.get('account_id')),
-            amount=abs(float(data.get('amount'))),
+            amount=amount,
             operation_type=OperationType(1) if data.get('operation_type') == 'Deposit' else OperationType(2)
         )
 
@@ -124,7 +157,7 @@ class OperationDTO:
         )
 
 
-@dataclass
+@dataclass(slots=True)
 class AccountStatusDTO:
     account_id: int
     account_active: bool
@@ -142,3 +175,16 @@ class AccountStatusDTO:
             account_active=self.account_active
         )
 
+
+@dataclass(slots=True)
+class OperationResult:
+    status: OperationStatus
+    transaction: Optional[Transaction] = None
+    balance: Optional[float] = None
+
+    def to_dict(self) -> dict:
+        return dict(
+            status=self.status.name,
+            transaction=self.transaction.to_dict() if self.transaction else None,
+            balance=self.balance
+        )
@@ -0,0 +1,169 @@
+import time
+from bisect import bisect_left
+from threading import Lock
+from typing import Callable, Iterator, Optional, Tuple
+
+from flask import Flask, Response, g, has_request_context, request
+from sqlalchemy import Engine, event
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 34)
+
+PROMETHEUS_CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+def _escape(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(names: Tuple[str, ...], values: Tuple[str, ...], extra: str = '') -> str:
+    pairs = [f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+class Counter:
+    def __init__(self, name: str, documentation: str, label_names: Tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = label_names
+        self._values: dict[tuple, float] = {}
+        self._lock = Lock()
+
+    def inc(self, *label_values, amount: float = 1.0):
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0.0) + amount
+
+    def value(self, *label_values) -> float:
+        return self._values.get(label_values, 0.0)
+
+    def render(self) -> Iterator[str]:
+        yield f'# HELP {self.name} {self.documentation}'
+        yield f'# TYPE {self.name} counter'
+        with self._lock:
+            values = sorted(self._values.items())
+        for label_values, value in values:
+            yield f'{self.name}{_format_labels(self.label_names, label_values)} {value}'
+
+
+class Histogram:
+    def __init__(self, name: str, documentation: str, label_names: Tuple[str, ...] = (),
+                 buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = label_names
+        self.buckets = tuple(sorted(buckets))
+        # label values -> [per-bucket counts (last one is +Inf), sum of observations]
+        self._series: dict[tuple, list] = {}
+        self._lock = Lock()
+
+    def observe(self, value: float, *label_values):
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                series = self._series[label_values] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][index] += 1
+            series[1] += value
+
+    def count(self, *label_values) -> int:
+        series = self._series.get(label_values)
+        return sum(series[0]) if series else 0
+
+    def render(self) -> Iterator[str]:
+        yield f'# HELP {self.name} {self.documentation}'
+        yield f'# TYPE {self.name} histogram'
+        with self._lock:
+            series = sorted((labels, (list(counts), total)) for labels, (counts, total) in self._series.items())
+        for label_values, (counts, total) in series:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float('inf'),), counts):
+                cumulative += bucket_count
+                le = 'le="+Inf"' if bound == float('inf') else f'le="{float(bound)}"'
+                yield f'{self.name}_bucket{_format_labels(self.label_names, label_values, le)} {cumulative}'
+            labels = _format_labels(self.label_names, label_values)
+            yield f'{self.name}_sum{labels} {total}'
+            yield f'{self.name}_count{labels} {cumulative}'
+
+
+class MetricsRegistry:
+    def __init__(self, namespace: str = 'dustydollar'):
+        self.namespace = namespace
+        self._metrics = []
+        self._gauge_collectors = []
+
+    def counter(self, name: str, documentation: str, label_names: Tuple[str, ...] = ()) -> Counter:
+        metric = Counter(f'{self.namespace}_{name}', documentation, label_names)
+        self._metrics.append(metric)
+        return metric
+
+    def histogram(self, name: str, documentation: str, label_names: Tuple[str, ...] = (),
+                  buckets: Tuple[float, ...] = LATENCY_BUCKETS) -> Histogram:
+        metric = Histogram(f'{self.namespace}_{name}', documentation, label_names, buckets)
+        self._metrics.append(metric)
+        return metric
+
+    def register_gauges(self, prefix: str, documentation: str, collect: Callable[[], dict]):
+        # Gauges read at scrape time, one per key of the dict returned by collect()
+        self._gauge_collectors.append((f'{self.namespace}_{prefix}', documentation, collect))
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        for prefix, documentation, collect in self._gauge_collectors:
+            for key, value in collect().items():
+                lines.append(f'# HELP {prefix}_{key} {documentation} ({key})')
+                lines.append(f'# TYPE {prefix}_{key} gauge')
+                lines.append(f'{prefix}_{key} {float(value)}')
+        return '\n'.join(lines) + '\n'
+
+
+def _time_queries(engine: Engine):
+    @event.listens_for(engine, 'before_cursor_execute')
+    def start_query_timer(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault('query_start_time', []).append(time.perf_counter())
+
+    @event.listens_for(engine, 'after_cursor_execute')
+    def stop_query_timer(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info['query_start_time'].pop()
+        if has_request_context():
+            g.db_queries = g.get('db_queries', 0) + 1
+            g.db_duration = g.get('db_duration', 0.0) + elapsed
+
+    @event.listens_for(engine, 'handle_error')
+    def drop_query_timers(exception_context):
+        # a failed statement never reaches after_cursor_execute: its start time would stay on the connection
+        if exception_context.connection is not None:
+            exception_context.connection.info.pop('query_start_time', None)
+
+
+def install_metrics(app: Flask, engine: Optional[Engine], registry: MetricsRegistry):
+    request_duration = registry.histogram('http_request_duration_seconds', 'Time spent handling the request.',
+                                          ('endpoint', 'method'))
+    requests_total = registry.counter('http_requests_total', 'Handled requests by status code.',
+                                      ('endpoint', 'method', 'status'))
+    request_db_queries = registry.histogram('http_request_db_queries', 'SQL statements executed per request.',
+                                            ('endpoint',), QUERY_COUNT_BUCKETS)
+    request_db_duration = registry.histogram('http_request_db_duration_seconds',
+                                             'Time spent executing SQL statements per request.', ('endpoint',))
+
+    if engine is not None:
+        _time_queries(engine)
+
+    @app.before_request
+    def start_request_timer():
+        g.request_start_time = time.perf_counter()
+
+    @app.after_request
+    def record_request_metrics(response: Response):
+        start = g.get('request_start_time')
+        if start is None:
+            return response
+        endpoint = request.endpoint or 'unmatched'
+        request_duration.observe(time.perf_counter() - start, endpoint, request.method)
+        requests_total.inc(endpoint, request.method, str(response.status_code))
+        request_db_queries.observe(g.get('db_queries', 0), endpoint)
+        request_db_duration.observe(g.get('db_duration', 0.0), endpoint)
+        return response
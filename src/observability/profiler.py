@@ -0,0 +1,153 @@
+import argparse
+import cProfile
+import hashlib
+import hmac
+import itertools
+import os
+import pstats
+import re
+import sys
+import time
+from collections import defaultdict
+from datetime import datetime
+from typing import Callable, Optional
+
+from flask import Flask, g, request
+
+DEBUG_HEADER = 'X-Debug-Profile'
+
+
+def sign_debug_header(secret: str, timestamp: Optional[int] = None) -> str:
+    timestamp = int(time.time()) if timestamp is None else timestamp
+    signature = hmac.new(secret.encode(), str(timestamp).encode(), hashlib.sha256).hexdigest()
+    return f'{timestamp}.{signature}'
+
+
+class RequestProfiler:
+    # Profiles one in every `sample_rate` requests (0 disables sampling) plus any request carrying a debug
+    # header signed with `secret`, and dumps the stats to <output_dir>/<endpoint>/<timestamp>-<pid>.pstats
+    def __init__(self, output_dir: str, sample_rate: int = 0, secret: str = '', max_header_age: int = 300,
+                 clock: Callable[[], float] = time.time):
+        self.output_dir = output_dir
+        self.sample_rate = sample_rate
+        self.secret = secret
+        self.max_header_age = max_header_age
+        self._clock = clock
+        self._requests = itertools.count()
+
+    def install(self, app: Flask):
+        @app.before_request
+        def start_profiler():
+            if not self.should_profile(request.headers.get(DEBUG_HEADER)):
+                return
+            g.profiler = cProfile.Profile()
+            try:
+                g.profiler.enable()
+            except ValueError:
+                # another profiler is already active on this thread
+                g.profiler = None
+
+        @app.teardown_request
+        def dump_profile(exception=None):
+            profiler = g.pop('profiler', None)
+            if profiler is None:
+                return
+            profiler.disable()
+            profiler.dump_stats(self._dump_path(request.endpoint))
+
+    def should_profile(self, debug_header: Optional[str]) -> bool:
+        if debug_header and self.secret and self.valid_debug_header(debug_header):
+            return True
+        return self.sample_rate > 0 and next(self._requests) % self.sample_rate == 0
+
+    def valid_debug_header(self, debug_header: str) -> bool:
+        timestamp, _, signature = debug_header.partition('.')
+        if not timestamp.isdigit() or abs(self._clock() - int(timestamp)) > self.max_header_age:
+            return False
+        return hmac.compare_digest(sign_debug_header(self.secret, int(timestamp)), debug_header)
+
+    def _dump_path(self, endpoint: Optional[str]) -> str:
+        directory = os.path.join(self.output_dir, re.sub(r'[^\w.-]', '_', endpoint or 'unmatched'))
+        os.makedirs(directory, exist_ok=True)
+        return os.path.join(directory, f"{datetime.now().strftime('%Y%m%dT%H%M%S.%f')}-{os.getpid()}.pstats")
+
+
+def _frame_name(function: tuple) -> str:
+    filename, line, name = function
+    if filename == '~':
+        return name.replace(';', ':')
+    return f'{name} ({os.path.basename(filename)}:{line})'.replace(';', ':')
+
+
+def collapse_stats(stats: dict, root: str, min_microseconds: float = 1.0) -> dict:
+    # pstats only keeps caller -> callee edges, not whole stacks, so each callee's time is split between its
+    # callers in proportion to the cumulative time spent under every caller
+    callees = defaultdict(dict)
+    for function, (_, _, _, _, callers) in stats.items():
+        for caller, edge in callers.items():
+            callees[caller][function] = edge[3]
+
+    stacks = defaultdict(float)
+
+    def walk(function, path, fraction):
+        _, _, own_time, cumulative_time, _ = stats[function]
+        path = path + (_frame_name(function),)
+        stacks[';'.join(path)] += own_time * fraction * 1e6
+        for callee, edge_time in callees[function].items():
+            callee_time = stats[callee][3]
+            share = fraction * edge_time / callee_time if callee_time > 0 else 0.0
+            if callee_time * share * 1e6 >= min_microseconds and _frame_name(callee) not in path:
+                walk(callee, path, share)
+
+    for function, (_, _, _, _, callers) in stats.items():
+        if not callers:
+            walk(function, (root,), 1.0)
+    return stacks
+
+
+def collapse_profiles(profile_dir: str) -> dict:
+    stacks = defaultdict(float)
+    for endpoint in sorted(os.listdir(profile_dir)):
+        endpoint_dir = os.path.join(profile_dir, endpoint)
+        if not os.path.isdir(endpoint_dir):
+            continue
+        for filename in sorted(os.listdir(endpoint_dir)):
+            if filename.endswith('.pstats'):
+                profile = pstats.Stats(os.path.join(endpoint_dir, filename))
+                for stack, microseconds in collapse_stats(profile.stats, endpoint).items():
+                    stacks[stack] += microseconds
+    return stacks
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description='Tools for the request profiler dumps.')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    collapse = subparsers.add_parser('collapse', help='Aggregates the dumps into a collapsed-stack file '
+                                                      '(flamegraph.pl, speedscope, inferno).')
+    collapse.add_argument('profile_dir')
+    collapse.add_argument('-o', '--output', help='Defaults to stdout.')
+
+    sign = subparsers.add_parser('sign', help=f'Prints a value for the {DEBUG_HEADER} header.')
+    sign.add_argument('--secret', default=os.environ.get('PROFILE_SECRET', ''))
+    args = parser.parse_args()
+
+    if args.command == 'sign':
+        if not args.secret:
+            parser.error('no secret given and PROFILE_SECRET is not set')
+        print(sign_debug_header(args.secret))
+        return 0
+
+    lines = [f'{stack} {round(microseconds)}'
+             for stack, microseconds in sorted(collapse_profiles(args.profile_dir).items()) if round(microseconds) > 0]
+    output = open(args.output, 'w') if args.output else sys.stdout
+    try:
+        output.write('\n'.join(lines) + '\n')
+    finally:
+        if args.output:
+            output.close()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,121 @@
+import logging
+import sys
+import time
+from collections import deque
+from datetime import datetime
+from threading import Lock
+from typing import Optional
+
+from flask import has_request_context, request
+from sqlalchemy import Engine, event
+
+from src.services.ports.db_interface import DBInterface
+
+logger = logging.getLogger(__name__)
+
+REDACTED = '***'
+_SENSITIVE_PARAMETERS = ('senha',)
+_EXPLAINABLE_VERBS = ('SELECT', 'UPDATE', 'DELETE')
+
+
+def _is_sensitive(name) -> bool:
+    return isinstance(name, str) and any(sensitive in name.lower() for sensitive in _SENSITIVE_PARAMETERS)
+
+
+def redact_parameters(parameters, context=None):
+    if isinstance(parameters, list):
+        return [redact_parameters(row, context) for row in parameters]
+    if isinstance(parameters, dict):
+        return {name: REDACTED if _is_sensitive(name) else value for name, value in parameters.items()}
+    if isinstance(parameters, tuple):
+        # positional paramstyles (sqlite's qmark) only keep the parameter names on the compiled statement
+        names = getattr(getattr(context, 'compiled', None), 'positiontup', None)
+        if names is None or len(names) != len(parameters):
+            return parameters
+        return tuple(REDACTED if _is_sensitive(name) else value for name, value in zip(names, parameters))
+    return parameters
+
+
+def calling_db_method(depth: int = 2) -> Optional[str]:
+    frame = sys._getframe(depth)
+    while frame is not None:
+        instance = frame.f_locals.get('self')
+        if isinstance(instance, DBInterface) and frame.f_code.co_name in DBInterface.__abstractmethods__:
+            return frame.f_code.co_name
+        frame = frame.f_back
+    return None
+
+
+class SlowQueryLog:
+    def __init__(self, engine: Optional[Engine], threshold: float, capacity: int = 100, explain: bool = True):
+        self.engine = engine
+        self.threshold = threshold
+        self.explain = explain
+        self._entries = deque(maxlen=capacity)
+        self._lock = Lock()
+
+    def install(self):
+        event.listen(self.engine, 'before_cursor_execute', self._start_timer)
+        event.listen(self.engine, 'after_cursor_execute', self._stop_timer)
+        event.listen(self.engine, 'handle_error', self._drop_timers)
+
+    def entries(self) -> list:
+        with self._lock:
+            entries = list(reversed(self._entries))
+        # Plans are taken when the log is read rather than when the statement ran: the EXPLAIN needs a connection
+        # of its own, and the request that ran the slow statement would be holding two of the pool's meanwhile
+        for entry in entries:
+            pending = entry.pop('_explain', None)
+            if pending is not None:
+                entry['plan'] = self._explain(*pending)
+        return entries
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def _start_timer(self, conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault('slow_query_start_time', []).append(time.perf_counter())
+
+    def _stop_timer(self, conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info['slow_query_start_time'].pop()
+        if elapsed < self.threshold or conn.info.get('slow_query_explaining'):
+            return
+
+        entry = {
+            'recorded_at': datetime.now().isoformat(timespec='milliseconds'),
+            'duration_ms': round(elapsed * 1000, 3),
+            'statement': ' '.join(statement.split()),
+            'parameters': redact_parameters(parameters, context),
+            'db_method': calling_db_method(),
+            'endpoint': request.endpoint if has_request_context() else None,
+            'plan': None,
+        }
+        if self.explain and statement.lstrip().split(None, 1)[0].upper() in _EXPLAINABLE_VERBS:
+            entry['_explain'] = (statement, parameters)
+        logger.warning('Slow query (%.1f ms) in %s [%s]: %s', entry['duration_ms'], entry['db_method'],
+                       entry['endpoint'], entry['statement'])
+        with self._lock:
+            self._entries.append(entry)
+
+    def _drop_timers(self, exception_context):
+        # a failed statement never reaches after_cursor_execute: its start time would stay on the connection
+        if exception_context.connection is not None:
+            exception_context.connection.info.pop('slow_query_start_time', None)
+
+    def _explain(self, statement: str, parameters):
+        prefix = 'EXPLAIN QUERY PLAN' if self.engine.dialect.name == 'sqlite' else 'EXPLAIN'
+        if isinstance(parameters, list):
+            parameters = parameters[0] if parameters else ()
+        try:
+            # a separate connection, so the plan never runs inside (or breaks) the caller's transaction
+            with self.engine.connect() as connection:
+                connection.info['slow_query_explaining'] = True
+                try:
+                    rows = connection.exec_driver_sql(f'{prefix} {statement}', parameters).mappings().fetchall()
+                finally:
+                    connection.info.pop('slow_query_explaining', None)
+            return [{key: value if isinstance(value, (int, float)) or value is None else str(value)
+                     for key, value in row.items()} for row in rows]
+        except Exception as error:
+            return [{'error': str(error)}]
@@ -0,0 +1,211 @@
+import json
+import random
+import secrets
+import time
+from collections import deque
+from contextlib import contextmanager, nullcontext
+from contextvars import ContextVar
+from functools import wraps
+from threading import Lock
+from typing import Callable, Optional
+
+from flask import Flask, Response, g, request
+from sqlalchemy import Engine, event
+
+from src.services.ports.db_interface import DBInterface
+
+_current_span: ContextVar[Optional['Span']] = ContextVar('current_span', default=None)
+
+
+class Span:
+    __slots__ = ('trace', 'span_id', 'parent_id', 'name', 'attributes', 'start', 'duration', 'error')
+
+    def __init__(self, trace: 'Trace', name: str, parent_id: Optional[str], attributes: dict):
+        self.trace = trace
+        self.span_id = secrets.token_hex(8)
+        self.parent_id = parent_id
+        self.name = name
+        self.attributes = attributes
+        self.start = time.perf_counter()
+        self.duration = None
+        self.error = None
+
+    def finish(self, error: Optional[BaseException] = None):
+        self.duration = time.perf_counter() - self.start
+        if error is not None:
+            self.error = f'{type(error).__name__}: {error}'
+        self.trace.spans.append(self)
+
+    def to_dict(self) -> dict:
+        return {
+            'span_id': self.span_id,
+            'parent_id': self.parent_id,
+            'name': self.name,
+            'start_offset_ms': round((self.start - self.trace.root.start) * 1000, 3),
+            'duration_ms': round(self.duration * 1000, 3),
+            'attributes': self.attributes,
+            'error': self.error,
+        }
+
+
+class Trace:
+    def __init__(self, name: str, attributes: dict):
+        self.trace_id = secrets.token_hex(16)
+        self.started_at = time.time()
+        self.spans = []
+        self.root = Span(self, name, None, attributes)
+
+    @property
+    def failed(self) -> bool:
+        return any(span.error is not None for span in self.spans)
+
+    def to_dict(self) -> dict:
+        return {
+            'trace_id': self.trace_id,
+            'name': self.root.name,
+            'started_at': self.started_at,
+            'duration_ms': round(self.root.duration * 1000, 3),
+            'error': self.failed,
+            'attributes': self.root.attributes,
+            'spans': [span.to_dict() for span in sorted(self.spans, key=lambda span: span.start)],
+        }
+
+
+class InMemoryExporter:
+    def __init__(self, capacity: int = 200):
+        self._traces = deque(maxlen=capacity)
+        self._lock = Lock()
+
+    def export(self, trace: dict):
+        with self._lock:
+            self._traces.append(trace)
+
+    def traces(self) -> list:
+        with self._lock:
+            return list(reversed(self._traces))
+
+
+class JsonLinesExporter:
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = Lock()
+
+    def export(self, trace: dict):
+        line = json.dumps(trace, default=str) + '\n'
+        with self._lock, open(self.path, 'a') as file:
+            file.write(line)
+
+
+class Tracer:
+    # Tail-based sampling: the decision is taken once the request is over, so every failed trace and every
+    # trace slower than `slow_threshold` is kept, plus a `sample_rate` fraction of the remaining ones
+    def __init__(self, exporter, slow_threshold: float, sample_rate: float = 0.0,
+                 rng: Callable[[], float] = random.random):
+        self.exporter = exporter
+        self.slow_threshold = slow_threshold
+        self.sample_rate = sample_rate
+        self._rng = rng
+
+    def start_trace(self, name: str, **attributes) -> tuple:
+        trace = Trace(name, attributes)
+        return trace.root, _current_span.set(trace.root)
+
+    def finish_trace(self, root: Span, token, error: Optional[BaseException] = None):
+        try:
+            _current_span.reset(token)
+        except ValueError:
+            # finished from another context (e.g. after a streamed response), which never saw the root span
+            pass
+        root.finish(error)
+        trace = root.trace
+        if trace.failed or root.duration >= self.slow_threshold or self._rng() < self.sample_rate:
+            self.exporter.export(trace.to_dict())
+
+
+def start_span(name: str, **attributes) -> Optional[Span]:
+    parent = _current_span.get()
+    if parent is None:
+        return None
+    return Span(parent.trace, name, parent.span_id, attributes)
+
+
+@contextmanager
+def _span(parent: Span, name: str, attributes: dict):
+    span = Span(parent.trace, name, parent.span_id, attributes)
+    token = _current_span.set(span)
+    try:
+        yield span
+    except BaseException as error:
+        span.finish(error)
+        raise
+    else:
+        span.finish()
+    finally:
+        _current_span.reset(token)
+
+
+def trace_span(name: str, **attributes):
+    # A no-op outside of a traced request, so instrumented code does not need to know whether tracing is on
+    parent = _current_span.get()
+    if parent is None:
+        return nullcontext()
+    return _span(parent, name, attributes)
+
+
+def traced(name: str, function: Callable) -> Callable:
+    @wraps(function)
+    def traced_function(*args, **kwargs):
+        with trace_span(name):
+            return function(*args, **kwargs)
+    return traced_function
+
+
+def install_tracing(app: Flask, tracer: Tracer, engine: Optional[Engine], db_interface: DBInterface):
+    @app.before_request
+    def start_request_trace():
+        g.trace_root, g.trace_token = tracer.start_trace('request', method=request.method, path=request.path)
+
+    @app.after_request
+    def tag_request_trace(response: Response):
+        root = g.get('trace_root')
+        if root is not None:
+            root.attributes.update(endpoint=request.endpoint, status=response.status_code)
+            if response.status_code >= 500:
+                root.error = f'HTTP {response.status_code}'
+        return response
+
+    @app.teardown_request
+    def finish_request_trace(exception=None):
+        root = g.pop('trace_root', None)
+        if root is not None:
+            tracer.finish_trace(root, g.pop('trace_token'), exception)
+
+    # Instance attributes shadow the methods, so every caller of the shared objects goes through the spans
+    for method in sorted(DBInterface.__abstractmethods__):
+        setattr(db_interface, method, traced(f'db.{method}', getattr(db_interface, method)))
+    app.json.response = traced('serialize', app.json.response)
+    if engine is None:
+        return
+    engine.dialect.do_commit = traced('sql.commit', engine.dialect.do_commit)
+
+    @event.listens_for(engine, 'before_cursor_execute')
+    def start_statement_span(conn, cursor, statement, parameters, context, executemany):
+        span = start_span('sql', statement=' '.join(statement.split()), executemany=executemany)
+        conn.info.setdefault('trace_spans', []).append(span)
+
+    @event.listens_for(engine, 'after_cursor_execute')
+    def finish_statement_span(conn, cursor, statement, parameters, context, executemany):
+        span = conn.info['trace_spans'].pop()
+        if span is not None:
+            span.attributes['rowcount'] = cursor.rowcount
+            span.finish()
+
+    @event.listens_for(engine, 'handle_error')
+    def fail_statement_span(exception_context):
+        connection = exception_context.connection
+        spans = connection.info.get('trace_spans') if connection is not None else None
+        # only statements that reached the cursor have an open span
+        if spans and exception_context.cursor is not None:
+            span = spans.pop()
+            if span is not None:
+                span.finish(exception_context.original_exception)
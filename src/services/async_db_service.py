@@ -0,0 +1,68 @@
+from datetime import datetime, timedelta
+from typing import Union, List, Optional, Tuple
+
+from sqlalchemy import MetaData, func, select
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from src.models.entities import Transaction
+from src.services.db_service import define_tables
+from src.services.ports.async_db_interface import AsyncDBInterface
+
+_ASYNC_DRIVERS = {'mysql': 'mysql+aiomysql', 'sqlite': 'sqlite+aiosqlite'}
+
+
+def to_async_url(db_url: str) -> str:
+    url = make_url(db_url)
+    drivername = _ASYNC_DRIVERS.get(url.get_backend_name(), url.drivername)
+    return url.set(drivername=drivername).render_as_string(hide_password=False)
+
+
+class AsyncSQLAlchemyDBService(AsyncDBInterface):
+    # Same tables and statements as SQLAlchemyDBService, on SQLAlchemy's asyncio extension (aiomysql in
+    # production, aiosqlite in the tests). Read-only: writes stay on the Flask app, which keeps its caches in sync
+    def __init__(self, engine: AsyncEngine):
+        self.engine = engine
+        self.metadata = MetaData()
+        (self.conta_table, self.pessoa_table, self.transactions_table,
+         self.withdrawals_table) = define_tables(self.metadata)
+
+    async def check_account_active(self, account_id: int) -> Optional[bool]:
+        async with self.engine.connect() as connection:
+            return await connection.scalar(
+                select(self.conta_table.c.flag_ativo).where(self.conta_table.c.id_conta == account_id)
+            )
+
+    async def get_balance(self, account_id: int) -> Union[float, None]:
+        async with self.engine.connect() as connection:
+            return await connection.scalar(
+                select(self.conta_table.c.saldo).where(self.conta_table.c.id_conta == account_id)
+            )
+
+    async def get_account_version(self, account_id: int) -> Tuple[float, Optional[int]] | None:
+        last_transaction_id = (select(func.max(self.transactions_table.c.id_transacao))
+                               .where(self.transactions_table.c.id_conta == account_id)
+                               .scalar_subquery())
+        async with self.engine.connect() as connection:
+            result = (await connection.execute(
+                select(self.conta_table.c.saldo, last_transaction_id)
+                .where(self.conta_table.c.id_conta == account_id)
+            )).first()
+        if result is None:
+            return None
+        return float(result[0]), result[1]
+
+    async def get_extract_from_account(self, account_id: int, days: int = 30, after_id: Optional[int] = None,
+                                       limit: Optional[int] = None) -> List[Transaction]:
+        since_day = datetime.now() - timedelta(days=days)
+        query = select(self.transactions_table).where(self.transactions_table.c.id_conta == account_id,
+                                                      self.transactions_table.c.data_transacao >= since_day)
+        if after_id is not None:
+            query = query.where(self.transactions_table.c.id_transacao > after_id)
+        if after_id is not None or limit is not None:
+            query = query.order_by(self.transactions_table.c.id_transacao)
+        if limit is not None:
+            query = query.limit(limit)
+        async with self.engine.connect() as connection:
+            result = await connection.execute(query)
+            return [Transaction.from_row(row) for row in result]
@@ -0,0 +1,52 @@
+import time
+from collections import OrderedDict
+from threading import Lock
+from typing import Optional, Callable
+
+from src.services.ports.cache_interface import AccountStatusCache
+
+
+class TTLAccountStatusCache(AccountStatusCache):
+    def __init__(self, max_size: int, ttl: float, clock: Callable[[], float] = time.monotonic):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.clock = clock
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries: OrderedDict[int, tuple[bool, float]] = OrderedDict()
+        self._lock = Lock()
+
+    def get(self, account_id: int) -> Optional[bool]:
+        with self._lock:
+            entry = self._entries.get(account_id)
+            if entry is None or entry[1] <= self.clock():
+                if entry is not None:
+                    del self._entries[account_id]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(account_id)
+            self.hits += 1
+            return entry[0]
+
+    def set(self, account_id: int, active: bool):
+        with self._lock:
+            self._entries[account_id] = (active, self.clock() + self.ttl)
+            self._entries.move_to_end(account_id)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, account_id: int):
+        with self._lock:
+            self._entries.pop(account_id, None)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return dict(
+                size=len(self._entries),
+                max_size=self.max_size,
+                hits=self.hits,
+                misses=self.misses,
+                evictions=self.evictions
+            )
@@ -0,0 +1,127 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Union, List, Optional, Tuple, Iterator, Set, Callable
+
+from src.models.entities import Account, Person, Transaction, OperationDTO, OperationResult
+from src.services.ports.db_interface import DBInterface
+from src.services.shared_cache import SharedAccountCache
+
+
+class CachedDBInterface(DBInterface):
+    # Serves check_account_active, get_balance and get_account_version from a SharedAccountCache, and drops the
+    # account from it once every write that can change those answers has returned (and so has been committed).
+    # Everything else, including get_account and the wrapped service's own attributes (engine, pool_status...), goes
+    # straight through.
+    def __init__(self, db_interface: DBInterface, cache: SharedAccountCache):
+        self.db_interface = db_interface
+        self.cache = cache
+        # Accounts written by the current unit of work: until its commit, their reads skip the cache
+        self._unit_of_work: ContextVar[Optional[Set[int]]] = ContextVar('cached_unit_of_work', default=None)
+
+    def __getattr__(self, name: str):
+        return getattr(self.db_interface, name)
+
+    def begin_unit_of_work(self):
+        self._unit_of_work.set(set())
+        self.db_interface.begin_unit_of_work()
+
+    def end_unit_of_work(self, commit: bool):
+        written = self._unit_of_work.get()
+        self._unit_of_work.set(None)
+        try:
+            self.db_interface.end_unit_of_work(commit)
+        finally:
+            for account_id in written or ():
+                self.cache.invalidate(account_id)
+
+    def _cached(self, account_id: int, get: Callable, put: Callable, read: Callable):
+        written = self._unit_of_work.get()
+        if written is not None and account_id in written:
+            return read(account_id)
+        value, version = get(account_id)
+        if value is not None:
+            return value
+        value = read(account_id)
+        # A unit of work may read through a snapshot older than what the cache already dropped: it never fills it
+        if written is None:
+            put(account_id, value, version)
+        return value
+
+    @contextmanager
+    def _writing(self, *account_ids: int):
+        written = self._unit_of_work.get()
+        if written is not None:
+            written.update(account_ids)
+        try:
+            yield
+        finally:
+            for account_id in account_ids:
+                self.cache.invalidate(account_id)
+
+    def check_account_active(self, account_id: int) -> Optional[bool]:
+        return self._cached(account_id, self.cache.get_active, self.cache.set_active,
+                            self.db_interface.check_account_active)
+
+    def get_balance(self, account_id: int) -> Union[float, None]:
+        return self._cached(account_id, self.cache.get_balance, self.cache.set_balance, self.db_interface.get_balance)
+
+    def get_account_version(self, account_id: int) -> Tuple[float, Optional[int]] | None:
+        # Read before every balance and statement view for its ETag: cached, a repeated balance request makes no
+        # query at all
+        return self._cached(account_id, self.cache.get_version, self.cache.set_version,
+                            self.db_interface.get_account_version)
+
+    def deposit_into_account(self, account_id: int, amount: float):
+        with self._writing(account_id):
+            return self.db_interface.deposit_into_account(account_id, amount)
+
+    def withdraw_from_account(self, account_id: int, amount: float):
+        with self._writing(account_id):
+            return self.db_interface.withdraw_from_account(account_id, amount)
+
+    def change_account_active_status(self, account_id: int, active: bool):
+        with self._writing(account_id):
+            return self.db_interface.change_account_active_status(account_id, active)
+
+    def update_account_password(self, account_id: int, password_hash: str,
+                                expected_hash: Optional[str] = None) -> bool:
+        with self._writing(account_id):
+            return self.db_interface.update_account_password(account_id, password_hash, expected_hash)
+
+    def post_operation(self, operation: OperationDTO) -> Tuple[Transaction, float] | Tuple[None, None]:
+        with self._writing(operation.account_id):
+            return self.db_interface.post_operation(operation)
+
+    def execute_withdrawal(self, account_id: int, amount: float) -> OperationResult:
+        with self._writing(account_id):
+            return self.db_interface.execute_withdrawal(account_id, amount)
+
+    def apply_operations(self, operations: List[OperationDTO]) -> List[OperationResult]:
+        with self._writing(*{operation.account_id for operation in operations}):
+            return self.db_interface.apply_operations(operations)
+
+    def get_account(self, account_id: int) -> Tuple[Account, str] | Tuple[None, None]:
+        return self.db_interface.get_account(account_id)
+
+    def create_new_account(self, new_account: Account, password: str):
+        return self.db_interface.create_new_account(new_account, password)
+
+    def create_new_person(self, new_person: Person):
+        return self.db_interface.create_new_person(new_person)
+
+    def get_extract_from_account(self, account_id: int, days: int = 30, after_id: Optional[int] = None,
+                                 limit: Optional[int] = None) -> List[Transaction]:
+        return self.db_interface.get_extract_from_account(account_id, days, after_id, limit)
+
+    def iter_extract_from_account(self, account_id: int, days: int = 30,
+                                  after_id: Optional[int] = None) -> Iterator[Transaction]:
+        return self.db_interface.iter_extract_from_account(account_id, days, after_id)
+
+    def make_transaction(self, account_id: int, amount: float) -> Transaction:
+        # a new transacao row changes the account version
+        with self._writing(account_id):
+            return self.db_interface.make_transaction(account_id, amount)
+
+    def reached_withdrawal_limit(self, account_id: int, withdrawal_amount: float) -> bool:
+        return self.db_interface.reached_withdrawal_limit(account_id, withdrawal_amount)
+
@@ -1,61 +1,179 @@
-from datetime import datetime, timedelta
-from typing import Union, List, Optional, Tuple
+from contextvars import ContextVar
+from datetime import datetime, timedelta, date
+from typing import Union, List, Optional, Tuple, Iterator, Callable
 
 from sqlalchemy import create_engine, Column, Integer, String, Boolean, Date, DECIMAL, Table, MetaData, Text, insert, \
-    func, Engine
+    func, Engine, select, Index, bindparam
 from sqlalchemy.orm import sessionmaker, Session
+from sqlalchemy.pool import QueuePool
 
-from src.models.entities import Account, Transaction, Person
+from src.exceptions import DatabaseWritingException
+from src.models.entities import Account, Transaction, Person, OperationDTO, OperationType, OperationResult, \
+    OperationStatus
+from src.services.pool_metrics import InstrumentedQueuePool
+from src.services.ports.cache_interface import AccountStatusCache
 from src.services.ports.db_interface import DBInterface
 
+STATEMENT_STREAM_BATCH_SIZE = 1000
+
+
+class _UnitOfWorkSession:
+    # Shared by every DBInterface call made while a unit of work is bound: the methods' own
+    # commit/close calls only flush, and the outcome is decided once by end_unit_of_work.
+    def __init__(self, session: Session):
+        self.session = session
+        self.rollback_only = False
+        self.reads = {}
+        # run by end_unit_of_work once the session is committed, dropped on rollback
+        self.after_commit: List[Callable[[], None]] = []
+
+    def __getattr__(self, name):
+        return getattr(self.session, name)
+
+    def commit(self):
+        self.session.flush()
+
+    def rollback(self):
+        self.rollback_only = True
+
+    def close(self):
+        pass
+
+
+def define_tables(metadata: MetaData) -> Tuple[Table, Table, Table, Table]:
+    # Shared by the sync and async services
+    conta = Table('conta', metadata,
+                  Column('id_conta', Integer, primary_key=True, autoincrement=True),
+                  Column('id_pessoa', Integer, nullable=True),
+                  Column('saldo', DECIMAL(precision=10, scale=2), nullable=True),
+                  Column('limite_saque_diario', DECIMAL(precision=10, scale=2), nullable=True),
+                  Column('flag_ativo', Boolean, nullable=True),
+                  Column('tipo_conta', Integer, nullable=True),
+                  Column('data_criacao', Date, nullable=True),
+                  Column('senha', Text, nullable=False),
+                  Index('ix_conta_id_pessoa', 'id_pessoa'),
+                  )
+
+    pessoa = Table('pessoa', metadata,
+                   Column('id_pessoa', Integer, primary_key=True, autoincrement=True),
+                   Column('nome', Text, nullable=True),
+                   Column('cpf', String(11), nullable=True),
+                   Column('data_nascimento', Date, nullable=True),
+                   )
+
+    transacao = Table('transacao', metadata,
+                      Column('id_transacao', Integer, primary_key=True, autoincrement=True),
+                      Column('id_conta', Integer, nullable=True),
+                      Column('valor', DECIMAL(precision=10, scale=2), nullable=True),
+                      Column('data_transacao', Date, nullable=True),
+                      Index('ix_transacao_id_conta_data_transacao',
+                            'id_conta', 'data_transacao', 'valor'),
+                      Index('ix_transacao_id_conta_id_transacao', 'id_conta', 'id_transacao'),
+                      Index('ix_transacao_data_transacao', 'data_transacao', 'id_conta', 'valor'),
+                      )
+
+    saque_diario = Table('saque_diario', metadata,
+                         Column('id_conta', Integer, primary_key=True, autoincrement=False),
+                         Column('data_saque', Date, primary_key=True),
+                         Column('valor_sacado', DECIMAL(precision=10, scale=2), nullable=False),
+                         Index('ix_saque_diario_data_saque', 'data_saque'),
+                         )
+    return conta, pessoa, transacao, saque_diario
+
 
 class SQLAlchemyDBService(DBInterface):
-    def __init__(self, db_url: str):
+    def __init__(self, db_url: str = '', engine: Optional[Engine] = None, engine_options: Optional[dict] = None,
+                 account_status_cache: Optional[AccountStatusCache] = None):
         self.metadata = MetaData()
-        self.engine, self.Session = self._create_engine(db_url)
-        self.conta_table = Table('conta', self.metadata,
-                                 Column('id_conta', Integer, primary_key=True, autoincrement=True),
-                                 Column('id_pessoa', Integer, nullable=True),
-                                 Column('saldo', DECIMAL(precision=10, scale=0), nullable=True),
-                                 Column('limite_saque_diario', DECIMAL(precision=10, scale=0), nullable=True),
-                                 Column('flag_ativo', Boolean, nullable=True),
-                                 Column('tipo_conta', DECIMAL(precision=10, scale=0), nullable=True),
-                                 Column('data_criacao', Date, nullable=True),
-                                 Column('senha', Text, nullable=False),
-                                 )
-
-        self.pessoa_table = Table('pessoa', self.metadata,
-                                  Column('id_pessoa', Integer, primary_key=True, autoincrement=True),
-                                  Column('nome', Text, nullable=True),
-                                  Column('cpf', String(11), nullable=True),
-                                  Column('data_nascimento', Date, nullable=True),
-                                  )
-
-        self.transactions_table = Table('transacao', self.metadata,
-                                        Column('id_transacao', Integer, primary_key=True, autoincrement=True),
-                                        Column('id_conta', Integer, nullable=True),
-                                        Column('valor', DECIMAL(precision=10, scale=0), nullable=True),
-                                        Column('data_transacao', Date, nullable=True),
-                                        )
-
-    def _create_engine(self, db_url: str) -> tuple[None, None] | tuple[Engine, sessionmaker[Session]]:
-        if not db_url:
-            return None, None
-        engine = create_engine(db_url)
+        self.account_status_cache = account_status_cache
+        self.engine, self.Session = self._create_engine(db_url, engine, engine_options or {})
+        self._unit_of_work: ContextVar[Optional[_UnitOfWorkSession]] = ContextVar(f'unit_of_work_{id(self)}',
+                                                                                   default=None)
+        (self.conta_table, self.pessoa_table, self.transactions_table,
+         self.withdrawals_table) = define_tables(self.metadata)
+
+    def _create_engine(self, db_url: str, engine: Optional[Engine],
+                       engine_options: dict) -> tuple[None, None] | tuple[Engine, sessionmaker[Session]]:
+        if engine is None:
+            if not db_url:
+                return None, None
+            engine = create_engine(db_url, **engine_options)
         _sessionmaker = sessionmaker(bind=engine)
 
         self.metadata.create_all(engine)
 
         return engine, _sessionmaker
 
+    def pool_status(self) -> dict:
+        pool = self.engine.pool
+        if not isinstance(pool, QueuePool):
+            return {}
+        status = dict(
+            size=pool.size(),
+            checked_out=pool.checkedout(),
+            checked_in=pool.checkedin(),
+            overflow=max(pool.overflow(), 0)
+        )
+        if isinstance(pool, InstrumentedQueuePool):
+            status.update(pool.metrics.snapshot())
+        return status
+
+    def begin_unit_of_work(self):
+        self._unit_of_work.set(_UnitOfWorkSession(self.Session()))
+
+    def end_unit_of_work(self, commit: bool):
+        unit_of_work = self._unit_of_work.get()
+        if unit_of_work is None:
+            return
+        self._unit_of_work.set(None)
+        commit = commit and not unit_of_work.rollback_only
+        try:
+            if commit:
+                unit_of_work.session.commit()
+            else:
+                unit_of_work.session.rollback()
+        finally:
+            unit_of_work.session.close()
+        if commit:
+            for callback in unit_of_work.after_commit:
+                callback()
+
+    def _after_commit(self, callback: Callable[[], None]):
+        unit_of_work = self._unit_of_work.get()
+        if unit_of_work is not None:
+            unit_of_work.after_commit.append(callback)
+        else:
+            callback()
+
+    def _session(self) -> Session | _UnitOfWorkSession:
+        unit_of_work = self._unit_of_work.get()
+        return unit_of_work if unit_of_work is not None else self.Session()
+
+    def _memoized_read(self, method: str, account_id: int, read):
+        unit_of_work = self._unit_of_work.get()
+        if unit_of_work is None:
+            return read()
+        key = (method, account_id)
+        if key not in unit_of_work.reads:
+            unit_of_work.reads[key] = read()
+        return unit_of_work.reads[key]
+
+    def _forget_reads(self, account_id: int):
+        unit_of_work = self._unit_of_work.get()
+        if unit_of_work is not None:
+            unit_of_work.reads.pop(('check_account_active', account_id), None)
+            unit_of_work.reads.pop(('get_account', account_id), None)
+
     def create_new_account(self, new_account: Account, password: str):
         new_row = new_account.to_dict()
         for key, item in new_row.copy().items():
             if item is None:
                 new_row.pop(key)
         new_row['senha'] = password
+        # to_dict() has the ISO string, which SQLite's Date type refuses
+        new_row['data_criacao'] = new_account.data_criacao
 
-        session = self.Session()
+        session = self._session()
         insert_row = insert(self.conta_table)
         session.execute(insert_row, new_row)
         session.commit()
@@ -66,15 +184,18 @@ class SQLAlchemyDBService(DBInterface):
         for key, item in new_row.copy().items():
             if not item:
                 new_row.pop(key)
+        if new_person.data_nascimento:
+            new_row['data_nascimento'] = new_person.data_nascimento
 
-        session = self.Session()
+        session = self._session()
         insert_row = insert(self.pessoa_table)
         session.execute(insert_row, new_row)
         session.commit()
         session.close()
 
     def deposit_into_account(self, account_id: int, amount: float):
-        session = self.Session()
+        self._forget_reads(account_id)
+        session = self._session()
 
         session.execute(
             self.conta_table.update()
@@ -86,14 +207,31 @@ class SQLAlchemyDBService(DBInterface):
         session.close()
 
     def get_balance(self, account_id: int) -> Union[float, None]:
-        session = self.Session()
+        session = self._session()
         saldo = session.query(self.conta_table.c.saldo).filter_by(id_conta=account_id).scalar()
         current_balance = saldo if saldo is not None else None
         session.close()
         return current_balance
 
+    def get_account_version(self, account_id: int) -> Tuple[float, Optional[int]] | None:
+        # Every balance change also inserts a transacao row, so (saldo, last id_transacao) changes with both the
+        # balance and the statement. The MAX is read from the (id_conta, id_transacao) index.
+        last_transaction_id = (select(func.max(self.transactions_table.c.id_transacao))
+                               .where(self.transactions_table.c.id_conta == account_id)
+                               .scalar_subquery())
+        session = self._session()
+        result = session.execute(
+            select(self.conta_table.c.saldo, last_transaction_id)
+            .where(self.conta_table.c.id_conta == account_id)
+        ).first()
+        session.close()
+        if result is None:
+            return None
+        return float(result[0]), result[1]
+
     def withdraw_from_account(self, account_id: int, amount: float):
-        session = self.Session()
+        self._forget_reads(account_id)
+        session = self._session()
         session.execute(
             self.conta_table.update()
             .where(self.conta_table.c.id_conta == account_id)
@@ -103,7 +241,8 @@ class SQLAlchemyDBService(DBInterface):
         session.close()
 
     def change_account_active_status(self, account_id: int, active: bool):
-        session = self.Session()
+        self._forget_reads(account_id)
+        session = self._session()
         session.execute(
             self.conta_table.update()
             .where(self.conta_table.c.id_conta == account_id)
@@ -111,78 +250,384 @@ class SQLAlchemyDBService(DBInterface):
         )
         session.commit()
         session.close()
+        if self.account_status_cache is not None:
+            # Dropped once the new status is visible to other requests: dropped earlier, a concurrent check could
+            # put the old one back for the whole TTL
+            self._after_commit(lambda: self.account_status_cache.invalidate(account_id))
 
-    def get_extract_from_account(self, account_id: int, days: int = 30) -> List[Transaction]:
+    def update_account_password(self, account_id: int, password_hash: str,
+                                expected_hash: Optional[str] = None) -> bool:
+        self._forget_reads(account_id)
+        query = self.conta_table.update().where(self.conta_table.c.id_conta == account_id)
+        if expected_hash is not None:
+            query = query.where(self.conta_table.c.senha == expected_hash)
+        session = self._session()
+        updated = session.execute(query.values(senha=password_hash))
+        session.commit()
+        session.close()
+        return updated.rowcount > 0
+
+    def get_extract_from_account(self, account_id: int, days: int = 30, after_id: Optional[int] = None,
+                                 limit: Optional[int] = None) -> List[Transaction]:
         since_day = datetime.now() - timedelta(days=days)
-        session = self.Session()
-        result = (session.query(self.transactions_table)
-                  .filter(self.transactions_table.c.id_conta == account_id,
-                          self.transactions_table.c.data_transacao >= since_day).all())
+        session = self._session()
+        query = (session.query(self.transactions_table)
+                 .filter(self.transactions_table.c.id_conta == account_id,
+                         self.transactions_table.c.data_transacao >= since_day))
+        if after_id is not None:
+            query = query.filter(self.transactions_table.c.id_transacao > after_id)
+        if after_id is not None or limit is not None:
+            query = query.order_by(self.transactions_table.c.id_transacao)
+        if limit is not None:
+            query = query.limit(limit)
+        result = query.all()
         session.close()
-        extract = [Transaction.from_dict(dict(
-            id_transacao=row[0],
-            id_conta=row[1],
-            valor=row[2],
-            data_transacao=row[3].strftime('%Y-%m-%d')
-        )) for row in result]
-        return extract
+        return [Transaction.from_row(row) for row in result]
 
-    def make_transaction(self, account_id: int, amount: float) -> Transaction:
+    def iter_extract_from_account(self, account_id: int, days: int = 30,
+                                  after_id: Optional[int] = None) -> Iterator[Transaction]:
+        since_day = datetime.now() - timedelta(days=days)
+        query = (select(self.transactions_table)
+                 .where(self.transactions_table.c.id_conta == account_id,
+                        self.transactions_table.c.data_transacao >= since_day)
+                 .order_by(self.transactions_table.c.id_transacao)
+                 .execution_options(yield_per=STATEMENT_STREAM_BATCH_SIZE))
+        if after_id is not None:
+            query = query.where(self.transactions_table.c.id_transacao > after_id)
+
+        # The session stays open while the caller consumes the rows, which are fetched from a
+        # server-side cursor one batch at a time.
         session = self.Session()
+        try:
+            for row in session.execute(query):
+                yield Transaction.from_row(row)
+        finally:
+            session.close()
+
+    def make_transaction(self, account_id: int, amount: float) -> Transaction:
+        session = self._session()
         transaction = {
             "id_conta": account_id,
             "valor": amount,
-            "data_transacao": datetime.now().strftime("%Y-%m-%d")
+            "data_transacao": datetime.now().date()
         }
 
+        if amount < 0:
+            self._lock_account_row(session, account_id)
         insert_row = insert(self.transactions_table)
         result = session.execute(insert_row, transaction)
+        if amount < 0:
+            self._add_to_withdrawal_counter(session, account_id, transaction['data_transacao'], abs(amount))
         session.commit()
         session.close()
 
-        completed_transaction = {
-            **transaction,
-            'id_transacao': result.inserted_primary_key[0]
+        return Transaction(
+            id_transacao=result.inserted_primary_key[0],
+            id_conta=account_id,
+            valor=float(amount),
+            data_transacao=transaction['data_transacao']
+        )
+
+    def post_operation(self, operation: OperationDTO) -> Tuple[Transaction, float] | Tuple[None, None]:
+        self._forget_reads(operation.account_id)
+        amount = abs(operation.amount)
+        if operation.operation_type == OperationType.Withdrawal:
+            amount = -amount
+        transaction = {
+            "id_conta": operation.account_id,
+            "valor": amount,
+            "data_transacao": datetime.now().date()
         }
-        return Transaction.from_dict(completed_transaction)
+
+        session = self._session()
+        try:
+            if amount < 0:
+                self._lock_account_row(session, operation.account_id)
+            updated = session.execute(
+                self.conta_table.update()
+                .where(self.conta_table.c.id_conta == operation.account_id)
+                .values(saldo=self.conta_table.c.saldo + amount)
+            )
+            if updated.rowcount == 0:
+                session.rollback()
+                return None, None
+
+            result = session.execute(insert(self.transactions_table), transaction)
+            if amount < 0:
+                self._add_to_withdrawal_counter(session, operation.account_id, transaction['data_transacao'],
+                                                abs(amount))
+            balance = session.query(self.conta_table.c.saldo).filter_by(id_conta=operation.account_id).scalar()
+            session.commit()
+        except Exception:
+            session.rollback()
+            raise
+        finally:
+            session.close()
+
+        return Transaction(
+            id_transacao=result.inserted_primary_key[0],
+            id_conta=operation.account_id,
+            valor=amount,
+            data_transacao=transaction['data_transacao']
+        ), float(balance)
 
     def check_account_active(self, account_id: int) -> Optional[bool]:
-        session = self.Session()
+        return self._memoized_read('check_account_active', account_id,
+                                   lambda: self._check_account_active(account_id))
+
+    def _check_account_active(self, account_id: int) -> Optional[bool]:
+        session = self._session()
         account_active = session.query(self.conta_table.c.flag_ativo).filter_by(id_conta=account_id).scalar()
         session.close()
         if account_active is None:
             return None
         return account_active
 
+    def _total_withdrawn_today(self, session: Session, account_id: int) -> float:
+        total_withdrawn = (session.query(self.withdrawals_table.c.valor_sacado)
+                           .filter_by(id_conta=account_id, data_saque=datetime.now().date())
+                           .scalar()
+                           ) or 0.0
+        return float(total_withdrawn)
+
+    def _lock_account_row(self, session: Session, account_id: int):
+        # Taken before _add_to_withdrawal_counter, like execute_withdrawal does: without it two first withdrawals
+        # of the day on the same account can both find no counter row and both insert one
+        session.execute(select(self.conta_table.c.id_conta)
+                        .where(self.conta_table.c.id_conta == account_id)
+                        .with_for_update())
+
+    def _add_to_withdrawal_counter(self, session: Session, account_id: int, day: date, amount: float):
+        updated = session.execute(
+            self.withdrawals_table.update()
+            .where(self.withdrawals_table.c.id_conta == account_id,
+                   self.withdrawals_table.c.data_saque == day)
+            .values(valor_sacado=self.withdrawals_table.c.valor_sacado + amount)
+        )
+        if updated.rowcount == 0:
+            session.execute(insert(self.withdrawals_table),
+                            {"id_conta": account_id, "data_saque": day, "valor_sacado": amount})
+
+    def rebuild_withdrawal_counters(self, day: date) -> int:
+        withdrawn_per_account = (
+            select(self.transactions_table.c.id_conta,
+                   self.transactions_table.c.data_transacao,
+                   func.sum(func.abs(self.transactions_table.c.valor)))
+            .where(self.transactions_table.c.valor < 0.0,
+                   self.transactions_table.c.data_transacao == day)
+            .group_by(self.transactions_table.c.id_conta, self.transactions_table.c.data_transacao)
+        )
+
+        session = self._session()
+        try:
+            session.execute(self.withdrawals_table.delete().where(self.withdrawals_table.c.data_saque == day))
+            result = session.execute(
+                insert(self.withdrawals_table)
+                .from_select(['id_conta', 'data_saque', 'valor_sacado'], withdrawn_per_account)
+            )
+            session.commit()
+        except Exception:
+            session.rollback()
+            raise
+        finally:
+            session.close()
+        return result.rowcount
+
     def reached_withdrawal_limit(self, account_id: int, withdrawal_amount: float) -> bool:
-        session = self.Session()
+        session = self._session()
         withdrawal_limit = (session.query(self.conta_table.c.limite_saque_diario)
                             .filter_by(id_conta=account_id)
                             .scalar())
-        total_withdrawn = (session.query(func.sum(func.abs(self.transactions_table.c.valor)))
-                           .filter(self.transactions_table.c.id_conta == account_id,
-                                   self.transactions_table.c.valor < 0.0,
-                                   self.transactions_table.c.data_transacao == datetime.now().date().strftime(
-                                       '%Y-%m-%d'))
-                           .scalar()
-                           ) or 0.0
+        total_withdrawn = self._total_withdrawn_today(session, account_id)
         session.close()
         return True if (total_withdrawn + withdrawal_amount) > withdrawal_limit else False
 
+    def execute_withdrawal(self, account_id: int, amount: float) -> OperationResult:
+        self._forget_reads(account_id)
+        amount = abs(amount)
+        transaction = {
+            "id_conta": account_id,
+            "valor": -amount,
+            "data_transacao": datetime.now().date()
+        }
+
+        session = self._session()
+        try:
+            # Locking the account row serializes concurrent withdrawals, so the limit check below
+            # can't be passed by two requests at the same time.
+            account = (session.query(self.conta_table.c.flag_ativo,
+                                     self.conta_table.c.limite_saque_diario,
+                                     self.conta_table.c.saldo)
+                       .filter_by(id_conta=account_id)
+                       .with_for_update()
+                       .first())
+            if account is None:
+                session.rollback()
+                return OperationResult(status=OperationStatus.NotFound)
+
+            active, withdrawal_limit, balance = account
+            if not active:
+                session.rollback()
+                return OperationResult(status=OperationStatus.Blocked)
+
+            if self._total_withdrawn_today(session, account_id) + amount > float(withdrawal_limit):
+                session.rollback()
+                return OperationResult(status=OperationStatus.LimitReached, balance=float(balance))
+
+            session.execute(
+                self.conta_table.update()
+                .where(self.conta_table.c.id_conta == account_id)
+                .values(saldo=self.conta_table.c.saldo - amount)
+            )
+            result = session.execute(insert(self.transactions_table), transaction)
+            self._add_to_withdrawal_counter(session, account_id, transaction['data_transacao'], amount)
+            session.commit()
+        except Exception:
+            session.rollback()
+            raise
+        finally:
+            session.close()
+
+        return OperationResult(
+            status=OperationStatus.Ok,
+            transaction=Transaction(
+                id_transacao=result.inserted_primary_key[0],
+                id_conta=account_id,
+                valor=-amount,
+                data_transacao=transaction['data_transacao']
+            ),
+            balance=float(balance) - amount
+        )
+
+    def apply_operations(self, operations: List[OperationDTO]) -> List[OperationResult]:
+        account_ids = sorted({operation.account_id for operation in operations})
+        for account_id in account_ids:
+            self._forget_reads(account_id)
+        today = datetime.now().date()
+
+        session = self._session()
+        try:
+            # Locking in id order keeps two batches touching the same accounts from deadlocking
+            accounts = {row[0]: [row[1], float(row[2]), float(row[3])] for row in session.execute(
+                select(self.conta_table.c.id_conta,
+                       self.conta_table.c.flag_ativo,
+                       self.conta_table.c.limite_saque_diario,
+                       self.conta_table.c.saldo)
+                .where(self.conta_table.c.id_conta.in_(account_ids))
+                .order_by(self.conta_table.c.id_conta)
+                .with_for_update()
+            )}
+            withdrawn_today = {row[0]: float(row[1]) for row in session.execute(
+                select(self.withdrawals_table.c.id_conta, self.withdrawals_table.c.valor_sacado)
+                .where(self.withdrawals_table.c.id_conta.in_(account_ids),
+                       self.withdrawals_table.c.data_saque == today)
+            )}
+
+            results = []
+            transactions = []
+            balance_changes = {}
+            withdrawals = {}
+            for operation in operations:
+                account_id = operation.account_id
+                account = accounts.get(account_id)
+                amount = abs(operation.amount)
+                if account is None:
+                    results.append(OperationResult(status=OperationStatus.NotFound))
+                    continue
+                active, withdrawal_limit, balance = account
+                if not active:
+                    results.append(OperationResult(status=OperationStatus.Blocked))
+                    continue
+                if amount == 0:
+                    results.append(OperationResult(status=OperationStatus.Invalid, balance=balance))
+                    continue
+                if operation.operation_type == OperationType.Withdrawal:
+                    withdrawn = withdrawn_today.get(account_id, 0.0) + withdrawals.get(account_id, 0.0)
+                    if withdrawn + amount > withdrawal_limit:
+                        results.append(OperationResult(status=OperationStatus.LimitReached, balance=balance))
+                        continue
+                    withdrawals[account_id] = withdrawals.get(account_id, 0.0) + amount
+                    amount = -amount
+
+                account[2] = balance + amount
+                balance_changes[account_id] = balance_changes.get(account_id, 0.0) + amount
+                transaction = Transaction(id_transacao=None, id_conta=account_id, valor=amount, data_transacao=today)
+                transactions.append(transaction)
+                results.append(OperationResult(status=OperationStatus.Ok, transaction=transaction, balance=account[2]))
+
+            if transactions:
+                session.execute(
+                    self.conta_table.update()
+                    .where(self.conta_table.c.id_conta == bindparam('account_id'))
+                    .values(saldo=self.conta_table.c.saldo + bindparam('change')),
+                    [{'account_id': account_id, 'change': change} for account_id, change in balance_changes.items()]
+                )
+                self._insert_transactions(session, transactions)
+                self._add_to_withdrawal_counters(session, today, withdrawals, withdrawn_today)
+            session.commit()
+        except Exception:
+            session.rollback()
+            raise
+        finally:
+            session.close()
+
+        return results
+
+    def _insert_transactions(self, session: Session, transactions: List[Transaction]):
+        rows = [{
+            "id_conta": transaction.id_conta,
+            "valor": transaction.valor,
+            "data_transacao": transaction.data_transacao
+        } for transaction in transactions]
+        if self.engine.dialect.insert_executemany_returning_sort_by_parameter_order:
+            ids = session.execute(
+                insert(self.transactions_table)
+                .returning(self.transactions_table.c.id_transacao, sort_by_parameter_order=True),
+                rows
+            ).scalars().all()
+        else:
+            # No RETURNING (MySQL): the ids of a multi-row INSERT are only consecutive with innodb_autoinc_lock_mode
+            # below 2, but they always grow in row order. The caller holds the conta rows FOR UPDATE, so until the
+            # commit no one else adds transactions to these accounts: theirs above the last id are this insert's.
+            table = self.transactions_table
+            account_ids = {transaction.id_conta for transaction in transactions}
+            last_id = session.execute(select(func.max(table.c.id_transacao))
+                                      .where(table.c.id_conta.in_(account_ids))).scalar() or 0
+            # an executemany, which PyMySQL sends as multi-row INSERTs (without compiling one statement per batch)
+            session.execute(insert(table), rows)
+            ids = session.execute(select(table.c.id_transacao)
+                                  .where(table.c.id_conta.in_(account_ids), table.c.id_transacao > last_id)
+                                  .order_by(table.c.id_transacao)).scalars().all()
+            if len(ids) != len(rows):
+                raise DatabaseWritingException(f'Expected {len(rows)} new transactions, found {len(ids)}.')
+        for transaction, transaction_id in zip(transactions, ids):
+            transaction.id_transacao = transaction_id
+
+    def _add_to_withdrawal_counters(self, session: Session, day: date, withdrawals: dict, existing: dict):
+        counted = [{'account_id': account_id, 'amount': amount}
+                   for account_id, amount in withdrawals.items() if account_id in existing]
+        if counted:
+            session.execute(
+                self.withdrawals_table.update()
+                .where(self.withdrawals_table.c.id_conta == bindparam('account_id'),
+                       self.withdrawals_table.c.data_saque == day)
+                .values(valor_sacado=self.withdrawals_table.c.valor_sacado + bindparam('amount')),
+                counted
+            )
+        new = [{'id_conta': account_id, 'data_saque': day, 'valor_sacado': amount}
+               for account_id, amount in withdrawals.items() if account_id not in existing]
+        if new:
+            session.execute(insert(self.withdrawals_table).values(new))
+
     def get_account(self, account_id: int) -> Tuple[Account, str] | Tuple[None, None]:
-        session = self.Session()
+        return self._memoized_read('get_account', account_id, lambda: self._get_account(account_id))
+
+    def _get_account(self, account_id: int) -> Tuple[Account, str] | Tuple[None, None]:
+        session = self._session()
         result = session.query(self.conta_table).filter_by(id_conta=account_id).first()
         session.close()
 
         if result is None:
             return None, None
 
-        return Account.from_dict(dict(
-            id_conta=result[0],
-            id_pessoa=result[1],
-            saldo=result[2],
-            limite_saque_diario=result[3],
-            flag_ativo=result[4],
-            tipo_conta=result[5],
-            data_criacao=result[6].strftime('%Y-%m-%d')
-        )), result[7]  # result[7] is the store password hash
+        return Account.from_row(result), result[7]  # result[7] is the store password hash
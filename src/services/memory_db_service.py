@@ -0,0 +1,336 @@
+import json
+import os
+import tempfile
+from bisect import bisect_left
+from contextlib import ExitStack
+from dataclasses import replace
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal, ROUND_HALF_UP
+from itertools import count
+from threading import Lock, RLock
+from typing import Union, List, Optional, Tuple, Iterator, Iterable
+
+from src.exceptions import DatabaseWritingException
+from src.models.entities import Account, Person, Transaction, OperationDTO, OperationType, OperationResult, \
+    OperationStatus
+from src.services.ports.cache_interface import AccountStatusCache
+from src.services.ports.db_interface import DBInterface
+
+_CENTS = Decimal('0.01')
+_ZERO = Decimal('0.00')
+
+
+def _money(amount) -> Decimal:
+    # What a DECIMAL(10, 2) column keeps of an amount: balances add up in cents, with no float drift, and come out
+    # as the Decimal the SQL services return
+    return Decimal(str(amount)).quantize(_CENTS, rounding=ROUND_HALF_UP)
+
+
+class _AccountRecord:
+    __slots__ = ('account', 'password', 'lock', 'transaction_keys', 'transactions', 'withdrawn', 'last_id')
+
+    def __init__(self, account: Account, password: str):
+        self.account = account
+        self.password = password
+        self.lock = RLock()
+        # Both sorted by (data_transacao, id_transacao): new transactions are dated today and get the highest id,
+        # so they are appended, and a statement is a bisect on the date plus a slice
+        self.transaction_keys: list[tuple[date, int]] = []
+        self.transactions: list[Transaction] = []
+        self.withdrawn: dict[date, Decimal] = {}
+        self.last_id: Optional[int] = None
+
+    def add_transaction(self, transaction: Transaction):
+        key = (transaction.data_transacao, transaction.id_transacao)
+        if not self.transaction_keys or key > self.transaction_keys[-1]:
+            self.transaction_keys.append(key)
+            self.transactions.append(transaction)
+        else:
+            index = bisect_left(self.transaction_keys, key)
+            self.transaction_keys.insert(index, key)
+            self.transactions.insert(index, transaction)
+        if transaction.valor < 0:
+            day = transaction.data_transacao
+            self.withdrawn[day] = self.withdrawn.get(day, _ZERO) - _money(transaction.valor)
+        if self.last_id is None or transaction.id_transacao > self.last_id:
+            self.last_id = transaction.id_transacao
+
+    def statement(self, days: int, after_id: Optional[int]) -> List[Transaction]:
+        # Same window as the SQL services, which compare the DATE column with now() - days: that day is only
+        # included when now() - days falls exactly at midnight
+        since = datetime.now() - timedelta(days=days)
+        first_day = since.date() if since.time() == time() else since.date() + timedelta(days=1)
+        transactions = self.transactions[bisect_left(self.transaction_keys, (first_day,)):]
+        if after_id is not None:
+            transactions = [transaction for transaction in transactions if transaction.id_transacao > after_id]
+        # Already in id order unless older days were loaded after newer ones
+        transactions.sort(key=lambda transaction: transaction.id_transacao)
+        return transactions
+
+
+class InMemoryDBService(DBInterface):
+    # A DBInterface kept in process memory, for load tests, edge nodes and as a reference to check the SQL services
+    # against. The account map is guarded by one lock and every account by its own, so operations on different
+    # accounts don't wait for each other. Entities are copied in and out, callers never share the stored ones.
+    def __init__(self, account_status_cache: Optional[AccountStatusCache] = None):
+        self.account_status_cache = account_status_cache
+        self._lock = Lock()
+        self._accounts: dict[int, _AccountRecord] = {}
+        self._people: dict[int, Person] = {}
+        self._account_ids = count(1)
+        self._person_ids = count(1)
+        self._transaction_ids = count(1)
+
+    def _record(self, account_id: int) -> Optional[_AccountRecord]:
+        return self._accounts.get(account_id)
+
+    def _next_transaction_id(self) -> int:
+        with self._lock:
+            return next(self._transaction_ids)
+
+    def _new_transaction(self, record: _AccountRecord, amount: Decimal, day: date) -> Transaction:
+        transaction = Transaction(id_transacao=self._next_transaction_id(), id_conta=record.account.id_conta,
+                                  valor=float(amount), data_transacao=day)
+        record.add_transaction(transaction)
+        return replace(transaction)
+
+    @staticmethod
+    def _bump(counter: count, used_id: int) -> count:
+        # Keeps generated ids above the explicit ones, like an AUTO_INCREMENT column
+        next_id = next(counter)
+        return count(max(next_id, used_id + 1))
+
+    def create_new_account(self, new_account: Account, password: str):
+        with self._lock:
+            account_id = new_account.id_conta
+            if account_id is None:
+                account_id = next(self._account_ids)
+            elif account_id in self._accounts:
+                raise DatabaseWritingException(f'Account {account_id} already exists.')
+            else:
+                self._account_ids = self._bump(self._account_ids, account_id)
+            account = replace(new_account, id_conta=account_id, saldo=_money(new_account.saldo),
+                              limite_saque_diario=_money(new_account.limite_saque_diario))
+            self._accounts[account_id] = _AccountRecord(account, password)
+
+    def create_new_person(self, new_person: Person):
+        with self._lock:
+            person_id = new_person.id_pessoa
+            if person_id is None:
+                person_id = next(self._person_ids)
+            elif person_id in self._people:
+                raise DatabaseWritingException(f'Person {person_id} already exists.')
+            else:
+                self._person_ids = self._bump(self._person_ids, person_id)
+            self._people[person_id] = replace(new_person, id_pessoa=person_id)
+
+    def add_transactions(self, transactions: Iterable[Transaction]):
+        # Bulk loads an existing history (any dates, ids kept when given). Balances are left as they are, as
+        # they would be after importing the transacao table
+        for transaction in transactions:
+            record = self._record(transaction.id_conta)
+            if record is None:
+                raise DatabaseWritingException(f'Account {transaction.id_conta} not found.')
+            transaction = replace(transaction, valor=float(_money(transaction.valor)))
+            with self._lock:
+                if transaction.id_transacao is None:
+                    transaction.id_transacao = next(self._transaction_ids)
+                else:
+                    self._transaction_ids = self._bump(self._transaction_ids, transaction.id_transacao)
+            with record.lock:
+                record.add_transaction(transaction)
+
+    def deposit_into_account(self, account_id: int, amount: float):
+        record = self._record(account_id)
+        if record is not None:
+            with record.lock:
+                record.account.saldo += _money(abs(amount))
+
+    def get_balance(self, account_id: int) -> Union[float, None]:
+        record = self._record(account_id)
+        return record.account.saldo if record is not None else None
+
+    def get_account_version(self, account_id: int) -> Tuple[float, Optional[int]] | None:
+        record = self._record(account_id)
+        if record is None:
+            return None
+        with record.lock:
+            return float(record.account.saldo), record.last_id
+
+    def withdraw_from_account(self, account_id: int, amount: float):
+        record = self._record(account_id)
+        if record is not None:
+            with record.lock:
+                record.account.saldo -= _money(abs(amount))
+
+    def change_account_active_status(self, account_id: int, active: bool):
+        record = self._record(account_id)
+        if record is not None:
+            with record.lock:
+                record.account.flag_ativo = active
+            if self.account_status_cache is not None:
+                self.account_status_cache.invalidate(account_id)
+
+    def update_account_password(self, account_id: int, password_hash: str,
+                                expected_hash: Optional[str] = None) -> bool:
+        record = self._record(account_id)
+        if record is None:
+            return False
+        with record.lock:
+            if expected_hash is not None and record.password != expected_hash:
+                return False
+            record.password = password_hash
+            return True
+
+    def get_extract_from_account(self, account_id: int, days: int = 30, after_id: Optional[int] = None,
+                                 limit: Optional[int] = None) -> List[Transaction]:
+        record = self._record(account_id)
+        if record is None:
+            return []
+        with record.lock:
+            transactions = record.statement(days, after_id)
+        return [replace(transaction) for transaction in transactions[:limit]]
+
+    def iter_extract_from_account(self, account_id: int, days: int = 30,
+                                  after_id: Optional[int] = None) -> Iterator[Transaction]:
+        # The statement is taken when iteration starts, like a cursor opened in its own transaction
+        for transaction in self.get_extract_from_account(account_id, days, after_id):
+            yield transaction
+
+    def make_transaction(self, account_id: int, amount: float) -> Transaction:
+        record = self._record(account_id)
+        if record is None:
+            raise DatabaseWritingException(f'Account {account_id} not found.')
+        with record.lock:
+            return self._new_transaction(record, _money(amount), datetime.now().date())
+
+    def post_operation(self, operation: OperationDTO) -> Tuple[Transaction, float] | Tuple[None, None]:
+        record = self._record(operation.account_id)
+        if record is None:
+            return None, None
+        amount = _money(abs(operation.amount))
+        if operation.operation_type == OperationType.Withdrawal:
+            amount = -amount
+        with record.lock:
+            record.account.saldo += amount
+            return self._new_transaction(record, amount, datetime.now().date()), float(record.account.saldo)
+
+    def check_account_active(self, account_id: int) -> Optional[bool]:
+        record = self._record(account_id)
+        return record.account.flag_ativo if record is not None else None
+
+    def reached_withdrawal_limit(self, account_id: int, withdrawal_amount: float) -> bool:
+        record = self._record(account_id)
+        if record is None:
+            return True
+        with record.lock:
+            withdrawn = record.withdrawn.get(datetime.now().date(), _ZERO)
+            return withdrawn + _money(withdrawal_amount) > record.account.limite_saque_diario
+
+    def execute_withdrawal(self, account_id: int, amount: float) -> OperationResult:
+        record = self._record(account_id)
+        if record is None:
+            return OperationResult(status=OperationStatus.NotFound)
+        amount = _money(abs(amount))
+        today = datetime.now().date()
+        with record.lock:
+            account = record.account
+            if not account.flag_ativo:
+                return OperationResult(status=OperationStatus.Blocked)
+            if record.withdrawn.get(today, _ZERO) + amount > account.limite_saque_diario:
+                return OperationResult(status=OperationStatus.LimitReached, balance=float(account.saldo))
+            account.saldo -= amount
+            return OperationResult(status=OperationStatus.Ok, transaction=self._new_transaction(record, -amount, today),
+                                   balance=float(account.saldo))
+
+    def apply_operations(self, operations: List[OperationDTO]) -> List[OperationResult]:
+        today = datetime.now().date()
+        records = {account_id: self._record(account_id)
+                   for account_id in sorted({operation.account_id for operation in operations})}
+        with ExitStack() as locks:
+            # Locking in id order keeps two batches touching the same accounts from deadlocking
+            for record in records.values():
+                if record is not None:
+                    locks.enter_context(record.lock)
+
+            # Every result is decided before anything is written, so the batch is applied as a whole
+            results = []
+            accepted = []
+            balances = {}
+            withdrawn = {}
+            for operation in operations:
+                record = records[operation.account_id]
+                if record is None:
+                    results.append(OperationResult(status=OperationStatus.NotFound))
+                    continue
+                account = record.account
+                balance = balances.get(account.id_conta, account.saldo)
+                if not account.flag_ativo:
+                    results.append(OperationResult(status=OperationStatus.Blocked))
+                    continue
+                if operation.amount == 0:
+                    results.append(OperationResult(status=OperationStatus.Invalid, balance=float(balance)))
+                    continue
+                amount = _money(abs(operation.amount))
+                if operation.operation_type == OperationType.Withdrawal:
+                    withdrawn_today = withdrawn.get(account.id_conta, record.withdrawn.get(today, _ZERO))
+                    if withdrawn_today + amount > account.limite_saque_diario:
+                        results.append(OperationResult(status=OperationStatus.LimitReached, balance=float(balance)))
+                        continue
+                    withdrawn[account.id_conta] = withdrawn_today + amount
+                    amount = -amount
+                balances[account.id_conta] = balance + amount
+                result = OperationResult(status=OperationStatus.Ok, balance=float(balance + amount))
+                results.append(result)
+                accepted.append((result, record, amount))
+
+            for result, record, amount in accepted:
+                result.transaction = self._new_transaction(record, amount, today)
+            for account_id, balance in balances.items():
+                records[account_id].account.saldo = balance
+        return results
+
+    def get_account(self, account_id: int) -> Tuple[Account, str] | Tuple[None, None]:
+        record = self._record(account_id)
+        if record is None:
+            return None, None
+        with record.lock:
+            account = record.account
+            return replace(account, saldo=float(account.saldo),
+                           limite_saque_diario=float(account.limite_saque_diario)), record.password
+
+    def snapshot(self, path: str):
+        # Every account lock is taken (in id order) and held until all of them are copied, so the snapshot is
+        # consistent across accounts: meanwhile every write and get_account waits, for a time that grows with the
+        # number of accounts and transactions. The JSON is written after the locks are released, next to the target
+        # and renamed over it, so a crash never leaves a truncated snapshot.
+        with self._lock:
+            people = [person.to_dict() for person in self._people.values()]
+            records = sorted(self._accounts.items())
+        with ExitStack() as locks:
+            for _, record in records:
+                locks.enter_context(record.lock)
+            accounts = [dict(record.account.to_dict(), saldo=float(record.account.saldo),
+                             limite_saque_diario=float(record.account.limite_saque_diario), senha=record.password)
+                        for _, record in records]
+            transactions = [[transaction.id_transacao, transaction.id_conta, transaction.valor,
+                             transaction.data_transacao.isoformat()]
+                            for _, record in records for transaction in record.transactions]
+        directory = os.path.dirname(os.path.abspath(path))
+        with tempfile.NamedTemporaryFile('w', dir=directory, delete=False, suffix='.tmp') as file:
+            json.dump({'version': 1, 'people': people, 'accounts': accounts, 'transactions': transactions}, file)
+        os.replace(file.name, path)
+
+    @classmethod
+    def from_snapshot(cls, path: str, account_status_cache: Optional[AccountStatusCache] = None) -> 'InMemoryDBService':
+        with open(path) as file:
+            data = json.load(file)
+        service = cls(account_status_cache)
+        for person in data['people']:
+            service.create_new_person(Person.from_dict(person))
+        for account in data['accounts']:
+            service.create_new_account(Account.from_dict(account), account['senha'])
+        service.add_transactions(Transaction(id_transacao=row[0], id_conta=row[1], valor=row[2],
+                                             data_transacao=date.fromisoformat(row[3]))
+                                 for row in data['transactions'])
+        return service
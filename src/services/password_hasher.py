@@ -0,0 +1,81 @@
+import multiprocessing
+import os
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Callable, Optional
+
+import bcrypt
+
+from src.exceptions import HasherBusyException
+
+
+def _hash_password(password: bytes, rounds: int) -> bytes:
+    return bcrypt.hashpw(password, bcrypt.gensalt(rounds=rounds))
+
+
+def _check_password(password: bytes, password_hash: bytes) -> bool:
+    return bcrypt.checkpw(password, password_hash)
+
+
+class PasswordHasher:
+    # bcrypt runs in a fixed pool of worker processes, so a burst of logins can't take more than `workers` cores
+    # away from the threads serving the other routes. At most max_pending calls are queued or running at once; past
+    # that HasherBusyException is raised straight away instead of waiting. workers=0 hashes in the calling thread.
+    def __init__(self, rounds: int = 12, workers: int = 1, max_pending: int = 32, timeout: Optional[float] = None):
+        self.rounds = rounds
+        self.workers = workers
+        self.timeout = timeout
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._lock = threading.Lock()
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._executor_pid: Optional[int] = None
+
+    def hash(self, password: str) -> str:
+        return self._run(_hash_password, password.encode('utf-8'), self.rounds).decode('utf-8')
+
+    def check(self, password_hash: str, password: str) -> bool:
+        return self._run(_check_password, password.encode('utf-8'), password_hash.encode('utf-8'))
+
+    def needs_rehash(self, password_hash: str) -> bool:
+        # $2b$<rounds>$<salt and hash>
+        try:
+            return int(password_hash.split('$')[2]) != self.rounds
+        except (IndexError, ValueError):
+            return True
+
+    def shutdown(self):
+        with self._lock:
+            if self._executor is not None and self._executor_pid == os.getpid():
+                self._executor.shutdown(cancel_futures=True)
+            self._executor = self._executor_pid = None
+
+    def _run(self, function: Callable, *args):
+        if not self._slots.acquire(blocking=False):
+            raise HasherBusyException('Too many password hashing requests in progress.')
+        if not self.workers:
+            try:
+                return function(*args)
+            finally:
+                self._slots.release()
+
+        try:
+            future = self._get_executor().submit(function, *args)
+        except BaseException:
+            self._slots.release()
+            raise
+        # the slot is only given back once the pool is done with the call, even if the caller stopped waiting
+        future.add_done_callback(self._release_slot)
+        return future.result(timeout=self.timeout)
+
+    def _release_slot(self, _: Future):
+        self._slots.release()
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        # Created on first use in each process: gunicorn forks its workers from a preloaded master, and a pool
+        # inherited through fork would point at the master's processes
+        with self._lock:
+            if self._executor is None or self._executor_pid != os.getpid():
+                self._executor = ProcessPoolExecutor(max_workers=self.workers,
+                                                     mp_context=multiprocessing.get_context('forkserver'))
+                self._executor_pid = os.getpid()
+            return self._executor
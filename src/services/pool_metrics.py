@@ -0,0 +1,53 @@
+import time
+from threading import Lock
+
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import QueuePool
+
+
+class PoolMetrics:
+    def __init__(self):
+        self.checkouts = 0
+        self.checkout_timeouts = 0
+        self.checkout_wait_seconds_total = 0.0
+        self.checkout_wait_seconds_max = 0.0
+        self._lock = Lock()
+
+    def observe_checkout(self, wait_seconds: float, timed_out: bool = False):
+        with self._lock:
+            self.checkouts += 1
+            self.checkout_timeouts += timed_out
+            self.checkout_wait_seconds_total += wait_seconds
+            self.checkout_wait_seconds_max = max(self.checkout_wait_seconds_max, wait_seconds)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return dict(
+                checkouts=self.checkouts,
+                checkout_timeouts=self.checkout_timeouts,
+                checkout_wait_seconds_total=self.checkout_wait_seconds_total,
+                checkout_wait_seconds_max=self.checkout_wait_seconds_max
+            )
+
+
+class InstrumentedQueuePool(QueuePool):
+    # QueuePool that records how long each checkout waited for a connection, including the time
+    # spent opening a new one when the pool has to grow.
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.metrics = PoolMetrics()
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except PoolTimeoutError:
+            self.metrics.observe_checkout(time.perf_counter() - start, timed_out=True)
+            raise
+        self.metrics.observe_checkout(time.perf_counter() - start)
+        return connection
+
+    def recreate(self) -> "InstrumentedQueuePool":
+        pool = super().recreate()
+        pool.metrics = self.metrics
+        return pool
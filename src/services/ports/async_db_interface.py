@@ -0,0 +1,24 @@
+from abc import ABC, abstractmethod
+from typing import Union, List, Optional, Tuple
+
+from src.models.entities import Transaction
+
+
+class AsyncDBInterface(ABC):
+    # The DBInterface reads served by the ASGI app (src/asgi_app.py), with the same arguments and results
+    @abstractmethod
+    async def check_account_active(self, account_id: int) -> Optional[bool]:
+        raise NotImplementedError
+
+    @abstractmethod
+    async def get_balance(self, account_id: int) -> Union[float, None]:
+        raise NotImplementedError
+
+    @abstractmethod
+    async def get_account_version(self, account_id: int) -> Tuple[float, Optional[int]] | None:
+        raise NotImplementedError
+
+    @abstractmethod
+    async def get_extract_from_account(self, account_id: int, days: int = 30, after_id: Optional[int] = None,
+                                       limit: Optional[int] = None) -> List[Transaction]:
+        raise NotImplementedError
@@ -0,0 +1,20 @@
+from abc import ABC, abstractmethod
+from typing import Optional
+
+
+class AccountStatusCache(ABC):
+    @abstractmethod
+    def get(self, account_id: int) -> Optional[bool]:
+        raise NotImplementedError
+
+    @abstractmethod
+    def set(self, account_id: int, active: bool):
+        raise NotImplementedError
+
+    @abstractmethod
+    def invalidate(self, account_id: int):
+        raise NotImplementedError
+
+    @abstractmethod
+    def stats(self) -> dict:
+        raise NotImplementedError
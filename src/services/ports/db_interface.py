@@ -1,7 +1,7 @@
 from abc import ABC, abstractmethod
-from typing import Union, List, Optional
+from typing import Union, List, Optional, Tuple, Iterator
 
-from src.models.entities import Account, Person, Transaction
+from src.models.entities import Account, Person, Transaction, OperationDTO, OperationResult
 
 
 class DBInterface(ABC):
@@ -21,6 +21,10 @@ class DBInterface(ABC):
     def get_balance(self, account_id: int) -> Union[float, None]:
         raise NotImplementedError
 
+    @abstractmethod
+    def get_account_version(self, account_id: int) -> Tuple[float, Optional[int]] | None:
+        raise NotImplementedError
+
     @abstractmethod
     def withdraw_from_account(self, account_id: int, amount: float):
         raise NotImplementedError
@@ -30,13 +34,23 @@ class DBInterface(ABC):
         raise NotImplementedError
 
     @abstractmethod
-    def get_extract_from_account(self, account_id: int, days: int = 30) -> List[Transaction]:
+    def get_extract_from_account(self, account_id: int, days: int = 30, after_id: Optional[int] = None,
+                                 limit: Optional[int] = None) -> List[Transaction]:
+        raise NotImplementedError
+
+    @abstractmethod
+    def iter_extract_from_account(self, account_id: int, days: int = 30,
+                                  after_id: Optional[int] = None) -> Iterator[Transaction]:
         raise NotImplementedError
 
     @abstractmethod
     def make_transaction(self, account_id: int, amount: float) -> Transaction:
         raise NotImplementedError
 
+    @abstractmethod
+    def post_operation(self, operation: OperationDTO) -> Tuple[Transaction, float] | Tuple[None, None]:
+        raise NotImplementedError
+
     @abstractmethod
     def check_account_active(self, account_id: int) -> bool:
         raise NotImplementedError
@@ -45,6 +59,20 @@ class DBInterface(ABC):
     def reached_withdrawal_limit(self, account_id: int, withdrawal_amount: float) -> bool:
         raise NotImplementedError
 
+    @abstractmethod
+    def execute_withdrawal(self, account_id: int, amount: float) -> OperationResult:
+        raise NotImplementedError
+
+    @abstractmethod
+    def apply_operations(self, operations: List[OperationDTO]) -> List[OperationResult]:
+        raise NotImplementedError
+
     @abstractmethod
     def get_account(self, account_id: int) -> Optional[Account]:
         raise NotImplementedError
+
+    @abstractmethod
+    def update_account_password(self, account_id: int, password_hash: str,
+                                expected_hash: Optional[str] = None) -> bool:
+        # With expected_hash, the password is only replaced if it wasn't changed since expected_hash was read
+        raise NotImplementedError
@@ -0,0 +1,182 @@
+import fcntl
+import mmap
+import struct
+import tempfile
+import threading
+import time
+from collections import namedtuple
+from contextlib import contextmanager
+from decimal import Decimal
+from typing import Callable, Optional, Tuple, Union
+
+_Slot = namedtuple('_Slot', 'seq account_id flags active_expires balance_expires balance_cents balance '
+                           'version_expires version_balance last_transaction_id')
+_SLOT = struct.Struct('<QqBddqdddq')
+_SEQ = struct.Struct('<Q')
+# rounded up to whole cache lines, so writers of neighbouring slots don't invalidate each other's lines
+_SLOT_SIZE = (_SLOT.size + 63) // 64 * 64
+_EMPTY_SLOT = _Slot(0, 0, 0, 0.0, 0.0, 0, 0.0, 0.0, 0.0, 0)
+
+_HAS_ACTIVE, _ACTIVE, _HAS_BALANCE, _DECIMAL_BALANCE, _HAS_VERSION, _HAS_LAST_TRANSACTION = 1, 2, 4, 8, 16, 32
+_READ_ATTEMPTS = 100
+_THREAD_LOCKS = 64
+
+Balance = Union[float, Decimal]
+Version = Tuple[float, Optional[int]]
+
+
+class SharedAccountCache:
+    # The results of check_account_active, get_balance and get_account_version, in fixed-size slots of an anonymous
+    # shared mapping: gunicorn workers forked from the process that created it (preload_app) all read and write the
+    # same slots. An account lives in slot id_conta % slots and replaces whatever account was there. get_account is
+    # left out on purpose: it carries the password hash, which has no business in memory every worker can read, and
+    # only login calls it, where bcrypt costs far more than the query.
+    #
+    # Readers take no lock. Every slot starts with a sequence number that is odd while a writer is inside it, and a
+    # read is retried when the number changed while the slot was being copied. Writers are serialized across
+    # processes by an fcntl lock on the slot's byte of a shared file, and across threads by a striped lock.
+    #
+    # Each write moves the sequence number, so get_* returns it as the version to pass to the matching set_*: the
+    # value read from the database in between is only stored if nothing was written to the slot meanwhile.
+    def __init__(self, slots: int, ttl: float, clock: Callable[[], float] = time.monotonic):
+        self.slots = slots
+        self.ttl = ttl
+        # CLOCK_MONOTONIC is system-wide, so the expiry times mean the same in every worker
+        self.clock = clock
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self._memory = mmap.mmap(-1, slots * _SLOT_SIZE)
+        self._lock_file = tempfile.TemporaryFile()
+        self._thread_locks = [threading.Lock() for _ in range(_THREAD_LOCKS)]
+        self._stats_lock = threading.Lock()
+
+    def get_active(self, account_id: int) -> Tuple[Optional[bool], Optional[int]]:
+        slot, version = self._lookup(account_id, _HAS_ACTIVE, 'active_expires')
+        return (bool(slot.flags & _ACTIVE) if slot is not None else None), version
+
+    def set_active(self, account_id: int, active: Optional[bool], version: Optional[int]):
+        if active is None:
+            return
+        self._update(account_id, version, _HAS_ACTIVE | _ACTIVE, _HAS_ACTIVE | (_ACTIVE if active else 0),
+                     active_expires=self.clock() + self.ttl)
+
+    def get_balance(self, account_id: int) -> Tuple[Optional[Balance], Optional[int]]:
+        slot, version = self._lookup(account_id, _HAS_BALANCE, 'balance_expires')
+        if slot is None:
+            return None, version
+        if slot.flags & _DECIMAL_BALANCE:
+            return Decimal(slot.balance_cents).scaleb(-2), version
+        return slot.balance, version
+
+    def set_balance(self, account_id: int, balance: Optional[Balance], version: Optional[int]):
+        if balance is None:
+            return
+        if isinstance(balance, Decimal):
+            # DECIMAL(10,2) balances are kept as cents, so they come back exactly as the driver returned them
+            cents = int(balance.scaleb(2))
+            if Decimal(cents).scaleb(-2) != balance:
+                return
+            self._update(account_id, version, _HAS_BALANCE | _DECIMAL_BALANCE, _HAS_BALANCE | _DECIMAL_BALANCE,
+                         balance_cents=cents, balance_expires=self.clock() + self.ttl)
+        else:
+            self._update(account_id, version, _HAS_BALANCE | _DECIMAL_BALANCE, _HAS_BALANCE,
+                         balance=float(balance), balance_expires=self.clock() + self.ttl)
+
+    def get_version(self, account_id: int) -> Tuple[Optional[Version], Optional[int]]:
+        slot, version = self._lookup(account_id, _HAS_VERSION, 'version_expires')
+        if slot is None:
+            return None, version
+        last_transaction_id = slot.last_transaction_id if slot.flags & _HAS_LAST_TRANSACTION else None
+        return (slot.version_balance, last_transaction_id), version
+
+    def set_version(self, account_id: int, account_version: Optional[Version], version: Optional[int]):
+        if account_version is None:
+            return
+        balance, last_transaction_id = account_version
+        self._update(account_id, version, _HAS_VERSION | _HAS_LAST_TRANSACTION,
+                     _HAS_VERSION | (_HAS_LAST_TRANSACTION if last_transaction_id is not None else 0),
+                     version_balance=float(balance), last_transaction_id=last_transaction_id or 0,
+                     version_expires=self.clock() + self.ttl)
+
+    def invalidate(self, account_id: int):
+        with self._writing(account_id) as offset:
+            slot = self._slot(offset)
+            # The sequence number moves even when the slot holds another account: a reader that missed on this
+            # account before the write must not be able to store what it read afterwards
+            self._write(offset, slot._replace(flags=0) if slot.account_id == account_id else slot)
+        self._count('invalidations')
+
+    def stats(self) -> dict:
+        with self._stats_lock:
+            return dict(
+                slots=self.slots,
+                hits=self.hits,
+                misses=self.misses,
+                evictions=self.evictions,
+                invalidations=self.invalidations
+            )
+
+    def _lookup(self, account_id: int, flag: int, expires: str) -> Tuple[Optional[_Slot], Optional[int]]:
+        slot = self._read(account_id)
+        if slot is None:
+            # a writer held the slot for every attempt: a miss, with no version to store the result under
+            self._count('misses')
+            return None, None
+        if slot.account_id != account_id or not slot.flags & flag or getattr(slot, expires) <= self.clock():
+            self._count('misses')
+            return None, slot.seq
+        self._count('hits')
+        return slot, slot.seq
+
+    def _read(self, account_id: int) -> Optional[_Slot]:
+        offset = self._offset(account_id)
+        for _ in range(_READ_ATTEMPTS):
+            seq = _SEQ.unpack_from(self._memory, offset)[0]
+            if seq & 1:
+                continue
+            slot = self._slot(offset)
+            if _SEQ.unpack_from(self._memory, offset)[0] == seq == slot.seq:
+                return slot
+        return None
+
+    def _update(self, account_id: int, version: Optional[int], flags_mask: int, flags: int, **fields):
+        if version is None:
+            return
+        with self._writing(account_id) as offset:
+            slot = self._slot(offset)
+            if slot.seq != version:
+                return
+            if slot.account_id != account_id:
+                if slot.flags:
+                    self._count('evictions')
+                slot = _EMPTY_SLOT._replace(account_id=account_id)
+            self._write(offset, slot._replace(flags=slot.flags & ~flags_mask | flags, **fields))
+
+    def _write(self, offset: int, slot: _Slot):
+        # a slot left odd by a writer that died inside it stays odd until the next write completes
+        seq = slot.seq + 1 if not slot.seq & 1 else slot.seq + 2
+        _SEQ.pack_into(self._memory, offset, seq)
+        _SLOT.pack_into(self._memory, offset, *slot._replace(seq=seq))
+        _SEQ.pack_into(self._memory, offset, seq + 1)
+
+    @contextmanager
+    def _writing(self, account_id: int):
+        index = account_id % self.slots
+        with self._thread_locks[index % _THREAD_LOCKS]:
+            fcntl.lockf(self._lock_file, fcntl.LOCK_EX, 1, index)
+            try:
+                yield index * _SLOT_SIZE
+            finally:
+                fcntl.lockf(self._lock_file, fcntl.LOCK_UN, 1, index)
+
+    def _slot(self, offset: int) -> _Slot:
+        return _Slot._make(_SLOT.unpack_from(self._memory, offset))
+
+    def _offset(self, account_id: int) -> int:
+        return account_id % self.slots * _SLOT_SIZE
+
+    def _count(self, counter: str):
+        with self._stats_lock:
+            setattr(self, counter, getattr(self, counter) + 1)
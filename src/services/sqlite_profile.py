@@ -0,0 +1,54 @@
+from sqlalchemy import Engine, event
+from sqlalchemy.engine import make_url
+
+SYNCHRONOUS_MODES = ('OFF', 'NORMAL', 'FULL', 'EXTRA')
+BEGIN_MODES = ('DEFERRED', 'IMMEDIATE')
+
+
+def is_sqlite(db_url: str) -> bool:
+    return make_url(db_url).get_backend_name() == 'sqlite'
+
+
+def is_sqlite_memory(db_url: str) -> bool:
+    url = make_url(db_url)
+    return url.database in (None, '', ':memory:') or url.query.get('mode') == 'memory'
+
+
+def sqlite_engine_options(db_url: str, pool_options: dict) -> dict:
+    # Flask-SQLAlchemy gives in-memory databases a StaticPool (one connection shared by every thread, otherwise
+    # each one would see its own empty database), which takes none of the queue pool settings
+    if is_sqlite_memory(db_url):
+        return dict(pool_pre_ping=pool_options.get('pool_pre_ping', False))
+    return dict(pool_options)
+
+
+def install_sqlite_profile(engine: Engine, busy_timeout_ms: int, mmap_size: int, synchronous: str = 'NORMAL',
+                           begin: str = 'IMMEDIATE'):
+    synchronous, begin = synchronous.upper(), begin.upper()
+    if synchronous not in SYNCHRONOUS_MODES:
+        raise ValueError(f'synchronous must be one of {", ".join(SYNCHRONOUS_MODES)}, not {synchronous!r}')
+    if begin not in BEGIN_MODES:
+        raise ValueError(f'begin must be one of {", ".join(BEGIN_MODES)}, not {begin!r}')
+
+    @event.listens_for(engine, 'connect')
+    def set_pragmas(dbapi_connection, connection_record):
+        # pysqlite only opens a transaction right before an INSERT/UPDATE/DELETE, so the account reads that the
+        # service locks with FOR UPDATE elsewhere would run outside of it. Transactions are begun below instead.
+        dbapi_connection.isolation_level = None
+        cursor = dbapi_connection.cursor()
+        try:
+            # WAL lets readers run next to the single writer, and with it synchronous=NORMAL only syncs at
+            # checkpoints: a power loss can drop the latest commits but never corrupts the database
+            cursor.execute(f'PRAGMA busy_timeout = {int(busy_timeout_ms)}')
+            cursor.execute('PRAGMA journal_mode = WAL')
+            cursor.execute(f'PRAGMA synchronous = {synchronous}')
+            cursor.execute(f'PRAGMA mmap_size = {int(mmap_size)}')
+        finally:
+            cursor.close()
+
+    @event.listens_for(engine, 'begin')
+    def begin_transaction(connection):
+        # IMMEDIATE takes the write lock up front, which is what makes read-then-write operations (withdrawals,
+        # batches) safe, and waits up to busy_timeout for it. A DEFERRED transaction that reads and then writes
+        # fails with "database is locked" when another writer got in between.
+        connection.exec_driver_sql(f'BEGIN {begin}')
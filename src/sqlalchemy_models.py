@@ -2,6 +2,10 @@ from src.config import db
 
 
 class Conta(db.Model):
+    __table_args__ = (
+        db.Index('ix_conta_id_pessoa', 'id_pessoa'),
+    )
+
     id_conta = db.Column(db.Integer, primary_key=True, nullable=False)
     id_pessoa = db.Column(db.Integer, nullable=False)
     senha = db.Column(db.Text, nullable=False)
@@ -13,6 +17,15 @@ class Conta(db.Model):
 
 
 class Transacao(db.Model):
+    # Covers the statement window (id_conta, data_transacao) and the daily withdrawal totals (valor < 0).
+    # (id_conta, id_transacao) serves the keyset-paginated statement pages, and (data_transacao, ...) the rebuild
+    # of the daily withdrawal counters.
+    __table_args__ = (
+        db.Index('ix_transacao_id_conta_data_transacao', 'id_conta', 'data_transacao', 'valor'),
+        db.Index('ix_transacao_id_conta_id_transacao', 'id_conta', 'id_transacao'),
+        db.Index('ix_transacao_data_transacao', 'data_transacao', 'id_conta', 'valor'),
+    )
+
     id_transacao = db.Column(db.Integer, primary_key=True, autoincrement=True, nullable=False)
     id_conta = db.Column(db.Integer, nullable=False)
     valor = db.Column(db.DECIMAL(10, 2), nullable=False)
@@ -24,3 +37,13 @@ class Pessoa(db.Model):
     nome = db.Column(db.Text(), nullable=False)
     cpf = db.Column(db.String(11), nullable=False)
     data_nascimento = db.Column(db.Date, nullable=False)
+
+
+class SaqueDiario(db.Model):
+    __table_args__ = (
+        db.Index('ix_saque_diario_data_saque', 'data_saque'),
+    )
+
+    id_conta = db.Column(db.Integer, primary_key=True, autoincrement=False, nullable=False)
+    data_saque = db.Column(db.Date, primary_key=True, nullable=False)
+    valor_sacado = db.Column(db.DECIMAL(10, 2), nullable=False, default=0.0)
@@ -1,6 +1,9 @@
 import os
-from src import *
-from src.app import app
 
 if os.environ.get("ENVIRONMENT") == "dev":
+    from src import *
+    from src.app import app
+
     app.run(host='0.0.0.0', port=5000, debug=True)
+else:
+    os.execvp('gunicorn', ['gunicorn', '--config', 'gunicorn_conf.py', 'src.app:app'])
@@ -1,4 +1,5 @@
 from datetime import datetime
+from decimal import Decimal
 
 import pytest
 import unittest
@@ -272,6 +273,14 @@ class TestEntities(unittest.TestCase):
         }
         self.assertRaises(InvalidOperationException, entities.OperationDTO.from_dict, operation_dict)
 
+        for amount in (0, -0.0, 'nan', 'inf'):
+            operation_dict = {
+                "account_id": 1,
+                "amount": amount,
+                "operation_type": "Deposit"
+            }
+            self.assertRaises(InvalidOperationException, entities.OperationDTO.from_dict, operation_dict)
+
     def test_account_status_dto_from_dict(self):
         account_status_dict = {
             "account_id": 1,
@@ -296,3 +305,43 @@ class TestEntities(unittest.TestCase):
             "account_active": True
         }
         self.assertRaises(ValueError, entities.AccountStatusDTO.from_dict, account_status_dict)
+
+    def test_operation_result_to_dict(self):
+        transaction = entities.Transaction.from_dict({
+            "id_transacao": 1,
+            "id_conta": 1,
+            "valor": -10.0,
+            "data_transacao": "2023-12-12"
+        })
+        result = entities.OperationResult(status=entities.OperationStatus.Ok, transaction=transaction, balance=90.0)
+        self.assertDictEqual(result.to_dict(), {
+            "status": "Ok",
+            "transaction": transaction.to_dict(),
+            "balance": 90.0
+        })
+
+        result = entities.OperationResult(status=entities.OperationStatus.NotFound)
+        self.assertDictEqual(result.to_dict(), {
+            "status": "NotFound",
+            "transaction": None,
+            "balance": None
+        })
+
+    def test_from_row(self):
+        creation_date = datetime.strptime("2022-06-18", '%Y-%m-%d').date()
+        account = entities.Account.from_row((1, 2, Decimal('100.50'), Decimal('1000'), 1, 2, creation_date, 'hash'))
+        self.assertEqual(account, entities.Account(1, 2, 100.5, 1000.0, True, AccountType.Savings, creation_date))
+        self.assertIs(type(account.saldo), float)
+
+        transaction = entities.Transaction.from_row((3, 1, Decimal('-10.25'), creation_date))
+        self.assertEqual(transaction, entities.Transaction(3, 1, -10.25, creation_date))
+        self.assertEqual(transaction.to_dict()['data_transacao'], "2022-06-18")
+
+        person = entities.Person.from_row((1, "Fulano da Silva", "00000000000", creation_date))
+        self.assertEqual(person, entities.Person(1, "Fulano da Silva", "00000000000", creation_date))
+
+    def test_entities_are_slotted(self):
+        transaction = entities.Transaction(1, 1, 10.0, datetime.now().date())
+        self.assertFalse(hasattr(transaction, '__dict__'))
+        with self.assertRaises(AttributeError):
+            transaction.valr = 20.0
@@ -0,0 +1,86 @@
+import unittest
+
+from flask import Flask, jsonify
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import OperationalError
+
+from src.observability.metrics import MetricsRegistry, install_metrics
+
+
+class TestMetricsRegistry(unittest.TestCase):
+    def setUp(self):
+        self.registry = MetricsRegistry(namespace='test')
+
+    def test_counter(self):
+        counter = self.registry.counter('requests_total', 'Requests.', ('endpoint',))
+        counter.inc('acc_balance')
+        counter.inc('acc_balance', amount=2)
+
+        self.assertEqual(3.0, counter.value('acc_balance'))
+        self.assertIn('test_requests_total{endpoint="acc_balance"} 3.0', self.registry.render())
+
+    def test_histogram_buckets_are_cumulative(self):
+        histogram = self.registry.histogram('latency_seconds', 'Latency.', ('endpoint',), buckets=(0.1, 1.0))
+        histogram.observe(0.05, 'acc_statement')
+        histogram.observe(0.5, 'acc_statement')
+        histogram.observe(5.0, 'acc_statement')
+
+        rendered = self.registry.render()
+        self.assertIn('test_latency_seconds_bucket{endpoint="acc_statement",le="0.1"} 1', rendered)
+        self.assertIn('test_latency_seconds_bucket{endpoint="acc_statement",le="1.0"} 2', rendered)
+        self.assertIn('test_latency_seconds_bucket{endpoint="acc_statement",le="+Inf"} 3', rendered)
+        self.assertIn('test_latency_seconds_sum{endpoint="acc_statement"} 5.55', rendered)
+        self.assertIn('test_latency_seconds_count{endpoint="acc_statement"} 3', rendered)
+
+    def test_label_values_are_escaped(self):
+        counter = self.registry.counter('errors_total', 'Errors.', ('message',))
+        counter.inc('say "hi"\n')
+
+        self.assertIn('test_errors_total{message="say \\"hi\\"\\n"} 1.0', self.registry.render())
+
+    def test_gauges_are_collected_at_render_time(self):
+        stats = {'hits': 1}
+        self.registry.register_gauges('cache', 'Cache statistics', lambda: stats)
+        stats['hits'] = 7
+
+        self.assertIn('test_cache_hits 7.0', self.registry.render())
+
+
+class TestInstallMetrics(unittest.TestCase):
+    def setUp(self):
+        self.engine = create_engine('sqlite://')
+        self.registry = MetricsRegistry(namespace='test')
+        self.app = Flask(__name__)
+        install_metrics(self.app, self.engine, self.registry)
+
+        @self.app.route('/account/balance')
+        def acc_balance():
+            with self.engine.connect() as connection:
+                connection.execute(text('SELECT 1'))
+                connection.execute(text('SELECT 2'))
+            return jsonify({'status': 'success'})
+
+    def test_request_and_queries_are_recorded(self):
+        client = self.app.test_client()
+        client.get('/account/balance')
+        client.get('/not-a-route')
+
+        rendered = self.registry.render()
+        self.assertIn('test_http_requests_total{endpoint="acc_balance",method="GET",status="200"} 1.0', rendered)
+        self.assertIn('test_http_requests_total{endpoint="unmatched",method="GET",status="404"} 1.0', rendered)
+        self.assertIn('test_http_request_duration_seconds_count{endpoint="acc_balance",method="GET"} 1', rendered)
+        self.assertIn('test_http_request_db_queries_sum{endpoint="acc_balance"} 2.0', rendered)
+        self.assertIn('test_http_request_db_queries_sum{endpoint="unmatched"} 0.0', rendered)
+
+    def test_queries_outside_requests_are_ignored(self):
+        with self.engine.connect() as connection:
+            connection.execute(text('SELECT 1'))
+
+        self.assertNotIn('db_queries_sum', self.registry.render())
+
+    def test_failed_queries_leave_no_timer_behind(self):
+        with self.engine.connect() as connection:
+            with self.assertRaises(OperationalError):
+                connection.execute(text('SELECT * FROM missing'))
+
+            self.assertEqual([], connection.info.get('query_start_time', []))
@@ -0,0 +1,83 @@
+import os
+import tempfile
+import unittest
+
+from flask import Flask
+
+from src.observability.profiler import DEBUG_HEADER, RequestProfiler, collapse_profiles, collapse_stats, \
+    sign_debug_header
+
+
+def _function(name: str) -> tuple:
+    return 'module.py', 1, name
+
+
+class TestRequestProfiler(unittest.TestCase):
+    def setUp(self):
+        self.output_dir = tempfile.mkdtemp()
+        self.app = Flask(__name__)
+
+        @self.app.route('/account/balance')
+        def acc_balance():
+            return {'balance': sum(range(1000))}
+
+    def _dumps(self, endpoint: str) -> list:
+        directory = os.path.join(self.output_dir, endpoint)
+        return os.listdir(directory) if os.path.isdir(directory) else []
+
+    def test_samples_one_in_n_requests(self):
+        RequestProfiler(self.output_dir, sample_rate=3).install(self.app)
+        client = self.app.test_client()
+        for _ in range(7):
+            client.get('/account/balance')
+
+        dumps = self._dumps('acc_balance')
+        self.assertEqual(3, len(dumps))
+        self.assertTrue(all(dump.endswith(f'-{os.getpid()}.pstats') for dump in dumps))
+
+    def test_profiles_requests_with_a_signed_header(self):
+        RequestProfiler(self.output_dir, secret='secret').install(self.app)
+        client = self.app.test_client()
+        client.get('/account/balance')
+        client.get('/account/balance', headers={DEBUG_HEADER: sign_debug_header('another secret')})
+        client.get('/account/balance', headers={DEBUG_HEADER: sign_debug_header('secret')})
+
+        self.assertEqual(1, len(self._dumps('acc_balance')))
+
+    def test_rejects_expired_headers(self):
+        profiler = RequestProfiler(self.output_dir, secret='secret', max_header_age=60, clock=lambda: 1000)
+
+        self.assertTrue(profiler.valid_debug_header(sign_debug_header('secret', 950)))
+        self.assertFalse(profiler.valid_debug_header(sign_debug_header('secret', 900)))
+        self.assertFalse(profiler.valid_debug_header('not a header'))
+
+    def test_collapses_dumps_by_endpoint(self):
+        RequestProfiler(self.output_dir, sample_rate=1).install(self.app)
+        self.app.test_client().get('/account/balance')
+
+        stacks = collapse_profiles(self.output_dir)
+
+        self.assertTrue(stacks)
+        self.assertTrue(all(stack.startswith('acc_balance;') for stack in stacks))
+        self.assertTrue(any('acc_balance (test_profiler.py' in stack for stack in stacks))
+
+
+class TestCollapseStats(unittest.TestCase):
+    def test_splits_shared_callees_by_caller_time(self):
+        root, parser, renderer, encode = (_function(name) for name in ('root', 'parser', 'renderer', 'encode'))
+        # (primitive calls, calls, own time, cumulative time, {caller: (primitive calls, calls, own, cumulative)})
+        stats = {
+            root: (1, 1, 0.001, 0.010, {}),
+            parser: (1, 1, 0.001, 0.004, {root: (1, 1, 0.001, 0.004)}),
+            renderer: (1, 1, 0.002, 0.005, {root: (1, 1, 0.002, 0.005)}),
+            encode: (2, 2, 0.006, 0.006, {parser: (1, 1, 0.003, 0.003), renderer: (1, 1, 0.003, 0.003)}),
+        }
+
+        stacks = collapse_stats(stats, 'acc_statement')
+
+        self.assertAlmostEqual(1000, stacks['acc_statement;root (module.py:1)'])
+        self.assertAlmostEqual(3000,
+                               stacks['acc_statement;root (module.py:1);parser (module.py:1);encode (module.py:1)'])
+        self.assertAlmostEqual(3000,
+                               stacks['acc_statement;root (module.py:1);renderer (module.py:1);encode (module.py:1)'])
+        self.assertAlmostEqual(10000, sum(stacks.values()))
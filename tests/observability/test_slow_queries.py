@@ -0,0 +1,104 @@
+import unittest
+from datetime import date
+
+from flask import Flask
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.exc import OperationalError
+
+from src.observability.slow_queries import REDACTED, SlowQueryLog, redact_parameters
+from src.services.db_service import SQLAlchemyDBService
+
+
+class TestRedactParameters(unittest.TestCase):
+    def test_named_parameters(self):
+        self.assertEqual({'id_conta': 1, 'senha': REDACTED},
+                         redact_parameters({'id_conta': 1, 'senha': 'hash'}))
+
+    def test_executemany_parameters(self):
+        self.assertEqual([{'senha': REDACTED}, {'senha': REDACTED}],
+                         redact_parameters([{'senha': 'a'}, {'senha': 'b'}]))
+
+    def test_positional_parameters_use_the_compiled_names(self):
+        class Compiled:
+            positiontup = ['id_conta', 'senha']
+
+        class Context:
+            compiled = Compiled()
+
+        self.assertEqual((1, REDACTED), redact_parameters((1, 'hash'), Context()))
+        self.assertEqual((1, 'hash'), redact_parameters((1, 'hash')))
+
+
+class TestSlowQueryLog(unittest.TestCase):
+    def setUp(self):
+        self.sqla = SQLAlchemyDBService('sqlite://')
+        self.sqla.metadata.create_all(self.sqla.engine)
+        with self.sqla.engine.begin() as connection:
+            connection.execute(self.sqla.conta_table.insert(), {
+                'id_pessoa': 1, 'saldo': 100, 'limite_saque_diario': 1000, 'flag_ativo': True, 'tipo_conta': 1,
+                'data_criacao': date.today(), 'senha': 'hash'
+            })
+        self.slow_query_log = SlowQueryLog(self.sqla.engine, threshold=0, capacity=3)
+        self.slow_query_log.install()
+
+    def test_records_the_db_method_and_plan(self):
+        self.sqla.get_balance(1)
+
+        entry, = self.slow_query_log.entries()
+        self.assertEqual('get_balance', entry['db_method'])
+        self.assertIsNone(entry['endpoint'])
+        self.assertTrue(entry['statement'].startswith('SELECT conta.saldo'))
+        self.assertIn('SEARCH conta', entry['plan'][0]['detail'])
+
+    def test_plan_is_taken_when_the_log_is_read(self):
+        checkouts = []
+        event.listen(self.sqla.engine, 'checkout', lambda *args: checkouts.append(args))
+        self.sqla.get_balance(1)
+        self.assertEqual(1, len(checkouts))
+
+        entry, = self.slow_query_log.entries()
+        self.assertEqual(2, len(checkouts))
+        self.assertNotIn('_explain', entry)
+        self.assertIn('SEARCH conta', entry['plan'][0]['detail'])
+
+    def test_failed_statements_leave_no_timer_behind(self):
+        with self.sqla.engine.connect() as connection:
+            with self.assertRaises(OperationalError):
+                connection.execute(text('SELECT * FROM missing'))
+
+            self.assertEqual([], connection.info.get('slow_query_start_time', []))
+
+    def test_records_the_flask_endpoint(self):
+        app = Flask(__name__)
+
+        @app.route('/balance')
+        def acc_balance():
+            return {'balance': self.sqla.get_balance(1)}
+
+        app.test_client().get('/balance')
+
+        self.assertEqual('acc_balance', self.slow_query_log.entries()[0]['endpoint'])
+
+    def test_redacts_passwords(self):
+        with self.sqla.engine.begin() as connection:
+            connection.execute(self.sqla.conta_table.update().values(senha='new hash'))
+
+        entry, = self.slow_query_log.entries()
+        self.assertNotIn('new hash', entry['parameters'])
+        self.assertIn(REDACTED, entry['parameters'])
+
+    def test_keeps_only_the_latest_entries(self):
+        with self.sqla.engine.connect() as connection:
+            for value in range(5):
+                connection.execute(text(f'SELECT {value}'))
+
+        self.assertEqual(['SELECT 4', 'SELECT 3', 'SELECT 2'],
+                         [entry['statement'] for entry in self.slow_query_log.entries()])
+
+    def test_ignores_fast_statements(self):
+        slow_query_log = SlowQueryLog(create_engine('sqlite://'), threshold=60)
+        slow_query_log.install()
+        with slow_query_log.engine.connect() as connection:
+            connection.execute(text('SELECT 1'))
+
+        self.assertEqual([], slow_query_log.entries())
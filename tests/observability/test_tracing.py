@@ -0,0 +1,109 @@
+import json
+import os
+import tempfile
+import unittest
+from datetime import date
+
+from flask import Flask, jsonify
+
+from src.observability.tracing import InMemoryExporter, JsonLinesExporter, Tracer, install_tracing, trace_span
+from src.services.db_service import SQLAlchemyDBService
+
+
+class TestTracer(unittest.TestCase):
+    def test_trace_span_is_a_noop_outside_of_a_trace(self):
+        with trace_span('check_if_account_is_active') as span:
+            self.assertIsNone(span)
+
+    def test_keeps_slow_and_failed_traces(self):
+        exporter = InMemoryExporter()
+        tracer = Tracer(exporter, slow_threshold=60, sample_rate=0.0)
+
+        root, token = tracer.start_trace('fast')
+        tracer.finish_trace(root, token)
+        root, token = tracer.start_trace('failed')
+        with self.assertRaises(ValueError):
+            with trace_span('db.get_balance'):
+                raise ValueError('boom')
+        tracer.finish_trace(root, token)
+
+        trace, = exporter.traces()
+        self.assertEqual('failed', trace['name'])
+        self.assertTrue(trace['error'])
+        self.assertEqual('ValueError: boom', trace['spans'][1]['error'])
+
+        tracer.slow_threshold = 0
+        root, token = tracer.start_trace('slow')
+        tracer.finish_trace(root, token)
+        self.assertEqual('slow', exporter.traces()[0]['name'])
+
+    def test_samples_the_remaining_traces(self):
+        exporter = InMemoryExporter()
+        tracer = Tracer(exporter, slow_threshold=60, sample_rate=0.5, rng=iter([0.1, 0.9]).__next__)
+        for _ in range(2):
+            root, token = tracer.start_trace('request')
+            tracer.finish_trace(root, token)
+
+        self.assertEqual(1, len(exporter.traces()))
+
+    def test_json_lines_exporter(self):
+        path = os.path.join(tempfile.mkdtemp(), 'traces.jsonl')
+        exporter = JsonLinesExporter(path)
+        exporter.export({'trace_id': 'a'})
+        exporter.export({'trace_id': 'b'})
+
+        with open(path) as file:
+            self.assertEqual(['a', 'b'], [json.loads(line)['trace_id'] for line in file])
+
+    def test_in_memory_exporter_is_bounded(self):
+        exporter = InMemoryExporter(capacity=2)
+        for trace_id in 'abc':
+            exporter.export({'trace_id': trace_id})
+
+        self.assertEqual(['c', 'b'], [trace['trace_id'] for trace in exporter.traces()])
+
+
+class TestInstallTracing(unittest.TestCase):
+    def setUp(self):
+        self.sqla = SQLAlchemyDBService('sqlite://')
+        self.sqla.metadata.create_all(self.sqla.engine)
+        with self.sqla.engine.begin() as connection:
+            connection.execute(self.sqla.conta_table.insert(), {
+                'id_pessoa': 1, 'saldo': 100, 'limite_saque_diario': 1000, 'flag_ativo': True, 'tipo_conta': 1,
+                'data_criacao': date.today(), 'senha': 'hash'
+            })
+        self.exporter = InMemoryExporter()
+        self.app = Flask(__name__)
+        install_tracing(self.app, Tracer(self.exporter, slow_threshold=0), self.sqla.engine, self.sqla)
+
+        @self.app.route('/account/deposit')
+        def acc_deposit():
+            with trace_span('check_if_account_is_active', account_id=1):
+                self.sqla.check_account_active(1)
+            self.sqla.deposit_into_account(1, 10.0)
+            return jsonify({'status': 'success'})
+
+    def test_spans_are_nested_under_the_request(self):
+        self.app.test_client().get('/account/deposit')
+
+        trace, = self.exporter.traces()
+        spans = {span['span_id']: span for span in trace['spans']}
+
+        def path(span):
+            names = []
+            while span is not None:
+                names.insert(0, span['name'])
+                span = spans.get(span['parent_id'])
+            return '/'.join(names)
+
+        paths = [path(span) for span in trace['spans']]
+        self.assertEqual('acc_deposit', trace['attributes']['endpoint'])
+        self.assertEqual(200, trace['attributes']['status'])
+        self.assertIn('request/check_if_account_is_active/db.check_account_active/sql', paths)
+        self.assertIn('request/db.deposit_into_account/sql', paths)
+        self.assertIn('request/db.deposit_into_account/sql.commit', paths)
+        self.assertIn('request/serialize', paths)
+
+    def test_db_calls_outside_of_requests_are_not_traced(self):
+        self.assertEqual(100.0, self.sqla.get_balance(1))
+        self.assertEqual([], self.exporter.traces())
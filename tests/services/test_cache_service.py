@@ -0,0 +1,56 @@
+import unittest
+
+from src.services.cache_service import TTLAccountStatusCache
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class TestTTLAccountStatusCache(unittest.TestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+        self.cache = TTLAccountStatusCache(max_size=2, ttl=5.0, clock=self.clock)
+
+    def test_get_missing_account(self):
+        self.assertIsNone(self.cache.get(1))
+        self.assertEqual(1, self.cache.stats()['misses'])
+
+    def test_set_and_get(self):
+        self.cache.set(1, True)
+        self.cache.set(2, False)
+
+        self.assertTrue(self.cache.get(1))
+        self.assertFalse(self.cache.get(2))
+        self.assertEqual(2, self.cache.stats()['hits'])
+
+    def test_entry_expires_after_ttl(self):
+        self.cache.set(1, True)
+        self.clock.now = 4.9
+        self.assertTrue(self.cache.get(1))
+
+        self.clock.now = 5.0
+        self.assertIsNone(self.cache.get(1))
+        self.assertEqual(0, self.cache.stats()['size'])
+
+    def test_least_recently_used_entry_is_evicted(self):
+        self.cache.set(1, True)
+        self.cache.set(2, True)
+        self.cache.get(1)
+        self.cache.set(3, True)
+
+        self.assertTrue(self.cache.get(1))
+        self.assertIsNone(self.cache.get(2))
+        self.assertTrue(self.cache.get(3))
+        self.assertEqual(1, self.cache.stats()['evictions'])
+
+    def test_invalidate(self):
+        self.cache.set(1, True)
+        self.cache.invalidate(1)
+        self.cache.invalidate(2)
+
+        self.assertIsNone(self.cache.get(1))
@@ -0,0 +1,83 @@
+import unittest
+from datetime import datetime
+from unittest.mock import Mock
+
+from src.models.entities import OperationDTO, OperationType
+from src.services.cached_db_service import CachedDBInterface
+from src.services.db_service import SQLAlchemyDBService
+from src.services.shared_cache import SharedAccountCache
+
+
+class TestCachedDBInterface(unittest.TestCase):
+    def setUp(self):
+        service = SQLAlchemyDBService('sqlite://')
+        service.metadata.create_all(service.engine)
+        with service.engine.begin() as connection:
+            connection.execute(service.conta_table.insert(), [{
+                'id_conta': account_id, 'id_pessoa': 1, 'saldo': 100, 'limite_saque_diario': 100,
+                'flag_ativo': True, 'tipo_conta': 1, 'data_criacao': datetime.now().date(), 'senha': 'hash'
+            } for account_id in (1, 2)])
+        self.service = Mock(wraps=service)
+        self.cache = SharedAccountCache(slots=16, ttl=60.0)
+        self.db = CachedDBInterface(self.service, self.cache)
+
+    def test_reads_are_served_from_the_cache(self):
+        for _ in range(3):
+            self.assertEqual('100.00', str(self.db.get_balance(1)))
+            self.assertTrue(self.db.check_account_active(1))
+            account, password = self.db.get_account(1)
+            self.assertEqual((1, 100.0, 'hash'), (account.id_conta, account.saldo, password))
+
+        self.assertEqual(1, self.service.get_balance.call_count)
+        self.assertEqual(1, self.service.check_account_active.call_count)
+        # the password hash never goes to the shared cache
+        self.assertEqual(3, self.service.get_account.call_count)
+
+    def test_versions_are_cached_until_a_write(self):
+        self.assertEqual((100.0, None), self.db.get_account_version(1))
+        self.assertEqual((100.0, None), self.db.get_account_version(1))
+        self.assertEqual(1, self.service.get_account_version.call_count)
+
+        transaction = self.db.make_transaction(1, 5.0)
+        self.assertEqual((100.0, transaction.id_transacao), self.db.get_account_version(1))
+        self.db.execute_withdrawal(1, 5)
+        self.assertEqual((95.0, transaction.id_transacao + 1), self.db.get_account_version(1))
+        self.assertEqual(3, self.service.get_account_version.call_count)
+
+    def test_unknown_accounts_are_not_cached(self):
+        self.assertEqual((None, None), self.db.get_account(3))
+        self.assertIsNone(self.db.get_balance(3))
+        self.assertIsNone(self.db.get_balance(3))
+
+        self.assertEqual(2, self.service.get_balance.call_count)
+
+    def test_writes_invalidate_the_account(self):
+        self.db.get_balance(1)
+        self.db.get_balance(2)
+
+        self.db.deposit_into_account(1, 10)
+        self.assertEqual('110.00', str(self.db.get_balance(1)))
+        self.db.post_operation(OperationDTO(account_id=1, amount=5, operation_type=OperationType.Withdrawal))
+        self.assertEqual('105.00', str(self.db.get_balance(1)))
+        self.db.execute_withdrawal(1, 5)
+        self.assertEqual('100.00', str(self.db.get_balance(1)))
+        self.db.change_account_active_status(1, False)
+        self.assertFalse(self.db.check_account_active(1))
+        self.assertFalse(self.db.get_account(1)[0].flag_ativo)
+
+        self.assertEqual('100.00', str(self.db.get_balance(2)))
+        self.assertEqual(5, self.service.get_balance.call_count)
+
+    def test_unit_of_work_reads_its_own_writes_and_fills_nothing(self):
+        self.db.begin_unit_of_work()
+        self.db.get_balance(2)
+        self.db.withdraw_from_account(1, 10)
+        self.assertEqual('90.00', str(self.db.get_balance(1)))
+        self.assertIsNone(self.cache.get_balance(1)[0])
+        self.db.end_unit_of_work(commit=False)
+
+        self.assertIsNone(self.cache.get_balance(2)[0])
+        self.assertEqual('100.00', str(self.db.get_balance(1)))
+
+    def test_other_attributes_come_from_the_wrapped_service(self):
+        self.assertIs(self.service.engine, self.db.engine)
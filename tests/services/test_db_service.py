@@ -0,0 +1,683 @@
+import unittest
+from datetime import datetime, timedelta
+from unittest.mock import Mock, patch, call
+
+from sqlalchemy import event
+
+import src.services.db_service
+
+from src.models import entities
+from src.models.entities import Account, Transaction, OperationDTO, OperationType, OperationStatus
+from src.services.db_service import SQLAlchemyDBService
+
+
+class MyTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.session_mock = Mock()
+        self.mock_sqla = SQLAlchemyDBService("")
+        self.mock_sqla.engine = Mock()
+        self.mock_sqla.Session = Mock(return_value=self.session_mock)
+        self.mock_sqla.conta_table = Mock()
+        self.mock_sqla.transactions_table = Mock()
+        self.mock_sqla.pessoa_table = Mock()
+        self.mock_sqla.withdrawals_table = Mock()
+
+    def tearDown(self):
+        self.session_mock = None
+        self.mock_sqla.engine = None
+        self.mock_sqla.Session = None
+        self.mock_sqla.conta_table = None
+        self.mock_sqla.transactions_table = None
+        self.mock_sqla.pessoa_table = None
+        self.mock_sqla.withdrawals_table = None
+        self.mock_sqla = None
+
+    @patch('src.services.db_service.insert')
+    def test_create_new_account(self, mock_insert: Mock):
+        account_dict = {
+            "id_conta": 1,
+            "id_pessoa": 1,
+            "saldo": 100.0,
+            "limite_saque_diario": 1000,
+            "flag_ativo": True,
+            "tipo_conta": 1,
+            "data_criacao": "2022-06-18",
+        }
+        account = entities.Account.from_dict(account_dict)
+
+        self.mock_sqla.create_new_account(account, '123456')
+
+        # Asserts
+        mock_insert.assert_called_once_with(self.mock_sqla.conta_table)
+        self.mock_sqla.Session.assert_called_once()
+        self.session_mock.execute.assert_called_once_with(mock_insert.return_value,
+                                                          {**account.to_dict(), "senha": '123456',
+                                                           "data_criacao": account.data_criacao})
+        self.session_mock.commit.assert_called_once()
+        self.session_mock.close.assert_called_once()
+
+    @patch('src.services.db_service.insert')
+    def test_create_new_person(self, mock_insert: Mock):
+        person_dict = {
+            "id_pessoa": 1,
+            "nome": "Fulano da Silva",
+            "cpf": "00000000000",
+            "data_nascimento": "1999-01-01"
+        }
+        person = entities.Person.from_dict(person_dict)
+
+        self.mock_sqla.create_new_person(person)
+
+        # Asserts
+        mock_insert.assert_called_once_with(self.mock_sqla.pessoa_table)
+        self.mock_sqla.Session.assert_called_once()
+        self.session_mock.execute.assert_called_once_with(mock_insert.return_value, {
+            **person.to_dict(), "data_nascimento": person.data_nascimento
+        })
+        self.session_mock.commit.assert_called_once()
+        self.session_mock.close.assert_called_once()
+
+    def test_deposit_into_account(self):
+        account_id = 1
+        amount = 1.0
+
+        self.mock_sqla.conta_table.c.saldo = amount
+        self.mock_sqla.conta_table.c.id_conta = account_id
+        self.mock_sqla.deposit_into_account(account_id, amount)
+
+        # Asserts
+        self.mock_sqla.Session.assert_called()
+        self.mock_sqla.conta_table.update.assert_called_once()
+        (self.mock_sqla.conta_table.update.return_value.where
+         .assert_called_once_with(self.mock_sqla.conta_table.c.id_conta == account_id))
+        (self.mock_sqla.conta_table.update.return_value.where.return_value.values
+         .assert_called_once_with(saldo=self.mock_sqla.conta_table.c.saldo + abs(amount)))
+        self.session_mock.execute.assert_called_once()
+        self.session_mock.commit.assert_called_once()
+        self.session_mock.close.assert_called_once()
+
+    def test_get_balance(self):
+        account_id = 1
+        current_balance = 12344.23
+
+        self.session_mock.query.return_value.filter_by.return_value.scalar.return_value = current_balance
+        check_balance = self.mock_sqla.get_balance(account_id)
+
+        # Asserts
+        self.assertEqual(check_balance, current_balance)
+        self.mock_sqla.Session.assert_called()
+        self.session_mock.query.assert_called_once_with(self.mock_sqla.conta_table.c.saldo)
+        self.session_mock.query.return_value.filter_by.assert_called_once_with(id_conta=account_id)
+        self.session_mock.query.return_value.filter_by.return_value.scalar.assert_called_once()
+        self.session_mock.close.assert_called_once()
+
+    def test_get_balance_account_not_found(self):
+        account_id = 1
+
+        self.session_mock.query.return_value.filter_by.return_value.scalar.return_value = None
+        self.mock_sqla.get_balance(account_id)
+
+        # Asserts
+        self.mock_sqla.Session.assert_called()
+        self.session_mock.query.assert_called_once_with(self.mock_sqla.conta_table.c.saldo)
+        self.session_mock.query.return_value.filter_by.assert_called_once_with(id_conta=account_id)
+        self.session_mock.query.return_value.filter_by.return_value.scalar.assert_called_once()
+        self.session_mock.close.assert_called_once()
+
+    @patch('src.services.db_service.select')
+    def test_get_account_version(self, mock_select: Mock):
+        account_id = 1
+        self.session_mock.execute.return_value.first.return_value = (12344.23, 7)
+
+        version = self.mock_sqla.get_account_version(account_id)
+
+        self.assertEqual((12344.23, 7), version)
+        last_transaction_id = mock_select.return_value.where.return_value.scalar_subquery.return_value
+        mock_select.assert_called_with(self.mock_sqla.conta_table.c.saldo, last_transaction_id)
+        self.session_mock.execute.assert_called_once_with(mock_select.return_value.where.return_value)
+        self.session_mock.close.assert_called_once()
+
+    @patch('src.services.db_service.select')
+    def test_get_account_version_account_not_found(self, mock_select: Mock):
+        self.session_mock.execute.return_value.first.return_value = None
+
+        self.assertIsNone(self.mock_sqla.get_account_version(1))
+        self.session_mock.close.assert_called_once()
+
+    def test_withdraw_from_account(self):
+        account_id = 1
+        amount = 1.0
+
+        self.mock_sqla.conta_table.c.saldo = 0
+        self.mock_sqla.withdraw_from_account(account_id, amount)
+
+        # Asserts
+        self.mock_sqla.Session.assert_called()
+        (self.mock_sqla.conta_table.update.return_value.where
+         .assert_called_once_with(self.mock_sqla.conta_table.c.id_conta == account_id))
+        (self.mock_sqla.conta_table.update.return_value.where.return_value.values
+         .assert_called_once_with(saldo=self.mock_sqla.conta_table.c.saldo - abs(amount)))
+        self.mock_sqla.conta_table.update.assert_called_once()
+        self.session_mock.execute.assert_called_once()
+        self.session_mock.commit.assert_called_once()
+        self.session_mock.close.assert_called_once()
+
+    def test_change_account_active_status(self):
+        account_id = 1
+        active = False
+
+        self.mock_sqla.conta_table.c.id_conta = account_id
+
+        self.mock_sqla.change_account_active_status(account_id, active)
+
+        # Asserts
+        self.mock_sqla.conta_table.update.return_value.where.assert_called_once_with(True)
+        self.mock_sqla.conta_table.update.return_value.where.return_value.values.assert_called_once_with(
+            flag_ativo=active)
+        self.mock_sqla.Session.assert_called()
+        self.mock_sqla.conta_table.update.assert_called_once()
+        self.session_mock.execute.assert_called_once()
+        self.session_mock.commit.assert_called_once()
+        self.session_mock.close.assert_called_once()
+
+    def test_get_extract_from_account(self):
+        expected_account_id = 12321
+        days_prior = 30
+        expected_since_day = datetime.now() - timedelta(days=days_prior)
+        expected_rows = [
+            (1, expected_account_id, 103.52, datetime.strptime('2023-12-12', '%Y-%m-%d').date()),
+            (2, expected_account_id, 128.98, datetime.strptime('2023-12-15', '%Y-%m-%d').date())
+        ]
+
+        expected_transactions = [
+            Transaction(1, 12321, 103.52, datetime.strptime('2023-12-12', '%Y-%m-%d').date()),
+            Transaction(2, 12321, 128.98, datetime.strptime('2023-12-15', '%Y-%m-%d').date())
+        ]
+
+        self.session_mock.query.return_value.filter.return_value.all.return_value = expected_rows
+        self.mock_sqla.transactions_table.c.data_transacao = datetime(year=2023, month=12, day=12)
+
+        statement = self.mock_sqla.get_extract_from_account(account_id=12321, days=30)
+
+        # Asserts
+        self.mock_sqla.Session.assert_called()
+        self.session_mock.query.assert_called_once_with(self.mock_sqla.transactions_table)
+        self.session_mock.query.return_value.filter.assert_called_once_with(
+            self.mock_sqla.transactions_table.c.id_conta == expected_account_id,
+            self.mock_sqla.transactions_table.c.data_transacao >= expected_since_day
+        )
+        self.session_mock.close.assert_called_once()
+        self.assertEqual(statement, expected_transactions)
+
+    def test_get_extract_from_account_page(self):
+        account_id = 12321
+        expected_rows = [(5, account_id, 103.52, datetime.strptime('2023-12-12', '%Y-%m-%d').date())]
+        page_query = self.session_mock.query.return_value.filter.return_value.filter.return_value.order_by.return_value
+        page_query.limit.return_value.all.return_value = expected_rows
+        self.mock_sqla.transactions_table.c.data_transacao = datetime(year=2023, month=12, day=12)
+        self.mock_sqla.transactions_table.c.id_transacao = 4
+
+        statement = self.mock_sqla.get_extract_from_account(account_id=account_id, after_id=4, limit=1)
+
+        self.session_mock.query.return_value.filter.return_value.filter.assert_called_once_with(
+            self.mock_sqla.transactions_table.c.id_transacao > 4)
+        (self.session_mock.query.return_value.filter.return_value.filter.return_value.order_by
+         .assert_called_once_with(self.mock_sqla.transactions_table.c.id_transacao))
+        page_query.limit.assert_called_once_with(1)
+        self.session_mock.close.assert_called_once()
+        self.assertEqual([Transaction(5, account_id, 103.52, datetime.strptime('2023-12-12', '%Y-%m-%d').date())],
+                         statement)
+
+    @patch('src.services.db_service.select')
+    def test_iter_extract_from_account(self, mock_select: Mock):
+        account_id = 12321
+        row = (1, account_id, 103.52, datetime.strptime('2023-12-12', '%Y-%m-%d').date())
+        self.session_mock.execute.return_value = iter([row])
+        self.mock_sqla.transactions_table.c.data_transacao = datetime(year=2023, month=12, day=12)
+
+        transactions = self.mock_sqla.iter_extract_from_account(account_id=account_id)
+
+        self.mock_sqla.Session.assert_not_called()
+        self.assertEqual([Transaction(1, account_id, 103.52, row[3])], list(transactions))
+        mock_select.assert_called_once_with(self.mock_sqla.transactions_table)
+        (mock_select.return_value.where.return_value.order_by.return_value.execution_options
+         .assert_called_once_with(yield_per=src.services.db_service.STATEMENT_STREAM_BATCH_SIZE))
+        self.session_mock.close.assert_called_once()
+
+    @patch('src.services.db_service.insert')
+    def test_make_transaction(self, mock_insert: Mock):
+        account_id = 1
+        amount = 1.0
+        transaction_date = datetime.now().date()
+        expected_transaction_id = 1
+        expected_transaction_dict = {
+            "id_conta": account_id,
+            "valor": amount,
+            "data_transacao": transaction_date
+        }
+        expected_transaction = Transaction(expected_transaction_id, account_id, amount, transaction_date)
+        self.session_mock.execute.return_value = Mock()
+        self.session_mock.execute.return_value.inserted_primary_key = [expected_transaction_id]
+
+        transaction = self.mock_sqla.make_transaction(account_id=account_id, amount=amount)
+
+        self.assertEqual(expected_transaction, transaction)
+        mock_insert.assert_called_once_with(self.mock_sqla.transactions_table)
+        self.mock_sqla.Session.assert_called()
+        self.session_mock.execute.assert_called_once_with(mock_insert.return_value, expected_transaction_dict)
+        self.session_mock.commit.assert_called_once()
+        self.session_mock.close.assert_called_once()
+
+    @patch('src.services.db_service.select')
+    @patch('src.services.db_service.insert')
+    def test_make_transaction_withdrawal_locks_the_account(self, mock_insert: Mock, mock_select: Mock):
+        lock = mock_select.return_value.where.return_value.with_for_update.return_value
+        self.session_mock.execute.side_effect = [Mock(), Mock(inserted_primary_key=[3]), Mock(rowcount=0), Mock()]
+        self.mock_sqla.withdrawals_table.c.valor_sacado = 0.0
+
+        transaction = self.mock_sqla.make_transaction(account_id=1, amount=-5.0)
+
+        self.assertEqual(-5.0, transaction.valor)
+        mock_select.assert_called_once_with(self.mock_sqla.conta_table.c.id_conta)
+        self.assertEqual(call(lock), self.session_mock.execute.call_args_list[0])
+        self.assertEqual(4, self.session_mock.execute.call_count)
+        self.session_mock.commit.assert_called_once()
+
+    @patch('src.services.db_service.insert')
+    def test_post_operation_deposit(self, mock_insert: Mock):
+        account_id = 1
+        amount = 10.0
+        expected_balance = 110.0
+        update_result, insert_result = Mock(rowcount=1), Mock(inserted_primary_key=[7])
+        self.session_mock.execute.side_effect = [update_result, insert_result]
+        self.session_mock.query.return_value.filter_by.return_value.scalar.return_value = expected_balance
+        self.mock_sqla.conta_table.c.saldo = 100.0
+
+        transaction, balance = self.mock_sqla.post_operation(
+            OperationDTO(account_id=account_id, amount=amount, operation_type=OperationType.Deposit))
+
+        self.assertEqual(Transaction(7, account_id, amount, datetime.now().date()), transaction)
+        self.assertEqual(expected_balance, balance)
+        self.mock_sqla.Session.assert_called_once()
+        (self.mock_sqla.conta_table.update.return_value.where.return_value.values
+         .assert_called_once_with(saldo=self.mock_sqla.conta_table.c.saldo + amount))
+        mock_insert.assert_called_once_with(self.mock_sqla.transactions_table)
+        self.assertEqual(2, self.session_mock.execute.call_count)
+        self.session_mock.query.return_value.filter_by.assert_called_once_with(id_conta=account_id)
+        self.session_mock.commit.assert_called_once()
+        self.session_mock.close.assert_called_once()
+
+    @patch('src.services.db_service.select')
+    @patch('src.services.db_service.insert')
+    def test_post_operation_withdrawal(self, mock_insert: Mock, mock_select: Mock):
+        account_id = 1
+        amount = 10.0
+        lock = mock_select.return_value.where.return_value.with_for_update.return_value
+        self.session_mock.execute.side_effect = [Mock(), Mock(rowcount=1), Mock(inserted_primary_key=[8]),
+                                                 Mock(rowcount=1)]
+        self.session_mock.query.return_value.filter_by.return_value.scalar.return_value = 90.0
+        self.mock_sqla.conta_table.c.saldo = 100.0
+        self.mock_sqla.withdrawals_table.c.valor_sacado = 0.0
+
+        transaction, balance = self.mock_sqla.post_operation(
+            OperationDTO(account_id=account_id, amount=amount, operation_type=OperationType.Withdrawal))
+
+        self.assertEqual(-amount, transaction.valor)
+        self.assertEqual(90.0, balance)
+        (self.mock_sqla.conta_table.update.return_value.where.return_value.values
+         .assert_called_once_with(saldo=self.mock_sqla.conta_table.c.saldo - amount))
+        (self.mock_sqla.withdrawals_table.update.return_value.where.return_value.values
+         .assert_called_once_with(valor_sacado=self.mock_sqla.withdrawals_table.c.valor_sacado + amount))
+        # the account row is locked before the withdrawal counter is read and written
+        self.assertEqual(call(lock), self.session_mock.execute.call_args_list[0])
+        self.assertEqual(4, self.session_mock.execute.call_count)
+        self.session_mock.commit.assert_called_once()
+        self.session_mock.close.assert_called_once()
+
+    @patch('src.services.db_service.insert')
+    def test_post_operation_account_not_found(self, mock_insert: Mock):
+        self.session_mock.execute.return_value = Mock(rowcount=0)
+        self.mock_sqla.conta_table.c.saldo = 100.0
+
+        transaction, balance = self.mock_sqla.post_operation(
+            OperationDTO(account_id=404, amount=10.0, operation_type=OperationType.Deposit))
+
+        self.assertIsNone(transaction)
+        self.assertIsNone(balance)
+        mock_insert.assert_not_called()
+        self.session_mock.execute.assert_called_once()
+        self.session_mock.rollback.assert_called_once()
+        self.session_mock.commit.assert_not_called()
+        self.session_mock.close.assert_called_once()
+
+    def test_check_account_active(self):
+        account_id = 1
+        expected_account_status = True
+        self.session_mock.query.return_value.filter_by.return_value.scalar.return_value = expected_account_status
+
+        account_status = self.mock_sqla.check_account_active(account_id=account_id)
+
+        self.assertEqual(expected_account_status, account_status)
+        self.mock_sqla.Session.assert_called()
+        self.session_mock.query.assert_called_once_with(self.mock_sqla.conta_table.c.flag_ativo)
+        self.session_mock.query.return_value.filter_by.assert_called_once_with(id_conta=account_id)
+        self.session_mock.query.return_value.filter_by.return_value.scalar.assert_called_once()
+        self.session_mock.close.assert_called_once()
+
+    def test_check_account_active_invalid_account(self):
+        account_id = 1
+        expected_account_status = None
+        self.session_mock.query.return_value.filter_by.return_value.scalar.return_value = expected_account_status
+
+        account_status = self.mock_sqla.check_account_active(account_id=account_id)
+
+        self.assertEqual(expected_account_status, account_status)
+
+    def test_reached_withdrawal_limit(self):
+        account_id = 1
+        withdrawal_limit = 1023.00
+        withdrawal_amount = 1000.00
+        withdrawn_today = 123.65
+
+        self.session_mock.query.return_value.filter_by.return_value.scalar.side_effect = [withdrawal_limit,
+                                                                                         withdrawn_today]
+
+        limit_reached = self.mock_sqla.reached_withdrawal_limit(account_id=account_id,
+                                                                withdrawal_amount=withdrawal_amount)
+
+        self.assertTrue(limit_reached)
+
+        self.mock_sqla.Session.assert_called_once()
+        self.session_mock.query.assert_has_calls(calls=[call(self.mock_sqla.conta_table.c.limite_saque_diario),
+                                                        call(self.mock_sqla.withdrawals_table.c.valor_sacado)],
+                                                 any_order=True)
+        self.session_mock.query.return_value.filter_by.assert_has_calls(calls=[
+            call(id_conta=account_id),
+            call(id_conta=account_id, data_saque=datetime.now().date())
+        ], any_order=True)
+        self.session_mock.query.return_value.filter.assert_not_called()
+        self.session_mock.close.assert_called_once()
+
+        self.session_mock.query.return_value.filter_by.return_value.scalar.side_effect = [withdrawal_limit,
+                                                                                         withdrawn_today]
+        withdrawal_amount = 1.0
+        limit_reached = self.mock_sqla.reached_withdrawal_limit(account_id=account_id,
+                                                                withdrawal_amount=withdrawal_amount)
+        self.assertFalse(limit_reached)
+
+    def test_reached_withdrawal_limit_without_withdrawals_today(self):
+        self.session_mock.query.return_value.filter_by.return_value.scalar.side_effect = [1000.0, None]
+
+        limit_reached = self.mock_sqla.reached_withdrawal_limit(account_id=1, withdrawal_amount=1000.0)
+
+        self.assertFalse(limit_reached)
+
+    @patch('src.services.db_service.insert')
+    @patch('src.services.db_service.select')
+    def test_rebuild_withdrawal_counters(self, mock_select: Mock, mock_insert: Mock):
+        day = datetime.now().date()
+        mock_insert.return_value.from_select.return_value = 'insert from select'
+        self.mock_sqla.transactions_table.c.valor = -1.0
+        self.mock_sqla.transactions_table.c.data_transacao = day
+        self.mock_sqla.withdrawals_table.c.data_saque = day
+        self.session_mock.execute.side_effect = [Mock(rowcount=3), Mock(rowcount=2)]
+
+        rebuilt = self.mock_sqla.rebuild_withdrawal_counters(day)
+
+        self.assertEqual(2, rebuilt)
+        self.mock_sqla.withdrawals_table.delete.assert_called_once()
+        mock_insert.assert_called_once_with(self.mock_sqla.withdrawals_table)
+        mock_insert.return_value.from_select.assert_called_once_with(
+            ['id_conta', 'data_saque', 'valor_sacado'],
+            mock_select.return_value.where.return_value.group_by.return_value)
+        self.session_mock.execute.assert_called_with('insert from select')
+        self.session_mock.commit.assert_called_once()
+        self.session_mock.close.assert_called_once()
+
+    def test_execute_withdrawal_account_not_found(self):
+        locked_query = self.session_mock.query.return_value.filter_by.return_value.with_for_update.return_value
+        locked_query.first.return_value = None
+
+        result = self.mock_sqla.execute_withdrawal(account_id=1, amount=10.0)
+
+        self.assertEqual(OperationStatus.NotFound, result.status)
+        self.session_mock.query.return_value.filter_by.assert_called_once_with(id_conta=1)
+        self.session_mock.execute.assert_not_called()
+        self.session_mock.commit.assert_not_called()
+        self.session_mock.close.assert_called_once()
+
+    def test_execute_withdrawal_account_blocked(self):
+        self.session_mock.query.return_value.filter_by.return_value.with_for_update.return_value.first.return_value = (
+            False, 1000.0, 100.0)
+
+        result = self.mock_sqla.execute_withdrawal(account_id=1, amount=10.0)
+
+        self.assertEqual(OperationStatus.Blocked, result.status)
+        self.session_mock.execute.assert_not_called()
+        self.session_mock.commit.assert_not_called()
+        self.session_mock.close.assert_called_once()
+
+    def test_execute_withdrawal_limit_reached(self):
+        self.session_mock.query.return_value.filter_by.return_value.with_for_update.return_value.first.return_value = (
+            True, 1000.0, 5000.0)
+        self.session_mock.query.return_value.filter_by.return_value.scalar.return_value = 995.0
+
+        result = self.mock_sqla.execute_withdrawal(account_id=1, amount=10.0)
+
+        self.assertEqual(OperationStatus.LimitReached, result.status)
+        self.assertEqual(5000.0, result.balance)
+        self.session_mock.execute.assert_not_called()
+        self.session_mock.commit.assert_not_called()
+        self.session_mock.close.assert_called_once()
+
+    @patch('src.services.db_service.insert')
+    def test_execute_withdrawal(self, mock_insert: Mock):
+        account_id = 1
+        amount = 10.0
+        self.session_mock.query.return_value.filter_by.return_value.with_for_update.return_value.first.return_value = (
+            True, 1000.0, 100.0)
+        self.session_mock.query.return_value.filter_by.return_value.scalar.return_value = None
+        self.session_mock.execute.side_effect = [Mock(rowcount=1), Mock(inserted_primary_key=[3]), Mock(rowcount=0),
+                                                 Mock()]
+        self.mock_sqla.conta_table.c.saldo = 100.0
+        self.mock_sqla.withdrawals_table.c.valor_sacado = 0.0
+
+        result = self.mock_sqla.execute_withdrawal(account_id=account_id, amount=amount)
+
+        self.assertEqual(OperationStatus.Ok, result.status)
+        self.assertEqual(Transaction(3, account_id, -amount, datetime.now().date()), result.transaction)
+        self.assertEqual(90.0, result.balance)
+        self.mock_sqla.Session.assert_called_once()
+        (self.mock_sqla.conta_table.update.return_value.where.return_value.values
+         .assert_called_once_with(saldo=self.mock_sqla.conta_table.c.saldo - amount))
+        mock_insert.assert_has_calls([call(self.mock_sqla.transactions_table),
+                                      call(self.mock_sqla.withdrawals_table)])
+        self.assertEqual(4, self.session_mock.execute.call_count)
+        self.session_mock.commit.assert_called_once()
+        self.session_mock.close.assert_called_once()
+
+    def test_unit_of_work_shares_one_session(self):
+        self.session_mock.query.return_value.filter_by.return_value.scalar.return_value = True
+        self.mock_sqla.conta_table.c.saldo = 0.0
+
+        self.mock_sqla.begin_unit_of_work()
+        self.assertTrue(self.mock_sqla.check_account_active(account_id=1))
+        self.assertTrue(self.mock_sqla.check_account_active(account_id=1))
+        self.mock_sqla.deposit_into_account(account_id=1, amount=1.0)
+        self.mock_sqla.check_account_active(account_id=1)
+        self.mock_sqla.end_unit_of_work(commit=True)
+
+        self.mock_sqla.Session.assert_called_once()
+        # The second read is memoized, the deposit forgets it so the third one hits the database again
+        self.assertEqual(2, self.session_mock.query.call_count)
+        self.session_mock.flush.assert_called_once()
+        self.session_mock.commit.assert_called_once()
+        self.session_mock.rollback.assert_not_called()
+        self.session_mock.close.assert_called_once()
+
+    def test_unit_of_work_rolls_back_when_a_method_rolls_back(self):
+        self.session_mock.execute.return_value = Mock(rowcount=0)
+        self.mock_sqla.conta_table.c.saldo = 0.0
+
+        self.mock_sqla.begin_unit_of_work()
+        self.mock_sqla.post_operation(OperationDTO(account_id=1, amount=1.0, operation_type=OperationType.Deposit))
+        self.session_mock.rollback.assert_not_called()
+        self.mock_sqla.end_unit_of_work(commit=True)
+
+        self.session_mock.commit.assert_not_called()
+        self.session_mock.rollback.assert_called_once()
+        self.session_mock.close.assert_called_once()
+
+    def test_status_change_drops_the_cached_status(self):
+        self.mock_sqla.account_status_cache = Mock()
+
+        self.mock_sqla.change_account_active_status(account_id=1, active=False)
+
+        self.mock_sqla.account_status_cache.invalidate.assert_called_once_with(1)
+
+    def test_unit_of_work_drops_the_cached_status_after_the_commit(self):
+        cache = self.mock_sqla.account_status_cache = Mock()
+        self.session_mock.commit.side_effect = lambda: cache.invalidate.assert_not_called()
+
+        self.mock_sqla.begin_unit_of_work()
+        self.mock_sqla.change_account_active_status(account_id=1, active=False)
+        cache.invalidate.assert_not_called()
+        self.mock_sqla.end_unit_of_work(commit=True)
+
+        self.session_mock.commit.assert_called_once()
+        cache.invalidate.assert_called_once_with(1)
+
+        self.mock_sqla.begin_unit_of_work()
+        self.mock_sqla.change_account_active_status(account_id=2, active=False)
+        self.mock_sqla.end_unit_of_work(commit=False)
+
+        cache.invalidate.assert_called_once_with(1)
+
+    def test_end_unit_of_work_without_unit_of_work(self):
+        self.mock_sqla.end_unit_of_work(commit=True)
+
+        self.mock_sqla.Session.assert_not_called()
+
+    def test_get_account(self):
+        account_id = 1
+        person_id = 1
+        balance = 100.00
+        withdrawal_limit = 1000.0
+        active_flag = True
+        account_type = 1
+        creation_date = datetime.now().date()
+        expected_password = 'a strong password'
+
+        expected_account = Account.from_dict({
+            "id_conta": account_id,
+            "id_pessoa": person_id,
+            "saldo": balance,
+            "limite_saque_diario": withdrawal_limit,
+            "flag_ativo": active_flag,
+            "tipo_conta": account_type,
+            "data_criacao": creation_date.strftime('%Y-%m-%d'),
+        })
+
+        self.session_mock.query.return_value.filter_by.return_value.first.return_value = tuple(
+            [account_id, person_id, balance, withdrawal_limit,
+             active_flag, account_type, creation_date, expected_password]
+        )
+
+        account, password = self.mock_sqla.get_account(account_id=account_id)
+
+        self.assertEqual(expected_password, password)
+        self.assertEqual(expected_account, account)
+
+        self.mock_sqla.Session.assert_called_once()
+        self.session_mock.query.assert_called_once_with(self.mock_sqla.conta_table)
+        self.session_mock.query.return_value.filter_by.assert_called_once_with(id_conta=account_id)
+        self.session_mock.query.return_value.filter_by.return_value.first.assert_called_once()
+
+        self.session_mock.close.assert_called_once()
+
+    def test_get_account_invalid_account(self):
+        account_id = 12345
+        self.session_mock.query.return_value.filter_by.return_value.first.return_value = None
+        account, password = self.mock_sqla.get_account(account_id=account_id)
+
+        self.assertIsNone(account)
+
+
+class TestApplyOperations(unittest.TestCase):
+    def setUp(self):
+        self.sqla = SQLAlchemyDBService('sqlite://')
+        self.sqla.metadata.create_all(self.sqla.engine)
+        today = datetime.now().date()
+        with self.sqla.engine.begin() as connection:
+            connection.execute(self.sqla.conta_table.insert(), [{
+                'id_conta': account_id, 'id_pessoa': 1, 'saldo': 100, 'limite_saque_diario': 100,
+                'flag_ativo': account_id != 3, 'tipo_conta': 1, 'data_criacao': today, 'senha': 'hash'
+            } for account_id in (1, 2, 3)])
+            connection.execute(self.sqla.withdrawals_table.insert(),
+                               {'id_conta': 2, 'data_saque': today, 'valor_sacado': 80})
+
+    @staticmethod
+    def _operation(account_id: int, amount: float, operation_type: OperationType = OperationType.Deposit):
+        return OperationDTO(account_id=account_id, amount=amount, operation_type=operation_type)
+
+    def test_apply_operations(self):
+        results = self.sqla.apply_operations([
+            self._operation(1, 10),
+            self._operation(1, 60, OperationType.Withdrawal),
+            self._operation(1, 50, OperationType.Withdrawal),
+            self._operation(2, 30, OperationType.Withdrawal),
+            self._operation(2, 20, OperationType.Withdrawal),
+            self._operation(3, 10),
+            self._operation(4, 10),
+            self._operation(2, 0),
+        ])
+
+        self.assertEqual([OperationStatus.Ok, OperationStatus.Ok, OperationStatus.LimitReached,
+                          OperationStatus.LimitReached, OperationStatus.Ok, OperationStatus.Blocked,
+                          OperationStatus.NotFound, OperationStatus.Invalid], [result.status for result in results])
+        self.assertEqual([110.0, 50.0, 50.0, 100.0, 80.0], [result.balance for result in results[:5]])
+
+        self.assertEqual(50.0, self.sqla.get_balance(1))
+        self.assertEqual(80.0, self.sqla.get_balance(2))
+        self.assertEqual(100.0, self.sqla.get_balance(3))
+        statement = self.sqla.get_extract_from_account(1) + self.sqla.get_extract_from_account(2)
+        self.assertEqual([result.transaction for result in results if result.status == OperationStatus.Ok],
+                         sorted(statement, key=lambda transaction: transaction.id_transacao))
+        self.assertFalse(self.sqla.reached_withdrawal_limit(1, 40.0))
+        self.assertTrue(self.sqla.reached_withdrawal_limit(1, 41.0))
+        self.assertTrue(self.sqla.reached_withdrawal_limit(2, 1.0))
+
+    def test_transaction_ids_without_returning(self):
+        # an earlier transaction of another account: its id must not be taken for one of the batch's
+        self.sqla.post_operation(self._operation(3, 1))
+        inserts = []
+
+        def count_insert(conn, cursor, statement, *_):
+            if statement.startswith('INSERT INTO transacao'):
+                inserts.append(statement)
+
+        event.listen(self.sqla.engine, 'before_cursor_execute', count_insert)
+        try:
+            with patch.object(self.sqla.engine.dialect, 'insert_executemany_returning_sort_by_parameter_order',
+                              False):
+                results = self.sqla.apply_operations([self._operation(2, 5), self._operation(1, 10),
+                                                      self._operation(2, 5, OperationType.Withdrawal)])
+        finally:
+            event.remove(self.sqla.engine, 'before_cursor_execute', count_insert)
+
+        # the MySQL path: one multi-row INSERT, not one per transaction
+        self.assertEqual(1, len(inserts))
+
+        statement = self.sqla.get_extract_from_account(1) + self.sqla.get_extract_from_account(2)
+        self.assertEqual(sorted(statement, key=lambda transaction: transaction.id_transacao),
+                         sorted((result.transaction for result in results),
+                                key=lambda transaction: transaction.id_transacao))
+
+    def test_failed_batch_is_rolled_back(self):
+        with patch.object(self.sqla, '_insert_transactions', side_effect=RuntimeError):
+            with self.assertRaises(RuntimeError):
+                self.sqla.apply_operations([self._operation(1, 10), self._operation(1, 5, OperationType.Withdrawal)])
+
+        self.assertEqual(100.0, self.sqla.get_balance(1))
+        self.assertFalse(self.sqla.reached_withdrawal_limit(1, 100.0))
@@ -0,0 +1,278 @@
+import os
+import tempfile
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from decimal import Decimal
+from unittest.mock import Mock
+
+from src.account_responses import balance_reply
+from src.exceptions import DatabaseWritingException
+from src.json_provider import dumps_response_body
+from src.models.entities import Account, AccountType, Person, Transaction, OperationDTO, OperationType, \
+    OperationStatus
+from src.services.db_service import SQLAlchemyDBService
+from src.services.memory_db_service import InMemoryDBService
+
+
+def _account(account_id, balance=100.0, limit=100.0, active=True) -> Account:
+    return Account(id_conta=account_id, id_pessoa=1, saldo=balance, limite_saque_diario=limit, flag_ativo=active,
+                   tipo_conta=AccountType.Checking, data_criacao=datetime.now().date())
+
+
+def _operation(account_id: int, amount: float, operation_type: OperationType = OperationType.Deposit):
+    return OperationDTO(account_id=account_id, amount=amount, operation_type=operation_type)
+
+
+class TestInMemoryDBService(unittest.TestCase):
+    def setUp(self):
+        self.db = InMemoryDBService()
+        for account_id in (1, 2, 3):
+            self.db.create_new_account(_account(account_id, active=account_id != 3), 'hash')
+        self.today = datetime.now().date()
+
+    def test_get_account(self):
+        account, password = self.db.get_account(1)
+
+        self.assertEqual(_account(1), account)
+        self.assertEqual('hash', password)
+        self.assertEqual((None, None), self.db.get_account(4))
+
+    def test_returned_entities_are_copies(self):
+        account, _ = self.db.get_account(1)
+        account.saldo = 0.0
+        transaction = self.db.make_transaction(1, 10.0)
+        transaction.valor = 0.0
+
+        self.assertEqual(100.0, self.db.get_balance(1))
+        self.assertEqual(10.0, self.db.get_extract_from_account(1)[0].valor)
+
+    def test_create_account_with_taken_id(self):
+        with self.assertRaises(DatabaseWritingException):
+            self.db.create_new_account(_account(1), 'hash')
+
+    def test_generated_ids_follow_explicit_ones(self):
+        self.db.create_new_account(_account(None), 'hash')
+        self.db.create_new_person(Person(id_pessoa=None, nome='Ana', cpf='12345678901',
+                                         data_nascimento=self.today))
+
+        self.assertIsNotNone(self.db.get_account(4)[0])
+
+    def test_balance_and_status(self):
+        self.db.deposit_into_account(1, 50.0)
+        self.db.withdraw_from_account(1, 20.0)
+        self.db.change_account_active_status(1, False)
+
+        self.assertEqual(130.0, self.db.get_balance(1))
+        self.assertFalse(self.db.check_account_active(1))
+        self.assertIsNone(self.db.get_balance(4))
+        self.assertIsNone(self.db.check_account_active(4))
+
+    def test_balance_is_kept_in_cents(self):
+        for amount in (0.1, 0.2, 0.005):
+            self.db.post_operation(_operation(1, amount))
+
+        self.assertEqual(Decimal('100.31'), self.db.get_balance(1))
+        self.assertEqual('100.31', str(self.db.get_balance(1)))
+        self.assertEqual((100.31, 3), self.db.get_account_version(1))
+
+    def test_status_change_drops_the_cached_status(self):
+        self.db.account_status_cache = Mock()
+
+        self.db.change_account_active_status(1, False)
+
+        self.db.account_status_cache.invalidate.assert_called_once_with(1)
+
+    def test_account_version_follows_balance_and_statement(self):
+        self.assertEqual((100.0, None), self.db.get_account_version(1))
+
+        transaction, balance = self.db.post_operation(_operation(1, 10.0))
+
+        self.assertEqual((balance, transaction.id_transacao), self.db.get_account_version(1))
+        self.assertIsNone(self.db.get_account_version(4))
+
+    def test_statement_window_and_order(self):
+        self.db.add_transactions([
+            Transaction(id_transacao=10, id_conta=1, valor=1.0, data_transacao=self.today - timedelta(days=2)),
+            Transaction(id_transacao=5, id_conta=1, valor=2.0, data_transacao=self.today - timedelta(days=40)),
+            Transaction(id_transacao=7, id_conta=1, valor=3.0, data_transacao=self.today),
+            Transaction(id_transacao=8, id_conta=2, valor=4.0, data_transacao=self.today),
+        ])
+        new = self.db.make_transaction(1, 5.0)
+
+        self.assertEqual(11, new.id_transacao)
+        self.assertEqual([7, 10, 11], [t.id_transacao for t in self.db.get_extract_from_account(1)])
+        self.assertEqual([5, 7, 10, 11], [t.id_transacao for t in self.db.get_extract_from_account(1, days=60)])
+        self.assertEqual([10], [t.id_transacao for t in self.db.get_extract_from_account(1, after_id=7, limit=1)])
+        self.assertEqual([10, 11], [t.id_transacao for t in self.db.iter_extract_from_account(1, after_id=7)])
+        self.assertEqual([], self.db.get_extract_from_account(4))
+
+    def test_make_transaction_for_missing_account(self):
+        with self.assertRaises(DatabaseWritingException):
+            self.db.make_transaction(4, 10.0)
+
+    def test_post_operation(self):
+        transaction, balance = self.db.post_operation(_operation(1, 30.0, OperationType.Withdrawal))
+
+        self.assertEqual(-30.0, transaction.valor)
+        self.assertEqual(70.0, balance)
+        self.assertTrue(self.db.reached_withdrawal_limit(1, 71.0))
+        self.assertEqual((None, None), self.db.post_operation(_operation(4, 30.0)))
+
+    def test_execute_withdrawal(self):
+        result = self.db.execute_withdrawal(1, 60.0)
+
+        self.assertEqual(OperationStatus.Ok, result.status)
+        self.assertEqual(40.0, result.balance)
+        self.assertEqual(-60.0, result.transaction.valor)
+        self.assertEqual(OperationStatus.LimitReached, self.db.execute_withdrawal(1, 41.0).status)
+        self.assertEqual(OperationStatus.Blocked, self.db.execute_withdrawal(3, 1.0).status)
+        self.assertEqual(OperationStatus.NotFound, self.db.execute_withdrawal(4, 1.0).status)
+        self.assertEqual(40.0, self.db.get_balance(1))
+
+    def test_withdrawals_of_other_days_do_not_count(self):
+        self.db.add_transactions([Transaction(id_transacao=None, id_conta=1, valor=-100.0,
+                                              data_transacao=self.today - timedelta(days=1))])
+
+        self.assertFalse(self.db.reached_withdrawal_limit(1, 100.0))
+        self.assertTrue(self.db.reached_withdrawal_limit(1, 100.5))
+
+    def test_apply_operations(self):
+        self.db.make_transaction(2, -80.0)
+
+        results = self.db.apply_operations([
+            _operation(1, 10),
+            _operation(1, 60, OperationType.Withdrawal),
+            _operation(1, 50, OperationType.Withdrawal),
+            _operation(2, 30, OperationType.Withdrawal),
+            _operation(2, 20, OperationType.Withdrawal),
+            _operation(3, 10),
+            _operation(4, 10),
+            _operation(2, 0),
+        ])
+
+        self.assertEqual([OperationStatus.Ok, OperationStatus.Ok, OperationStatus.LimitReached,
+                          OperationStatus.LimitReached, OperationStatus.Ok, OperationStatus.Blocked,
+                          OperationStatus.NotFound, OperationStatus.Invalid], [result.status for result in results])
+        self.assertEqual([110.0, 50.0, 50.0, 100.0, 80.0], [result.balance for result in results[:5]])
+        self.assertEqual(50.0, self.db.get_balance(1))
+        self.assertEqual(80.0, self.db.get_balance(2))
+        self.assertEqual([2, 3, 4], [result.transaction.id_transacao for result in results if result.transaction])
+        self.assertTrue(self.db.reached_withdrawal_limit(2, 1.0))
+
+    def test_concurrent_withdrawals_respect_the_limit(self):
+        self.db.create_new_account(_account(10, balance=1000.0, limit=500.0), 'hash')
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            results = list(pool.map(lambda _: self.db.execute_withdrawal(10, 10.0), range(200)))
+
+        self.assertEqual(50, sum(result.status == OperationStatus.Ok for result in results))
+        self.assertEqual(500.0, self.db.get_balance(10))
+        self.assertEqual(50, len(self.db.get_extract_from_account(10)))
+
+    def test_concurrent_batches_on_overlapping_accounts(self):
+        batches = [[_operation(1, 1), _operation(2, 1)], [_operation(2, 1), _operation(1, 1)]] * 50
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            list(pool.map(self.db.apply_operations, batches))
+
+        self.assertEqual(200.0, self.db.get_balance(1))
+        self.assertEqual(200.0, self.db.get_balance(2))
+        ids = [t.id_transacao for t in self.db.get_extract_from_account(1) + self.db.get_extract_from_account(2)]
+        self.assertEqual(200, len(set(ids)))
+
+    def test_snapshot_round_trip(self):
+        self.db.create_new_person(Person(id_pessoa=1, nome='Ana', cpf='12345678901', data_nascimento=self.today))
+        self.db.execute_withdrawal(1, 60.0)
+        self.db.post_operation(_operation(2, 25.0))
+        path = os.path.join(tempfile.mkdtemp(), 'snapshot.json')
+
+        self.db.snapshot(path)
+        restored = InMemoryDBService.from_snapshot(path)
+
+        for account_id in (1, 2, 3):
+            self.assertEqual(self.db.get_account(account_id), restored.get_account(account_id))
+            self.assertEqual(self.db.get_extract_from_account(account_id),
+                             restored.get_extract_from_account(account_id))
+        self.assertTrue(restored.reached_withdrawal_limit(1, 41.0))
+        self.assertEqual(3, restored.make_transaction(1, 1.0).id_transacao)
+        self.assertEqual(['snapshot.json'], os.listdir(os.path.dirname(path)))
+
+
+class TestParityWithSQLAlchemyDBService(unittest.TestCase):
+    # Runs the same operations against SQLite and the in-memory service and expects the same answers
+
+    def setUp(self):
+        self.sqla = SQLAlchemyDBService('sqlite://')
+        self.sqla.metadata.create_all(self.sqla.engine)
+        self.memory = InMemoryDBService()
+        today = datetime.now().date()
+        with self.sqla.engine.begin() as connection:
+            connection.execute(self.sqla.conta_table.insert(), [{
+                'id_conta': account_id, 'id_pessoa': 1, 'saldo': 100, 'limite_saque_diario': 100,
+                'flag_ativo': account_id != 3, 'tipo_conta': 1, 'data_criacao': today, 'senha': 'hash'
+            } for account_id in (1, 2, 3)])
+        for account_id in (1, 2, 3):
+            self.memory.create_new_account(_account(account_id, active=account_id != 3), 'hash')
+        history = [Transaction(id_transacao=transaction_id, id_conta=transaction_id % 2 + 1, valor=-10.0 * (days + 1),
+                               data_transacao=today - timedelta(days=days))
+                   for transaction_id, days in enumerate((0, 1, 29, 30, 31, 0), start=1)]
+        with self.sqla.engine.begin() as connection:
+            connection.execute(self.sqla.transactions_table.insert(), [{
+                'id_transacao': t.id_transacao, 'id_conta': t.id_conta, 'valor': t.valor,
+                'data_transacao': t.data_transacao
+            } for t in history])
+        self.sqla.rebuild_withdrawal_counters(today)
+        self.memory.add_transactions(history)
+
+    def assertSameAnswer(self, call):
+        self.assertEqual(call(self.sqla), call(self.memory))
+
+    def test_reads(self):
+        for account_id in (1, 2, 3, 4):
+            self.assertSameAnswer(lambda db: db.get_account(account_id))
+            self.assertSameAnswer(lambda db: db.get_balance(account_id))
+            self.assertSameAnswer(lambda db: db.get_account_version(account_id))
+            self.assertSameAnswer(lambda db: db.check_account_active(account_id))
+            self.assertSameAnswer(lambda db: db.get_extract_from_account(account_id, days=30, after_id=0))
+            self.assertSameAnswer(lambda db: db.get_extract_from_account(account_id, days=31, after_id=1, limit=2))
+            self.assertSameAnswer(lambda db: list(db.iter_extract_from_account(account_id, days=365)))
+
+    def test_balance_json(self):
+        for db in (self.sqla, self.memory):
+            db.post_operation(_operation(1, 0.1))
+            db.post_operation(_operation(1, 20.15, OperationType.Withdrawal))
+
+        self.assertSameAnswer(lambda db: dumps_response_body(balance_reply(1, db.get_balance(1))))
+        self.assertIn(b'"balance":"79.95"', dumps_response_body(balance_reply(1, self.memory.get_balance(1))))
+
+    def test_writes(self):
+        for account_id in (1, 2):
+            for amount in (40, 50, 10):
+                self.assertSameAnswer(lambda db: db.reached_withdrawal_limit(account_id, amount))
+                self.assertSameAnswer(lambda db: db.execute_withdrawal(account_id, amount))
+        self.assertSameAnswer(lambda db: db.execute_withdrawal(3, 1))
+        self.assertSameAnswer(lambda db: db.execute_withdrawal(4, 1))
+        self.assertSameAnswer(lambda db: db.post_operation(_operation(1, 25)))
+        self.assertSameAnswer(lambda db: db.post_operation(_operation(2, 5, OperationType.Withdrawal)))
+        self.assertSameAnswer(lambda db: db.post_operation(_operation(4, 5)))
+        self.assertSameAnswer(lambda db: db.make_transaction(2, -5))
+        self.assertSameAnswer(lambda db: db.apply_operations([
+            _operation(1, 30), _operation(2, 90, OperationType.Withdrawal), _operation(1, 20, OperationType.Withdrawal),
+            _operation(3, 10), _operation(4, 10), _operation(1, 0),
+        ]))
+        self.assertSameAnswer(lambda db: db.deposit_into_account(2, 15))
+        self.assertSameAnswer(lambda db: db.withdraw_from_account(1, 5))
+        self.assertSameAnswer(lambda db: db.change_account_active_status(2, False))
+        self.assertSameAnswer(lambda db: db.update_account_password(1, 'rehashed', expected_hash='hash'))
+        self.assertSameAnswer(lambda db: db.update_account_password(1, 'stale', expected_hash='hash'))
+        self.assertSameAnswer(lambda db: db.update_account_password(2, 'reset'))
+        self.assertSameAnswer(lambda db: db.update_account_password(4, 'reset'))
+        self.assertSameAnswer(lambda db: db.execute_withdrawal(2, 1))
+        self.assertSameAnswer(lambda db: db.create_new_person(Person(id_pessoa=None, nome='Pessoa', cpf='00000000001',
+                                                                     data_nascimento=datetime.now().date())))
+        self.assertSameAnswer(lambda db: db.create_new_account(_account(None), 'hash'))
+        for account_id in (1, 2, 3, 4):
+            self.assertSameAnswer(lambda db: db.get_account(account_id))
+            self.assertSameAnswer(lambda db: db.get_account_version(account_id))
+            # without after_id or limit the SQL statement comes in index order
+            self.assertSameAnswer(lambda db: sorted(db.get_extract_from_account(account_id),
+                                                    key=lambda transaction: transaction.id_transacao))
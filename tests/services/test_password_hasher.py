@@ -0,0 +1,43 @@
+import unittest
+
+import bcrypt
+
+from src.exceptions import HasherBusyException
+from src.services.password_hasher import PasswordHasher
+
+
+class TestPasswordHasher(unittest.TestCase):
+    def test_hash_and_check_in_the_pool(self):
+        hasher = PasswordHasher(rounds=4, workers=1)
+        self.addCleanup(hasher.shutdown)
+
+        password_hash = hasher.hash('123456')
+
+        self.assertTrue(password_hash.startswith('$2b$04$'))
+        self.assertTrue(hasher.check(password_hash, '123456'))
+        self.assertFalse(hasher.check(password_hash, '654321'))
+
+    def test_hash_and_check_inline(self):
+        hasher = PasswordHasher(rounds=4, workers=0)
+
+        password_hash = hasher.hash('123456')
+
+        self.assertTrue(bcrypt.checkpw(b'123456', password_hash.encode()))
+        self.assertTrue(hasher.check(password_hash, '123456'))
+
+    def test_needs_rehash_when_the_rounds_change(self):
+        password_hash = PasswordHasher(rounds=4, workers=0).hash('123456')
+
+        self.assertFalse(PasswordHasher(rounds=4, workers=0).needs_rehash(password_hash))
+        self.assertTrue(PasswordHasher(rounds=5, workers=0).needs_rehash(password_hash))
+        self.assertTrue(PasswordHasher(rounds=5, workers=0).needs_rehash('not a bcrypt hash'))
+
+    def test_saturated_hasher_fails_fast(self):
+        hasher = PasswordHasher(rounds=4, workers=0, max_pending=1)
+        password_hash = hasher.hash('123456')
+        hasher._slots.acquire()
+
+        with self.assertRaises(HasherBusyException):
+            hasher.check(password_hash, '123456')
+        hasher._slots.release()
+        self.assertTrue(hasher.check(password_hash, '123456'))
@@ -0,0 +1,60 @@
+import os
+import tempfile
+import unittest
+
+from sqlalchemy import create_engine
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+
+from src.services.db_service import SQLAlchemyDBService
+from src.services.pool_metrics import InstrumentedQueuePool
+
+
+class TestInstrumentedQueuePool(unittest.TestCase):
+    def setUp(self):
+        handle, self.db_file = tempfile.mkstemp(suffix='.db')
+        os.close(handle)
+        self.engine = create_engine(f'sqlite:///{self.db_file}', poolclass=InstrumentedQueuePool,
+                                    pool_size=1, max_overflow=0, pool_timeout=0.01)
+
+    def tearDown(self):
+        self.engine.dispose()
+        os.remove(self.db_file)
+
+    def test_checkouts_are_recorded(self):
+        for _ in range(3):
+            with self.engine.connect():
+                pass
+
+        metrics = self.engine.pool.metrics.snapshot()
+        self.assertEqual(3, metrics['checkouts'])
+        self.assertEqual(0, metrics['checkout_timeouts'])
+        self.assertGreaterEqual(metrics['checkout_wait_seconds_total'], metrics['checkout_wait_seconds_max'])
+
+    def test_checkout_timeouts_are_recorded(self):
+        with self.engine.connect():
+            self.assertRaises(PoolTimeoutError, self.engine.connect)
+
+        metrics = self.engine.pool.metrics.snapshot()
+        self.assertEqual(2, metrics['checkouts'])
+        self.assertEqual(1, metrics['checkout_timeouts'])
+        self.assertGreaterEqual(metrics['checkout_wait_seconds_max'], 0.01)
+
+    def test_metrics_survive_dispose(self):
+        with self.engine.connect():
+            pass
+        self.engine.dispose()
+        with self.engine.connect():
+            pass
+
+        self.assertEqual(2, self.engine.pool.metrics.snapshot()['checkouts'])
+
+    def test_pool_status(self):
+        sqla = SQLAlchemyDBService(engine=self.engine)
+        checkouts = self.engine.pool.metrics.snapshot()['checkouts']
+        with self.engine.connect():
+            status = sqla.pool_status()
+
+        self.assertEqual(1, status['size'])
+        self.assertEqual(1, status['checked_out'])
+        self.assertEqual(0, status['overflow'])
+        self.assertEqual(checkouts + 1, status['checkouts'])
@@ -0,0 +1,120 @@
+import multiprocessing
+import unittest
+from decimal import Decimal
+
+from src.services.shared_cache import SharedAccountCache
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def _write_balances(cache: SharedAccountCache, first: int, count: int):
+    for value in range(first, first + count):
+        _, version = cache.get_balance(1)
+        cache.set_balance(1, Decimal(value).scaleb(-2) if value % 2 else float(value), version)
+        cache.invalidate(1)
+
+
+class TestSharedAccountCache(unittest.TestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+        self.cache = SharedAccountCache(slots=4, ttl=5.0, clock=self.clock)
+
+    def fill_balance(self, account_id: int, balance):
+        _, version = self.cache.get_balance(account_id)
+        self.cache.set_balance(account_id, balance, version)
+
+    def test_miss_then_hit(self):
+        self.assertEqual((None, 0), self.cache.get_active(1))
+
+        self.cache.set_active(1, False, 0)
+        self.fill_balance(1, Decimal('100.50'))
+
+        self.assertFalse(self.cache.get_active(1)[0])
+        self.assertEqual('100.50', str(self.cache.get_balance(1)[0]))
+        self.assertEqual(dict(slots=4, hits=2, misses=2, evictions=0, invalidations=0), self.cache.stats())
+
+    def test_versions(self):
+        for account_version in ((100.5, 7), (100.5, None)):
+            self.cache.invalidate(1)
+            self.cache.set_version(1, account_version, self.cache.get_version(1)[1])
+            self.assertEqual(account_version, self.cache.get_version(1)[0])
+
+        self.cache.invalidate(1)
+        self.assertIsNone(self.cache.get_version(1)[0])
+
+    def test_entries_expire(self):
+        self.fill_balance(1, 100.0)
+        self.clock.now = 4.9
+        self.assertEqual(100.0, self.cache.get_balance(1)[0])
+
+        self.clock.now = 5.0
+        self.assertIsNone(self.cache.get_balance(1)[0])
+
+    def test_invalidate(self):
+        self.fill_balance(1, 100.0)
+        self.cache.set_active(1, True, self.cache.get_active(1)[1])
+
+        self.cache.invalidate(1)
+
+        self.assertIsNone(self.cache.get_balance(1)[0])
+        self.assertIsNone(self.cache.get_active(1)[0])
+
+    def test_fill_is_dropped_after_a_concurrent_write(self):
+        _, version = self.cache.get_balance(1)
+        self.cache.invalidate(1)
+
+        self.cache.set_balance(1, 100.0, version)
+
+        self.assertIsNone(self.cache.get_balance(1)[0])
+
+    def test_colliding_accounts_replace_each_other(self):
+        self.fill_balance(1, 100.0)
+        _, version = self.cache.get_balance(5)
+        # 5 maps to the slot of 1: invalidating 5 also drops the fills of 5 started before it
+        self.cache.invalidate(5)
+        self.cache.set_balance(5, 500.0, version)
+        self.assertEqual(100.0, self.cache.get_balance(1)[0])
+
+        self.fill_balance(5, 500.0)
+
+        self.assertEqual(500.0, self.cache.get_balance(5)[0])
+        self.assertIsNone(self.cache.get_balance(1)[0])
+        self.assertEqual(1, self.cache.stats()['evictions'])
+
+    def test_uncacheable_values_are_skipped(self):
+        self.fill_balance(1, Decimal('1.005'))
+        self.assertIsNone(self.cache.get_balance(1)[0])
+
+        self.fill_balance(1, None)
+        self.cache.set_active(1, None, self.cache.get_active(1)[1])
+        self.assertIsNone(self.cache.get_balance(1)[0])
+        self.assertIsNone(self.cache.get_active(1)[0])
+
+    def test_forked_workers_share_the_slots(self):
+        context = multiprocessing.get_context('fork')
+        writers = [context.Process(target=_write_balances, args=(self.cache, first, 1000)) for first in (0, 10000)]
+        for writer in writers:
+            writer.start()
+
+        # every hit must be a value one of the processes wrote, with the type it was written with (odd values are
+        # stored as Decimal cents, even ones as floats)
+        while any(writer.is_alive() for writer in writers):
+            balance, _ = self.cache.get_balance(1)
+            if balance is not None:
+                value = int(balance.scaleb(2)) if isinstance(balance, Decimal) else int(balance)
+                self.assertEqual(isinstance(balance, Decimal), value % 2 == 1)
+                self.assertTrue(0 <= value < 1000 or 10000 <= value < 11000)
+        for writer in writers:
+            writer.join()
+            self.assertEqual(0, writer.exitcode)
+
+        child = context.Process(target=self.fill_balance, args=(2, 42.0))
+        child.start()
+        child.join()
+        self.assertEqual(42.0, self.cache.get_balance(2)[0])
@@ -1,14 +1,26 @@
 import unittest
+from datetime import date
 from unittest.mock import patch, Mock
 
+from flask_jwt_extended import create_access_token
+
 from src.app import app
+from src.config import account_status_cache
+from src.env_variables import BATCH_MAX_OPERATIONS
+from src.exceptions import HasherBusyException
+from src.models.entities import OperationDTO, OperationResult, OperationStatus, OperationType, Transaction
 import json
 from tests.utils.mock_db_interface import MockDBInterface
 
 
+def _auth_headers() -> dict:
+    with app.app_context():
+        return {'Authorization': f'Bearer {create_access_token(identity=1)}'}
+
+
 class TestApp(unittest.TestCase):
     @patch('src.app.db_interface', MockDBInterface())
-    @patch('src.app.bcrypt.check_password_hash', Mock(return_value=True))
+    @patch('src.app.password_hasher.check', Mock(return_value=True))
     @patch('src.app.create_access_token', Mock(return_value='token'))
     def test_create_token(self):
         response = app.test_client().post('/account/login', json={
@@ -23,7 +35,7 @@ class TestApp(unittest.TestCase):
         self.assertEqual(200, response.status_code)
 
     @patch('src.app.db_interface', MockDBInterface())
-    @patch('src.app.bcrypt.check_password_hash', Mock(return_value=False))
+    @patch('src.app.password_hasher.check', Mock(return_value=False))
     @patch('src.app.create_access_token', Mock(return_value='token'))
     def test_create_token_invalid_password(self):
         response = app.test_client().post('/account/login', json={
@@ -39,7 +51,7 @@ class TestApp(unittest.TestCase):
         self.assertEqual(400, response.status_code)
 
     @patch('src.app.db_interface', MockDBInterface())
-    @patch('src.app.bcrypt.check_password_hash', Exception('Mock exception'))
+    @patch('src.app.password_hasher.check', Exception('Mock exception'))
     def test_create_token_exception(self):
         response = app.test_client().post('/account/login', json={
             'account_id': 1,
@@ -51,4 +63,106 @@ class TestApp(unittest.TestCase):
             'message': "Something went wrong while retrieving account! Please try again later."
         }, res)
 
-        self.assertEqual(500, response.status_code)
\ No newline at end of file
+        self.assertEqual(500, response.status_code)
+
+    @patch('src.app.db_interface', MockDBInterface())
+    @patch('src.app.password_hasher', Mock(**{'check.return_value': True, 'needs_rehash.return_value': True,
+                                              'hash.return_value': 'rehashed'}))
+    @patch('src.app.create_access_token', Mock(return_value='token'))
+    def test_create_token_rehashes_outdated_password(self):
+        with patch('src.app.db_interface.update_account_password') as update_account_password:
+            response = app.test_client().post('/account/login', json={
+                'account_id': 1,
+                'password': '123456'
+            })
+
+        self.assertEqual(200, response.status_code)
+        update_account_password.assert_called_once_with(1, 'rehashed', expected_hash='password')
+
+    @patch('src.app.db_interface', MockDBInterface())
+    @patch('src.app.password_hasher.check', Mock(side_effect=HasherBusyException('Mock exception')))
+    def test_create_token_hasher_busy(self):
+        response = app.test_client().post('/account/login', json={
+            'account_id': 1,
+            'password': '123456'
+        })
+
+        self.assertEqual(503, response.status_code)
+        self.assertEqual('1', response.headers['Retry-After'])
+
+
+class TestOperationRoutes(unittest.TestCase):
+    def setUp(self):
+        self.client = app.test_client()
+        self.headers = _auth_headers()
+
+    def test_batch_size_is_checked(self):
+        deposit = {'account_id': 1, 'amount': 1, 'operation_type': 'Deposit'}
+        for operations in ([], [deposit] * (BATCH_MAX_OPERATIONS + 1), None):
+            with self.subTest(size=len(operations) if operations is not None else None):
+                response = self.client.post('/account/batch', json={'operations': operations}, headers=self.headers)
+
+                self.assertEqual(400, response.status_code)
+                self.assertEqual(f'Please send between 1 and {BATCH_MAX_OPERATIONS} operations.',
+                                 response.get_json()['message'])
+
+    def test_batch_results(self):
+        db_interface = Mock()
+        transaction = Transaction(id_transacao=9, id_conta=1, valor=-10.0, data_transacao=date(2026, 10, 17))
+        db_interface.apply_operations.return_value = [
+            OperationResult(status=OperationStatus.Ok, transaction=transaction, balance=90.0),
+            OperationResult(status=OperationStatus.LimitReached, balance=90.0),
+            OperationResult(status=OperationStatus.NotFound),
+        ]
+
+        with patch('src.app.db_interface', db_interface):
+            response = self.client.post('/account/batch', headers=self.headers, json={'operations': [
+                {'account_id': 1, 'amount': 10, 'operation_type': 'Withdrawal'},
+                {'account_id': 1, 'amount': 0, 'operation_type': 'Deposit'},
+                {'account_id': 1, 'amount': 5000, 'operation_type': 'Withdrawal'},
+                {'account_id': 'one', 'amount': 10, 'operation_type': 'Deposit'},
+                {'account_id': 4, 'amount': 10, 'operation_type': 'Deposit'},
+                {'account_id': 1, 'amount': 10, 'operation_type': 'Transfer'},
+                'not an operation',
+            ]})
+
+        self.assertEqual(200, response.status_code)
+        body = response.get_json()
+        self.assertEqual('1 of 7 operations were applied.', body['message'])
+        self.assertEqual(['Ok', 'Invalid', 'LimitReached', 'Invalid', 'NotFound', 'Invalid', 'Invalid'],
+                         [result['status'] for result in body['results']])
+        self.assertEqual(9, body['results'][0]['transaction']['id_transacao'])
+        # the malformed operations never reach the service
+        db_interface.apply_operations.assert_called_once_with([
+            OperationDTO(account_id=1, amount=10.0, operation_type=OperationType.Withdrawal),
+            OperationDTO(account_id=1, amount=5000.0, operation_type=OperationType.Withdrawal),
+            OperationDTO(account_id=4, amount=10.0, operation_type=OperationType.Deposit),
+        ])
+
+    def test_failed_batch_applies_nothing(self):
+        db_interface = Mock(**{'apply_operations.side_effect': RuntimeError('deadlock')})
+
+        with patch('src.app.db_interface', db_interface):
+            response = self.client.post('/account/batch', headers=self.headers, json={'operations': [
+                {'account_id': 1, 'amount': 10, 'operation_type': 'Deposit'},
+            ]})
+
+        self.assertEqual(400, response.status_code)
+        self.assertEqual('Could not apply the operations, none of them was applied.', response.get_json()['message'])
+
+    def test_single_operations_reject_a_zero_amount_like_the_batch(self):
+        # the deposit route checks the account status first
+        account_status_cache.set(1, True)
+        db_interface = Mock()
+
+        with patch('src.app.db_interface', db_interface):
+            for route in ('/account/deposit', '/account/withdraw'):
+                with self.subTest(route=route):
+                    response = self.client.post(route, json={'account_id': 1, 'amount': 0}, headers=self.headers)
+
+                    self.assertEqual(400, response.status_code)
+                    self.assertEqual('Please send an account_id and an amount greater than 0.',
+                                     response.get_json()['message'])
+
+        db_interface.post_operation.assert_not_called()
+        db_interface.execute_withdrawal.assert_not_called()
@@ -0,0 +1,174 @@
+import gzip
+import json
+import unittest
+from unittest.mock import Mock
+
+from flask import Flask, Response, jsonify, request
+
+from src.app_middleware import check_if_account_is_active, bind_unit_of_work, conditional_on_account_version, \
+    bind_response_compression
+from src.services.cache_service import TTLAccountStatusCache
+
+
+class TestCheckIfAccountIsActive(unittest.TestCase):
+    def setUp(self):
+        self.db_interface = Mock()
+        self.cache = TTLAccountStatusCache(max_size=10, ttl=60.0)
+        self.app = Flask(__name__)
+
+        @self.app.route('/account/balance')
+        @check_if_account_is_active(db_interface=self.db_interface, cache=self.cache)
+        def balance():
+            return jsonify({'status': 'success'})
+
+    def test_active_account_is_looked_up_once(self):
+        self.db_interface.check_account_active.return_value = True
+        client = self.app.test_client()
+
+        self.assertEqual(200, client.get('/account/balance?account_id=1').status_code)
+        self.assertEqual(200, client.get('/account/balance?account_id=1').status_code)
+
+        self.db_interface.check_account_active.assert_called_once_with(1)
+        self.assertEqual(1, self.cache.stats()['hits'])
+
+    def test_blocked_account_is_cached(self):
+        self.db_interface.check_account_active.return_value = False
+        client = self.app.test_client()
+
+        self.assertEqual(400, client.get('/account/balance?account_id=1').status_code)
+        self.assertEqual(400, client.get('/account/balance?account_id=1').status_code)
+
+        self.db_interface.check_account_active.assert_called_once_with(1)
+
+    def test_unknown_account_is_not_cached(self):
+        self.db_interface.check_account_active.return_value = None
+        client = self.app.test_client()
+
+        self.assertEqual(400, client.get('/account/balance?account_id=1').status_code)
+        self.assertEqual(400, client.get('/account/balance?account_id=1').status_code)
+
+        self.assertEqual(2, self.db_interface.check_account_active.call_count)
+
+    def test_invalidated_account_is_looked_up_again(self):
+        self.db_interface.check_account_active.return_value = True
+        client = self.app.test_client()
+        client.get('/account/balance?account_id=1')
+
+        self.cache.invalidate(1)
+        self.db_interface.check_account_active.return_value = False
+
+        self.assertEqual(400, client.get('/account/balance?account_id=1').status_code)
+        self.assertEqual(2, self.db_interface.check_account_active.call_count)
+
+
+class TestBindUnitOfWork(unittest.TestCase):
+    def setUp(self):
+        self.db_service = Mock()
+        self.app = Flask(__name__)
+        bind_unit_of_work(self.app, self.db_service)
+
+        @self.app.route('/ok')
+        def ok():
+            return jsonify({'status': 'success'})
+
+        @self.app.route('/error')
+        def error():
+            return jsonify({'status': 'error'}), 400
+
+    def test_successful_request_is_committed(self):
+        response = self.app.test_client().get('/ok')
+
+        self.assertEqual(200, response.status_code)
+        self.db_service.begin_unit_of_work.assert_called_once()
+        self.assertEqual(self.db_service.end_unit_of_work.call_args_list[0].kwargs, {'commit': True})
+
+    def test_error_response_is_rolled_back(self):
+        response = self.app.test_client().get('/error')
+
+        self.assertEqual(400, response.status_code)
+        for end_call in self.db_service.end_unit_of_work.call_args_list:
+            self.assertEqual(end_call.kwargs, {'commit': False})
+
+    def test_failed_commit_returns_server_error(self):
+        self.db_service.end_unit_of_work.side_effect = [Exception('Mock exception'), None]
+
+        response = self.app.test_client().get('/ok')
+
+        self.assertEqual(500, response.status_code)
+        self.assertEqual('error', response.json['status'])
+
+
+class TestConditionalOnAccountVersion(unittest.TestCase):
+    def setUp(self):
+        self.db_interface = Mock()
+        self.db_interface.get_account_version.return_value = (100.0, 7)
+        self.view = Mock(side_effect=lambda: jsonify({'after_id': request.args.get('after_id')}))
+        self.app = Flask(__name__)
+        self.app.route('/account/statement', endpoint='statement')(
+            conditional_on_account_version(self.db_interface, vary_on=('after_id',), daily=True)(self.view))
+
+    def test_matching_etag_skips_the_view(self):
+        client = self.app.test_client()
+        etag = client.get('/account/statement?account_id=1').headers['ETag']
+
+        response = client.get('/account/statement?account_id=1', headers={'If-None-Match': etag})
+
+        self.assertEqual(304, response.status_code)
+        self.assertEqual(etag, response.headers['ETag'])
+        self.assertEqual(b'', response.data)
+        self.assertEqual(1, self.view.call_count)
+
+    def test_etag_changes_with_the_version_and_arguments(self):
+        client = self.app.test_client()
+        etag = client.get('/account/statement?account_id=1').headers['ETag']
+
+        self.assertNotEqual(etag, client.get('/account/statement?account_id=1&after_id=3').headers['ETag'])
+        self.assertNotEqual(etag, client.get('/account/statement?account_id=2').headers['ETag'])
+        self.db_interface.get_account_version.return_value = (90.0, 8)
+        response = client.get('/account/statement?account_id=1', headers={'If-None-Match': etag})
+        self.assertEqual(200, response.status_code)
+        self.assertNotEqual(etag, response.headers['ETag'])
+
+    def test_unknown_account_goes_to_the_view(self):
+        self.db_interface.get_account_version.return_value = None
+
+        response = self.app.test_client().get('/account/statement?account_id=1')
+
+        self.assertEqual(200, response.status_code)
+        self.assertNotIn('ETag', response.headers)
+
+
+class TestBindResponseCompression(unittest.TestCase):
+    def setUp(self):
+        self.app = Flask(__name__)
+        bind_response_compression(self.app, min_size=100)
+
+        @self.app.route('/account/statement')
+        def statement():
+            return jsonify({'bank_statement': [{'valor': 10.0}] * int(request.args.get('rows', 50))})
+
+        @self.app.route('/account/statement/stream')
+        def stream():
+            return Response((chunk for chunk in ('[', '1' * 200, ']')), mimetype='application/json')
+
+    def test_large_bodies_are_compressed(self):
+        response = self.app.test_client().get('/account/statement', headers={'Accept-Encoding': 'gzip'})
+
+        self.assertEqual('gzip', response.headers['Content-Encoding'])
+        self.assertIn('Accept-Encoding', response.headers['Vary'])
+        self.assertEqual(50, len(json.loads(gzip.decompress(response.data))['bank_statement']))
+
+    def test_small_bodies_and_clients_without_gzip_are_not_compressed(self):
+        client = self.app.test_client()
+
+        self.assertNotIn('Content-Encoding', client.get('/account/statement?rows=1',
+                                                        headers={'Accept-Encoding': 'gzip'}).headers)
+        response = client.get('/account/statement')
+        self.assertNotIn('Content-Encoding', response.headers)
+        self.assertIn('Accept-Encoding', response.headers['Vary'])
+
+    def test_streamed_bodies_are_not_compressed(self):
+        response = self.app.test_client().get('/account/statement/stream', headers={'Accept-Encoding': 'gzip'})
+
+        self.assertNotIn('Content-Encoding', response.headers)
+        self.assertEqual(202, len(response.data))
@@ -0,0 +1,139 @@
+import os
+import tempfile
+import unittest
+from datetime import datetime, timedelta, timezone
+
+import jwt
+from flask import Flask
+from flask_jwt_extended import JWTManager, create_access_token, create_refresh_token
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+from starlette.testclient import TestClient
+
+from src.access_tokens import jwt_config
+from src.account_responses import STATEMENT_VARY_ON, account_etag
+from src.asgi_app import create_asgi_app
+from src.services.async_db_service import to_async_url
+from src.services.db_service import SQLAlchemyDBService
+
+
+def _token(secret: str = 'secret', **claims) -> str:
+    now = datetime.now(timezone.utc)
+    return jwt.encode({'sub': 1, 'type': 'access', 'iat': now, 'nbf': now, 'exp': now + timedelta(minutes=15),
+                       **claims}, secret, algorithm='HS256')
+
+
+def _flask_token(create_token=create_access_token, secret: str = 'secret', **kwargs) -> str:
+    # Issued the way the Flask app's login issues them
+    app = Flask(__name__)
+    app.config.update(jwt_config(secret))
+    JWTManager(app)
+    with app.app_context():
+        return create_token(identity=1, **kwargs)
+
+
+class TestAsgiApp(unittest.TestCase):
+    def setUp(self):
+        path = os.path.join(tempfile.mkdtemp(), 'asgi.db')
+        self.sync = SQLAlchemyDBService(f'sqlite:///{path}')
+        self.sync.metadata.create_all(self.sync.engine)
+        today = datetime.now().date()
+        with self.sync.engine.begin() as connection:
+            connection.execute(self.sync.conta_table.insert(), [{
+                'id_conta': account_id, 'id_pessoa': 1, 'saldo': 100, 'limite_saque_diario': 100,
+                'flag_ativo': account_id != 3, 'tipo_conta': 1, 'data_criacao': today, 'senha': 'hash'
+            } for account_id in (1, 2, 3)])
+            connection.execute(self.sync.transactions_table.insert(), [{
+                'id_transacao': transaction_id, 'id_conta': 1, 'valor': -10, 'data_transacao': today
+            } for transaction_id in (1, 2, 3)])
+
+        app = create_asgi_app(to_async_url(f'sqlite:///{path}'),
+                              dict(poolclass=AsyncAdaptedQueuePool, pool_size=2, max_overflow=0),
+                              jwt_secret_key='secret', statement_max_page_size=2)
+        self.client = TestClient(app).__enter__()
+        self.headers = {'Authorization': f'Bearer {_token()}'}
+
+    def tearDown(self):
+        self.client.__exit__(None, None, None)
+        self.sync.engine.dispose()
+
+    def test_balance(self):
+        response = self.client.get('/account/balance?account_id=1', headers=self.headers)
+
+        self.assertEqual(200, response.status_code)
+        self.assertEqual({
+            'status': 'success',
+            'message': 'Balance of account 1 was retrieved successfully',
+            'balance': '100.00'
+        }, response.json())
+        etag = account_etag('acc_balance', 1, self.sync.get_account_version(1), {}, (), False)
+        self.assertEqual(f'W/"{etag}"', response.headers['ETag'])
+        self.assertEqual('private, no-cache', response.headers['Cache-Control'])
+
+        response = self.client.get('/account/balance?account_id=1',
+                                   headers={**self.headers, 'If-None-Match': response.headers['ETag']})
+        self.assertEqual(304, response.status_code)
+        self.assertEqual(b'', response.content)
+
+    def test_account_status_errors(self):
+        response = self.client.get('/account/balance?account_id=3', headers=self.headers)
+        self.assertEqual(400, response.status_code)
+        self.assertEqual('Account 3 is currently blocked and you cannot make any operations with it.',
+                         response.json()['message'])
+
+        response = self.client.get('/account/statement?account_id=4', headers=self.headers)
+        self.assertEqual(400, response.status_code)
+        self.assertEqual('Currently, there is no account with ID: 4.', response.json()['message'])
+
+    def test_statement_pages(self):
+        response = self.client.get('/account/statement?account_id=1&limit=2', headers=self.headers)
+
+        self.assertEqual(200, response.status_code)
+        body = response.json()
+        self.assertEqual([1, 2], [transaction['id_transacao'] for transaction in body['bank_statement']])
+        self.assertEqual(2, body['next_after_id'])
+        args = {'account_id': '1', 'limit': '2'}
+        etag = account_etag('acc_statement', 1, self.sync.get_account_version(1), args, STATEMENT_VARY_ON, True)
+        self.assertEqual(f'W/"{etag}"', response.headers['ETag'])
+
+        body = self.client.get('/account/statement?account_id=1&limit=2&after_id=2', headers=self.headers).json()
+        self.assertEqual([3], [transaction['id_transacao'] for transaction in body['bank_statement']])
+        self.assertIsNone(body['next_after_id'])
+
+        response = self.client.get('/account/statement?account_id=1&limit=3', headers=self.headers)
+        self.assertEqual(400, response.status_code)
+        self.assertEqual('The limit must be between 1 and 2.', response.json()['message'])
+        self.assertNotIn('ETag', response.headers)
+
+    def test_jwt_errors(self):
+        cases = [
+            ({}, 401, 'Missing Authorization Header'),
+            ({'Authorization': 'Basic abc'}, 401,
+             "Missing 'Bearer' type in 'Authorization' header. Expected 'Authorization: Bearer <JWT>'"),
+            ({'Authorization': 'Bearer a b'}, 422, "Bad Authorization header. Expected 'Authorization: Bearer <JWT>'"),
+            ({'Authorization': f"Bearer {_token(exp=datetime.now(timezone.utc) - timedelta(seconds=1))}"}, 401,
+             'Token has expired'),
+            ({'Authorization': f"Bearer {_token('another secret')}"}, 422, 'Signature verification failed'),
+            ({'Authorization': f"Bearer {_token(type='refresh')}"}, 422, 'Only non-refresh tokens are allowed'),
+        ]
+        for headers, status, message in cases:
+            with self.subTest(message=message):
+                response = self.client.get('/account/balance?account_id=1', headers=headers)
+                self.assertEqual(status, response.status_code)
+                self.assertEqual({'msg': message}, response.json())
+
+    def test_accepts_the_flask_app_tokens(self):
+        response = self.client.get('/account/balance?account_id=1',
+                                   headers={'Authorization': f'Bearer {_flask_token()}'})
+        self.assertEqual(200, response.status_code)
+
+        cases = [
+            (_flask_token(expires_delta=timedelta(seconds=-1)), 401, 'Token has expired'),
+            (_flask_token(create_refresh_token), 422, 'Only non-refresh tokens are allowed'),
+            (_flask_token(secret='another secret'), 422, 'Signature verification failed'),
+        ]
+        for token, status, message in cases:
+            with self.subTest(message=message):
+                response = self.client.get('/account/balance?account_id=1',
+                                           headers={'Authorization': f'Bearer {token}'})
+                self.assertEqual(status, response.status_code)
+                self.assertEqual({'msg': message}, response.json())
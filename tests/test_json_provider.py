@@ -0,0 +1,61 @@
+import json
+import unittest
+from datetime import date
+from decimal import Decimal
+from unittest.mock import patch
+
+from flask import Flask
+
+from src import json_provider
+from src.json_provider import FastJSONProvider
+from src.models.entities import Account, AccountType, Person, Transaction
+
+
+class TestFastJSONProvider(unittest.TestCase):
+    def setUp(self):
+        self.app = Flask(__name__)
+        self.app.json = FastJSONProvider(self.app)
+        self.document = {
+            'balance': Decimal('100.50'),
+            'bank_statement': [Transaction(1, 1, -10.5, date(2023, 12, 12))],
+            'account': Account(1, 1, 100.5, 1000.0, True, AccountType.Checking, date(2022, 6, 18)),
+            'person': Person(1, 'Fulano da Silva', '00000000000', date(1999, 1, 1)),
+        }
+        self.expected = {
+            'balance': '100.50',
+            'bank_statement': [Transaction(1, 1, -10.5, date(2023, 12, 12)).to_dict()],
+            'account': self.document['account'].to_dict(),
+            'person': self.document['person'].to_dict(),
+        }
+
+    def test_entities_serialize_as_their_to_dict(self):
+        self.assertIsNotNone(json_provider.orjson)
+        self.assertEqual(self.expected, json.loads(self.app.json.dumps(self.document)))
+
+    def test_stdlib_fallback_produces_the_same_document(self):
+        with patch.object(json_provider, 'orjson', None):
+            self.assertEqual(self.expected, json.loads(self.app.json.dumps(self.document)))
+            with self.app.app_context():
+                response = self.app.json.response(self.document)
+        self.assertEqual(self.expected, response.get_json())
+
+    def test_response(self):
+        with self.app.app_context():
+            response = self.app.json.response(self.document)
+
+        self.assertEqual('application/json', response.mimetype)
+        self.assertTrue(response.data.endswith(b'\n'))
+        self.assertEqual(self.expected, response.get_json())
+
+    def test_dict_keys_are_sorted(self):
+        self.assertEqual('{"a":1,"b":2}', self.app.json.dumps({'b': 2, 'a': 1}))
+
+    def test_unsupported_arguments_fall_back_to_stdlib(self):
+        self.assertEqual('{\n    "a": 1\n}', self.app.json.dumps({'a': 1}, indent=4))
+
+    def test_loads(self):
+        self.assertEqual({'account_id': 1}, self.app.json.loads(b'{"account_id": 1}'))
+
+    def test_unknown_types_are_rejected(self):
+        with self.assertRaises(TypeError):
+            self.app.json.dumps({'value': object()})
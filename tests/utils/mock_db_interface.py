@@ -1,7 +1,8 @@
 from datetime import datetime
-from typing import Union, List, Optional, Tuple
+from typing import Union, List, Optional, Tuple, Iterator
 
-from src.models.entities import Account, Person, Transaction, AccountType
+from src.models.entities import Account, Person, Transaction, AccountType, OperationDTO, OperationType, \
+    OperationResult, OperationStatus
 from src.services.ports.db_interface import DBInterface
 
 
@@ -18,13 +19,21 @@ class MockDBInterface(DBInterface):
     def get_balance(self, account_id: int) -> Union[float, None]:
         return 100.0
 
+    def get_account_version(self, account_id: int) -> Tuple[float, Optional[int]]:
+        return self.get_balance(account_id), 1
+
     def withdraw_from_account(self, account_id: int, amount: float):
         return None
 
     def change_account_active_status(self, account_id: int, active: bool):
         return None
 
-    def get_extract_from_account(self, account_id: int, days: int = 30) -> List[Transaction]:
+    def update_account_password(self, account_id: int, password_hash: str,
+                                expected_hash: Optional[str] = None) -> bool:
+        return True
+
+    def get_extract_from_account(self, account_id: int, days: int = 30, after_id: Optional[int] = None,
+                                 limit: Optional[int] = None) -> List[Transaction]:
         rows = [
             (1, account_id, 103.52, datetime.strptime('2023-12-12', '%Y-%m-%d')),
             (2, account_id, 128.98, datetime.strptime('2023-12-15', '%Y-%m-%d'))
@@ -34,7 +43,11 @@ class MockDBInterface(DBInterface):
             id_conta=row[1],
             valor=row[2],
             data_transacao=row[3].strftime('%Y-%m-%d')
-        )) for row in rows]
+        )) for row in rows if after_id is None or row[0] > after_id][:limit]
+
+    def iter_extract_from_account(self, account_id: int, days: int = 30,
+                                  after_id: Optional[int] = None) -> Iterator[Transaction]:
+        yield from self.get_extract_from_account(account_id, days, after_id)
 
     def make_transaction(self, account_id: int, amount: float) -> Transaction:
         transaction = {
@@ -45,6 +58,10 @@ class MockDBInterface(DBInterface):
         }
         return Transaction.from_dict(transaction)
 
+    def post_operation(self, operation: OperationDTO) -> Tuple[Transaction, float]:
+        amount = operation.amount if operation.operation_type == OperationType.Deposit else -operation.amount
+        return self.make_transaction(operation.account_id, amount), self.get_balance(operation.account_id) + amount
+
     def check_account_active(self, account_id: int) -> bool:
         if account_id < 0:
             return False
@@ -53,6 +70,19 @@ class MockDBInterface(DBInterface):
     def reached_withdrawal_limit(self, account_id: int, withdrawal_amount: float) -> bool:
         return False
 
+    def execute_withdrawal(self, account_id: int, amount: float) -> OperationResult:
+        if account_id < 0:
+            return OperationResult(status=OperationStatus.Blocked)
+        return OperationResult(status=OperationStatus.Ok,
+                               transaction=self.make_transaction(account_id, -amount),
+                               balance=self.get_balance(account_id) - amount)
+
+    def apply_operations(self, operations: List[OperationDTO]) -> List[OperationResult]:
+        return [self.execute_withdrawal(operation.account_id, operation.amount)
+                if operation.operation_type == OperationType.Withdrawal
+                else OperationResult(status=OperationStatus.Ok, transaction=self.post_operation(operation)[0])
+                for operation in operations]
+
     def get_account(self, account_id: int) -> tuple[Account, str]:
         return Account.from_dict({
             "id_conta": account_id,